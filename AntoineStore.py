@@ -0,0 +1,156 @@
+import os
+import sys
+import tempfile
+
+import numpy as np
+
+import FileRead as FR
+
+
+class AntoineStore:
+    """Compiled, memory-mapped store of Antoine coefficients built from a coefficient CSV
+
+    The store is a single .npy file holding a structured array sorted by chemical name, so it can be memory-mapped in
+    near-constant time and searched in O(log n).  It is rebuilt automatically whenever the CSV is newer.  If the store
+    cannot be written, e.g. because the CSV's directory is read-only, the parsed table is used from memory instead.
+
+    Public-Intended Methods:
+        get_coefficients(chemical):     Returns [A, B, C] for a chemical
+        get_keys():                     Returns chemical names, in the CSV's order
+        get_data():                     Returns every chemical's coefficients, mirroring FileRead.get_data()
+
+    Attributes:
+        csv_file:       string; address of the source coefficient CSV
+        store_file:     string; address of the compiled store
+        table:          memory-mapped structured array, or an in-memory one if the store could not be written; fields
+                        "name", "order" (CSV row) and "coefficients"
+        _reported:      set shared by every instance; store files already reported as unwritable
+    """
+    _reported = set()
+
+    def __init__(self, csv_file, store_file=None):
+        self.csv_file = csv_file
+        self.store_file = store_file if store_file is not None else os.path.splitext(csv_file)[0] + ".npy"
+        self.table = None
+        if self.is_stale():
+            table = self.build()
+            if not self.save(table):
+                self.table = table
+        if self.table is None:
+            self.table = np.load(self.store_file, mmap_mode="r")
+        self._keys = None
+
+    def is_stale(self):
+        """Checks whether the compiled store is missing or older than the CSV
+
+        Returns:
+            stale:  True if the store must be rebuilt
+        """
+        if not os.path.exists(self.store_file):
+            return True
+        return os.path.getmtime(self.store_file) < os.path.getmtime(self.csv_file)
+
+    def build(self):
+        """Parses the CSV into the sorted table the store holds
+
+        Returns:
+            table:  Structured array; see the table attribute
+        """
+        data = FR.FileRead(self.csv_file, ",", True).get_data()
+        names = list(data.keys())
+        name_length = max([len(name) for name in names] + [1])
+
+        table = np.zeros(len(names), dtype=[("name", "U%d" % name_length), ("order", "i8"),
+                                            ("coefficients", "f8", (3,))])
+        table["name"] = names
+        table["order"] = np.arange(len(names))
+        table["coefficients"] = [data[name] for name in names]
+        table.sort(order="name")
+        return table
+
+    def save(self, table):
+        """Writes the compiled store
+
+        Written to a uniquely named temporary file first and then moved into place, so concurrent readers never see a
+        partial store and concurrent writers, in any process or thread, never share a temporary file
+
+        Args:
+            table:  Structured array returned by build
+
+        Returns:
+            saved:  False if the store could not be written; reported once per store file
+        """
+        temporary_file = None
+        try:
+            with tempfile.NamedTemporaryFile("wb", dir=os.path.dirname(os.path.abspath(self.store_file)),
+                                             prefix=os.path.basename(self.store_file) + ".", suffix=".tmp",
+                                             delete=False) as file:
+                temporary_file = file.name
+                np.save(file, table)
+            os.replace(temporary_file, self.store_file)
+            return True
+        except OSError as inst:
+            if temporary_file is not None and os.path.exists(temporary_file):
+                os.remove(temporary_file)
+            if self.store_file not in self._reported:
+                self._reported.add(self.store_file)
+                print("OSError: cannot write " + self.store_file + "; parsing " + self.csv_file + " in memory -", inst,
+                      file=sys.stderr)
+            return False
+
+    def find(self, chemical):
+        """Binary searches the sorted names for a chemical
+
+        Args:
+            chemical:   Name being searched for
+
+        Returns:
+            index:      Row of "chemical" in the store, or None if absent
+        """
+        names = self.table["name"]
+        index = int(np.searchsorted(names, chemical))
+        if index < len(names) and names[index] == chemical:
+            return index
+        return None
+
+    def get_coefficients(self, chemical):
+        """Retrieves the Antoine coefficients of a chemical
+
+        Args:
+            chemical:   Name of the chemical
+
+        Returns:
+            coefficients:   [A, B, C]
+
+        Raises:
+            KeyError:   If the chemical is not in the store
+        """
+        index = self.find(chemical)
+        if index is None:
+            raise KeyError(chemical)
+        return [float(value) for value in self.table["coefficients"][index]]
+
+    def get_keys(self):
+        """Public facing method for only retrieving chemical names, in the order of the CSV
+
+        Returns:
+            keys:   List of chemical names
+        """
+        if self._keys is None:
+            order = np.argsort(self.table["order"])
+            self._keys = [str(name) for name in self.table["name"][order]]
+        return self._keys
+
+    def get_data(self):
+        """Builds the same dictionary FileRead.get_data() returns; prefer get_coefficients for single lookups
+
+        Returns:
+            data:   Dictionary; key: chemical name; value: [A, B, C]
+        """
+        return {chemical: self.get_coefficients(chemical) for chemical in self.get_keys()}
+
+    def __contains__(self, chemical):
+        return self.find(chemical) is not None
+
+    def __len__(self):
+        return len(self.table)
@@ -1,13 +1,25 @@
-import numpy as np
+import sys
 
-import math
-import general_methods as gm
-import FileRead as FR
+import activity_models as am
+import distillation_core as dc
+import vle_methods as vm
+import AntoineStore
+import DependencyGraph
+import VLECache
+import stage_methods as sm
 
 
 class BinarySystem:
     """Used to generate relevant plots for distilling a binary chemical system
 
+    A thin, stateful wrapper around the pure functions of distillation_core: it holds the current selections, builds
+    their immutable SystemSpec, and shares solved VLE tables and stage solves between instances through LRU caches.
+    Code that runs in thread or process pools should call distillation_core directly.
+
+    Every derived value lives in a DependencyGraph (see make_dependency_graph), from the Antoine coefficients through
+    the temperature bounds, VLE table, effective VLE and stages to the diagram lines, so an edit only recomputes what
+    depends on it: a new Murphree efficiency reuses the VLE table, and a new reflux ratio the temperature bounds.
+
     Public-Intended Methods:
         plot_Txy_diagram():                             Creates a Txy diagram based on the chemicals provided
         plot_vapor_liquid_equilibrium_diagram():        Creates a VLE diagram based on the chemicals provided
@@ -15,30 +27,216 @@ class BinarySystem:
                                                         provided and tower specifications indicated in "towerSpecs"
 
     Attributes:
-        _PURE_LIGHT_CHEMICAL:   const int; represents the system as purely the light
-        _PURE_HEAVY_CHEMICAL:   const int; represents the system as purely the heavy
         light_chemical:         string; name of the light chemical used
         heavy_chemical:         string; name of the heavy chemical used
-        antoine_coefficients:   dictionary floats; key: chemical name; value: Antoine coefficients for determining
-                                saturated pressure
-        temperature_bounds:             list int; indicates temperature boundaries for pure light and pure heavy
-        x:                      list floats; liquid mole fractions corresponding to range(temperature_bounds[0], temperature_bounds[1])
-        y:                      list floats; vapor mole fractions corresponding to range(temperature_bounds[0], temperature_bounds[1])
+        pressure:               float; operating pressure of the system, in mmHg
+        activity_model:         string; key of activity_models.ACTIVITY_MODELS requested for the liquid phase
+        parameter_file:         string or None; binary-interaction-parameter CSV, or None for the model's default
+        max_permitted_steps:    int; stage limit of McCabe Thiele stepping; designs needing more are reported as "N/A"
+        interpolation_tolerance: float or None; if set, the temperature grid is refined adaptively until linear
+                                interpolation of x(T) and y(x) is within this error, else a fixed 1 K step is used
+        data_source:            AntoineStore built from the Antoine coefficient CSV "data_file"
+        system:                 distillation_core.SystemSpec of the current selections
+        graph:                  DependencyGraph of every value derived from the selections and tower specifications
+        steps_required:         int or "N/A"; stages required by the last stage solve
+        feed_step:              int; optimal feed stage of the last stage solve
+        stage_status:           string; outcome of the last stage solve
+        minimum_reflux:         float; minimum reflux ratio found by the last stage solve
+        _vle_cache:             VLECache shared by every instance; holds recent VLETables by SystemSpec
+        _stage_cache:           VLECache shared by every instance; holds recent StageResults by system and TowerSpec
+        _disk_cache:            DiskCache or None, shared by every instance; persistent store behind both caches
+        _parameter_files:       dictionary shared by every instance; key: parameter CSV; value: its parsed parameters
+        _parameter_notices:     set shared by every instance; pairs already reported as lacking interaction parameters
+        _LINE_STYLES:           const dictionary; key: line label; value: pyplot format string used to draw it
     """
-    _PURE_LIGHT_CHEMICAL = 1
-    _PURE_HEAVY_CHEMICAL = 0
-    _MAX_PERMITTED_STEPS = 51
-    steps_required = 0
-    feed_step = 0
-
-    def __init__(self, light_chemical, heavy_chemical):
+    _vle_cache = VLECache.VLECache()
+    _stage_cache = VLECache.VLECache(max_entries=256)
+    _disk_cache = None
+    _parameter_files = {}
+    _parameter_notices = set()
+    _LINE_STYLES = {"Liquid": "-b", "Vapor": "-r", "Eq. Curve": "-k", "OP": "-b", "Effective Eq.": "--k",
+                    "McCabe Thiele": "-g"}
+
+    def __init__(self, light_chemical, heavy_chemical, interpolation_tolerance=None, data_file="antoineData.csv",
+                 pressure=vm.STANDARD_PRESSURE, activity_model=am.IDEAL, parameter_file=None,
+                 max_steps=sm.DEFAULT_MAX_PERMITTED_STEPS):
         self.light_chemical = light_chemical
         self.heavy_chemical = heavy_chemical
-        self.data_source = FR.FileRead("antoineData.csv", ",", True)
-        self.antoine_coefficients = self.get_Antoine()
-        self.temperature_bounds = self.get_temperature_boundaries()
-        self.verify_correct_chemical_labels()
-        self.x, self.y = self.get_vapor_liquid_equilibrium_data()
+        self.pressure = pressure
+        self.activity_model = activity_model
+        self.parameter_file = parameter_file
+        self.max_permitted_steps = max_steps
+        self.interpolation_tolerance = interpolation_tolerance
+        self.data_source = AntoineStore.AntoineStore(data_file)
+        self.steps_required = 0
+        self.feed_step = 0
+        self.stage_status = sm.COMPLETE
+        self.minimum_reflux = 0
+        self.graph = self.make_dependency_graph()
+        self.update_binary_system()
+
+    def __copy__(self):
+        """Copies share solved values, but each has its own dependency graph, so editing one never affects the other"""
+        duplicate = type(self).__new__(type(self))
+        duplicate.__dict__.update(self.__dict__)
+        duplicate.graph = self.graph.copy()
+        return duplicate
+
+    def make_dependency_graph(self):
+        """Declares the inputs of the system and the values derived from them
+
+        Inputs are the selections ("chemicals", "pressure", "interpolation_tolerance", "activity_model", "max_steps")
+        and the fields of the frozen tower specification, split into the "operating_line" (R, xB, xF, xD), the
+        "section_efficiencies" (murphree, stripping_murphree) and the "stage_efficiencies" so each invalidates no more
+        than it affects; "sweep_pressures" holds the overlaid pressures.
+        Nodes, each listed with what it reads:
+            coefficients:           chemicals
+            interaction_parameters: activity_model
+            system:                 chemicals, coefficients, pressure, interpolation_tolerance, activity_model,
+                                    interaction_parameters
+            boundaries:             system
+            VLE:                    system, boundaries
+            tower:                  operating_line, section_efficiencies, stage_efficiencies
+            effective VLE:          VLE, operating_line, section_efficiencies
+            stages:                 system, VLE, effective VLE, tower, max_steps
+            GRAPH sweep:            system, sweep_pressures, and for "Distillation" also tower and max_steps
+            GRAPH diagram:          VLE, GRAPH sweep, and for "Distillation" also tower and stages
+        where GRAPH is "Txy", "VLE" or "Distillation".
+
+        Returns:
+            graph:  DependencyGraph; inputs hold placeholders until update_binary_system and set_tower_specifications
+        """
+        graph = DependencyGraph.DependencyGraph()
+        for name, value in [("chemicals", None), ("pressure", self.pressure),
+                            ("interpolation_tolerance", self.interpolation_tolerance), ("activity_model", None),
+                            ("max_steps", self.max_permitted_steps), ("operating_line", None),
+                            ("section_efficiencies", (1, None)), ("stage_efficiencies", None), ("sweep_pressures", ())]:
+            graph.add_input(name, value)
+
+        graph.add_node("coefficients", self.get_coefficients_node, ["chemicals"])
+        graph.add_node("interaction_parameters", self.get_interaction_parameters_node, ["activity_model"])
+        graph.add_node("system", self.get_system_node, ["chemicals", "coefficients", "pressure",
+                                                        "interpolation_tolerance", "activity_model",
+                                                        "interaction_parameters"])
+        graph.add_node("boundaries", lambda get: dc.get_temperature_bounds(get("system")), ["system"])
+        graph.add_node("VLE", self.get_VLE_node, ["system", "boundaries"])
+        graph.add_node("tower", lambda get: dc.TowerSpec(*get("operating_line"), *get("section_efficiencies"),
+                                                         get("stage_efficiencies")),
+                       ["operating_line", "section_efficiencies", "stage_efficiencies"])
+        graph.add_node("effective VLE", self.get_effective_VLE_node, ["VLE", "operating_line", "section_efficiencies"])
+        graph.add_node("stages", self.get_stages_node, ["system", "VLE", "effective VLE", "tower", "max_steps"])
+
+        for graph_type in ["Txy", "VLE"]:
+            graph.add_node(graph_type + " sweep", self.get_sweep_node(graph_type), ["system", "sweep_pressures"])
+            graph.add_node(graph_type + " diagram", self.get_diagram_node(graph_type), ["VLE", graph_type + " sweep"])
+        graph.add_node("Distillation sweep", self.get_sweep_node("Distillation"),
+                       ["system", "sweep_pressures", "tower", "max_steps"])
+        graph.add_node("Distillation diagram", self.get_diagram_node("Distillation"),
+                       ["VLE", "Distillation sweep", "tower", "stages"])
+        return graph
+
+    def get_coefficients_node(self, get):
+        """Looks up the Antoine coefficients of both chemicals, in the order they were given"""
+        return tuple(self.data_source.get_coefficients(chemical) for chemical in get("chemicals"))
+
+    def get_interaction_parameters_node(self, get):
+        """Reads the interaction parameters of a non-ideal model once per file
+
+        Returns:
+            parameter_file:         The CSV read, or None for the ideal model
+            interaction_parameters: Its parsed parameters, or None for the ideal model
+        """
+        activity_model, parameter_file = get("activity_model")
+        if activity_model == am.IDEAL:
+            return None, None
+        parameter_file = parameter_file or am.ACTIVITY_MODELS[activity_model][1]
+        if parameter_file not in self._parameter_files:
+            self._parameter_files[parameter_file] = am.read_interaction_parameters(parameter_file)
+        return parameter_file, self._parameter_files[parameter_file]
+
+    def get_system_node(self, get):
+        """Builds the SystemSpec, reporting once per pair a non-ideal model that has no parameters for it"""
+        activity_model = get("activity_model")[0]
+        parameter_file, interaction_parameters = get("interaction_parameters")
+        system = dc.make_system_spec(*get("chemicals"), *get("coefficients"), get("pressure"),
+                                     get("interpolation_tolerance"), activity_model, interaction_parameters)
+
+        notice = (activity_model, parameter_file, system.light_chemical, system.heavy_chemical)
+        if parameter_file is not None and system.activity_parameters is None and notice not in self._parameter_notices:
+            self._parameter_notices.add(notice)
+            print("KeyError: no " + activity_model + " parameters for " + system.light_chemical + "/" +
+                  system.heavy_chemical + " in " + parameter_file + "; using ideal Raoult behaviour", file=sys.stderr)
+        return system
+
+    def get_VLE_node(self, get):
+        """Restores the VLE table from the shared VLE cache or the disk cache, solving it only if neither holds it"""
+        system = get("system")
+        table = self._vle_cache.get(system)
+        if table is None:
+            table = self.get_persistent(("VLE", system), lambda: dc.solve_vle(system, get("boundaries")))
+            dc.set_read_only(table)
+            self._vle_cache.put(system, table)
+        return table
+
+    def get_effective_VLE_node(self, get):
+        """Solves the effective VLE of the section efficiencies; None if both are 1"""
+        tower = dc.TowerSpec(*get("operating_line"), *get("section_efficiencies"))
+        if tower.get_section_efficiencies() == (1, 1):
+            return None
+        effY = dc.get_effective_vapor_liquid_equilibrium_data(get("VLE"), tower)
+        effY.setflags(write=False)
+        return effY
+
+    def get_stages_node(self, get):
+        """Restores the stage solve from the shared stage cache or the disk cache, stepping only if neither holds it"""
+        key = (get("system"), get("max_steps"), get("tower"))
+        stage_result = self._stage_cache.get(key)
+        if stage_result is None:
+            stage_result = self.get_persistent(("stages",) + key, lambda: dc.solve_stages(
+                key[0], key[2], get("VLE"), key[1], get("effective VLE")))
+            self._stage_cache.put(key, stage_result)
+        return stage_result
+
+    @staticmethod
+    def get_sweep_node(graph_type):
+        """Creates the node function of a graph type's pressure sweep overlay, which is None without sweep pressures"""
+        def get_sweep(get):
+            sweep_pressures = get("sweep_pressures")
+            if not len(sweep_pressures):
+                return None
+            tower = get("tower") if graph_type == "Distillation" else None
+            max_steps = get("max_steps") if graph_type == "Distillation" else sm.DEFAULT_MAX_PERMITTED_STEPS
+            return dc.get_pressure_sweep_diagram_data(get("system"), graph_type, tower, sweep_pressures, max_steps)
+        return get_sweep
+
+    @staticmethod
+    def get_diagram_node(graph_type):
+        """Creates the node function of a graph type's lines and axis limits, including any sweep overlay"""
+        def get_diagram(get):
+            if graph_type == "Txy":
+                diagram_data = dc.get_Txy_diagram_data(get("VLE"))
+            elif graph_type == "VLE":
+                diagram_data = dc.get_vapor_liquid_equilibrium_diagram_data(get("VLE"))
+            else:
+                diagram_data = dc.get_reflux_distillation_diagram_data(get("VLE"), get("tower"), get("stages"))
+            sweep = get(graph_type + " sweep")
+            return diagram_data if sweep is None else dc.overlay_diagram_data(diagram_data, sweep)
+        return get_diagram
+
+    def set_tower_specifications(self, towerSpecs):
+        """Passes the tower specifications to the dependency graph; only the parts that changed invalidate anything
+
+        Args:
+            towerSpecs:     TowerSpecs object containing information on the tower configuration
+        """
+        tower = dc.freeze_tower_specs(towerSpecs)
+        self.graph.set_input("operating_line", tower[:4])
+        self.graph.set_input("section_efficiencies", (tower.murphree, tower.stripping_murphree))
+        self.graph.set_input("stage_efficiencies", tower.stage_murphree)
+
+    def get_graph_statistics(self):
+        """Returns the computed / skipped / invalidated counters of the dependency graph; see DependencyGraph"""
+        return self.graph.get_statistics()
 
     def set_light_chemical(self, new_chemical):
         """Changes the light chemical in the system and then updates
@@ -72,6 +270,33 @@ class BinarySystem:
         """Returns a list of the current chemicals"""
         return [self.light_chemical, self.heavy_chemical]
 
+    def set_pressure(self, new_pressure):
+        """Changes the operating pressure of the system and then updates
+
+        Args:
+            new_pressure:   The replacement for pressure, in mmHg
+        """
+        self.pressure = new_pressure
+        self.update_binary_system()
+
+    def get_pressure(self):
+        return self.pressure
+
+    def set_activity_model(self, new_model, parameter_file=None):
+        """Changes the liquid-phase activity model of the system and then updates
+
+        Args:
+            new_model:      Key of activity_models.ACTIVITY_MODELS
+            parameter_file: Binary-interaction-parameter CSV; None for the model's default file
+        """
+        self.activity_model = new_model
+        self.parameter_file = parameter_file
+        self.update_binary_system()
+
+    def get_activity_model(self):
+        """Returns the activity model actually in use, which is ideal if the pair has no interaction parameters"""
+        return self.system.activity_model
+
     def get_all_potential_chemicals(self):
         """Recovers all the chemicals read from the data file"""
         return self.data_source.get_keys()
@@ -82,106 +307,163 @@ class BinarySystem:
     def get_feed_step(self):
         return self.feed_step
 
+    def get_stage_status(self):
+        """Returns the outcome of the last stage solve: stage_methods.COMPLETE, INFEASIBLE or STEP_LIMIT"""
+        return self.stage_status
+
+    def get_last_minimum_reflux(self):
+        """Returns the minimum reflux ratio found by the last stage solve"""
+        return self.minimum_reflux
+
+    def set_max_permitted_steps(self, max_steps):
+        """Changes the stage limit of McCabe Thiele stepping
+
+        Designs at or below their minimum reflux are rejected before stepping, and stepping stops as soon as it stalls,
+        so a limit in the thousands only costs the stages a design really needs
+
+        Args:
+            max_steps:  The replacement for max_permitted_steps
+        """
+        self.max_permitted_steps = max_steps
+        self.graph.set_input("max_steps", max_steps)
+
     def update_binary_system(self):
-        """Reconfigures chemical-specific properties such as VLE and temperature boundaries if a chemical is changed
+        """Passes the current selections to the dependency graph and rebuilds the SystemSpec if any of them changed,
+        relabelling the chemicals if they were given out of order
+
+        Only the Antoine coefficients and interaction parameters are looked up here; the VLE table is solved, or
+        restored from the shared VLE cache, the first time it is used.
         """
-        self.antoine_coefficients = self.get_Antoine()
-        self.temperature_bounds = [200, 1000]
-        self.temperature_bounds = self.get_temperature_boundaries()
-        self.verify_correct_chemical_labels()
-        self.extend_temperature_boundaries()
-        self.x, self.y = self.get_vapor_liquid_equilibrium_data()
+        chemicals = (self.light_chemical, self.heavy_chemical)
+        # A relabelled pair keeps the order it was requested in, so relabelling alone invalidates nothing
+        if self.graph.get("chemicals") is None or set(chemicals) != set(self.graph.get("chemicals")):
+            self.graph.set_input("chemicals", chemicals)
+        self.graph.set_input("pressure", self.pressure)
+        self.graph.set_input("interpolation_tolerance", self.interpolation_tolerance)
+        self.graph.set_input("activity_model", (self.activity_model, self.parameter_file))
 
-    def get_temperature_boundaries(self):
-        """Determines maximum and minimum useful temperatures
+        self.system = self.graph.get("system")
+        self.light_chemical, self.heavy_chemical = self.system.light_chemical, self.system.heavy_chemical
 
-        Solves for the boiling point of each of the compounds in use to determine the upper / lower system temperature
-        boundaries
+    def solve_vapor_liquid_equilibrium(self):
+        """Solves the VLE table of the current system, or restores it from the shared VLE cache or the disk cache
 
         Returns:
-            lower_bound:    Upper temperature boundary, corresponding to pure heavy
-            upper_bound:    Lower temperature boundary, corresponding to pure light
+            table:  distillation_core.VLETable
         """
-        lower_bound = math.floor(self.get_boiling_point(self.light_chemical))
-        upper_bound = math.ceil(self.get_boiling_point(self.heavy_chemical))
+        return self.graph.get("VLE")
 
-        return [lower_bound, upper_bound]
+    def get_persistent(self, key, solve):
+        """Looks a result up in the disk cache, solving and storing it on a miss
 
-    def get_boiling_point(self, chemical):
-        """Determines the boiling point of chemical using Antoine's equation:
-                ln(Psat) = A - B / (T + C), where Psat = 760 mmHg (1 atm)
+        Args:
+            key:    Key of the result; see DiskCache.get_digest
+            solve:  Callable taking no arguments that computes the result
+
+        Returns:
+            result: The stored or computed result
+        """
+        if self._disk_cache is None:
+            return solve()
+        result = self._disk_cache.get(key)
+        if result is None:
+            result = solve()
+            self._disk_cache.put(key, result)
+        return result
+
+    @classmethod
+    def set_disk_cache(cls, disk_cache):
+        """Places a persistent cache behind the in-memory caches of every instance
 
         Args:
-            chemical: Chemical whose boiling point is desired
+            disk_cache:     DiskCache, e.g. from DiskCache.get_default_cache(distillation_core.SOLVER_VERSION); None
+                            to keep results in memory only
         """
-        A, B, C = self.antoine_coefficients[chemical]
-        T = B / (A - math.log(760)) - C
-        return T
+        cls._disk_cache = disk_cache
 
-    def verify_correct_chemical_labels(self):
-        """Ensures the correct labeling of the light and heavy chemicals; flips associated data if this is false
+    @property
+    def temperatures(self):
+        return self.solve_vapor_liquid_equilibrium().temperatures
 
-        The lighter chemical by definition has a smaller boiling point, therefore the lower_bound MUST be lower than
-        upper_bound, otherwise the assignment was incorrect
-        """
-        if self.temperature_bounds[1] < self.temperature_bounds[0]:
-            temporary = self.light_chemical
-            self.light_chemical = self.heavy_chemical
-            self.heavy_chemical = temporary
+    @property
+    def x(self):
+        return self.solve_vapor_liquid_equilibrium().x
 
-            temporary = self.temperature_bounds[0]
-            # The bounds need to be extended in the proper direction; including correcting the original safety extension
-            self.temperature_bounds[0] = self.temperature_bounds[1] - 2
-            self.temperature_bounds[1] = temporary + 2
+    @property
+    def y(self):
+        return self.solve_vapor_liquid_equilibrium().y
 
-    def extend_temperature_boundaries(self):
-        """Slightly extends the temperature boundaries to ensure all relevant values are covered
-        """
-        self.temperature_bounds[0] -= 2
-        self.temperature_bounds[1] += 2
+    @property
+    def temperature_bounds(self):
+        return list(self.graph.get("boundaries"))
 
-    def get_temperature_from_x(self, xDesired):
-        """Determines temperature that fulfills the relationship x(T) = xDesired
+    @property
+    def antoine_coefficients(self):
+        return {self.light_chemical: list(self.system.light_coefficients),
+                self.heavy_chemical: list(self.system.heavy_coefficients)}
 
-        Specifies an initial temperature range to search in (defaults to 100 - 800; after uses the solved bounds.)
-        Applies bisection method / binary search to reduce temperature range until the x values approximately
-        equal xDesired
+    @property
+    def activity_parameters(self):
+        return self.system.activity_parameters
 
-        Args:
-            xDesired:   The target value, such that x(T) = xDesired
+    def get_inverse_equilibrium(self):
+        """Returns the x(y) lookup of the stepping curve, built once per VLE table and shared with every solve"""
+        return self.solve_vapor_liquid_equilibrium().inverse
+
+    def get_stepping_curve(self):
+        """Returns the equilibrium curve McCabe Thiele stepping uses, built once per VLE table
+
+        The same as x and y unless the system forms an azeotrope, in which case the curve ends at the azeotrope (see
+        stage_methods.get_stepping_branch); distillate compositions beyond it cannot be reached by stepping
+
+        Returns:
+            x:  array of floats; liquid mole fractions, ascending
+            y:  array of floats; vapor mole fractions, non-decreasing
+        """
+        table = self.solve_vapor_liquid_equilibrium()
+        return table.stepping_x, table.stepping_y
+
+    def get_azeotrope(self):
+        """Returns the liquid mole fraction of the light chemical at the azeotrope, or None if there is none"""
+        return self.solve_vapor_liquid_equilibrium().azeotrope
+
+    def get_cache_key(self):
+        """Identifies the VLE table of the current system
 
         Returns:
-            T:          The T-value satisfying the relationship x(T) = xDesired
+            key:    distillation_core.SystemSpec; hashable, and equal for equal coefficients and settings
         """
-        T = self.temperature_bounds
-        gm.add_midpoint(T)
-        tol, err, counter = gm.default_indefinite_iteration_parameters()
+        return self.system
 
-        while (tol < err) & (counter < 30):
-            T, x = self.reduce_temperature_range(T, xDesired)
-            err = abs(x[2] - x[0])
-            counter += 1
+    @classmethod
+    def get_cache_statistics(cls):
+        """Returns the hit / miss / eviction counters of the shared VLE cache, and of the disk cache if there is one"""
+        statistics = cls._vle_cache.get_statistics()
+        if cls._disk_cache is not None:
+            statistics["disk"] = cls._disk_cache.get_statistics()
+        return statistics
 
-        return T[1]
+    def get_boiling_point(self, chemical):
+        """Determines the boiling point of chemical using Antoine's equation:
+                ln(Psat) = A - B / (T + C), where Psat is the system pressure
+
+        Args:
+            chemical: Chemical whose boiling point is desired
+        """
+        return vm.get_boiling_point(self.antoine_coefficients[chemical], self.pressure)
 
-    def reduce_temperature_range(self, T, xDesired):
-        """Reduces temperature range to approximate the value of T to achieve xDesired
+    def get_temperature_from_x(self, xDesired):
+        """Determines the bubble-point temperature(s) that fulfill the relationship x(T) = xDesired
 
-        Applies bisection method / binary search to reduce the range
+        Solved by vle_methods.get_bubble_point_temperatures, so an entire array of x values costs one vectorized call
 
         Args:
-            T:          Temperature range containing the T that solves for x(T) = xDesired
-            xDesired:   The desired value temperature should solve for, x(T) = xDesired
+            xDesired:   float or array of floats; the target value(s), such that x(T) = xDesired
 
         Returns:
-            T:          A reduced temperature range, still containing the T that solves for x(T) = xDesired
-            x:          The x resulting from the two edges
+            T:          float or array of floats; the T-value(s) satisfying the relationship x(T) = xDesired
         """
-        x = []
-        for T_i in T:
-            x.append(self.solve_binary_Raoult_Relation(T_i) - xDesired)
-        T = gm.bisection_method(T, x)
-        return T, x
+        return dc.get_temperature_from_x(self.system, xDesired)
 
     def get_Psat(self, chemical, T):
         """Determines the saturated pressure (Psat) for a chemical at a given temperature, using the Antoine equation
@@ -196,54 +478,22 @@ class BinarySystem:
         Returns:
             Psat:       The saturated pressure for the given conditions
         """
-        [A, B, C] = self.antoine_coefficients[chemical]
-        return math.exp(A - B / (T + C))
-
-    def get_Antoine(self):
-        """Finds Antoine coefficients for species of interest and stores them
-
-        Calls FileRead, which parses a CSV into
-
-        Returns:
-            antoine_coefficients:   Dictionary, where keys are chemicals and values are Antoine coefficients
-                                    antoine_coefficients[chemical] = [A, B, C]
-        """
-        data = self.data_source.get_data()
-        antoine_coefficients = {}
-
-        for currChem in data:
-            if currChem == self.light_chemical or currChem == self.heavy_chemical:
-                antoine_coefficients[currChem] = data[currChem]
-            if len(antoine_coefficients) == 2:
-                break
-        return antoine_coefficients
+        return vm.get_Psat(self.antoine_coefficients[chemical], T)
 
     def solve_binary_Raoult_Relation(self, T):
-        """Finds the x value that satisfies the binary Raoult's relationship, 760 = lightPsat * x + heavyPsat * (1 - x)
+        """Finds the x value that satisfies the binary Raoult's relationship, P = lightPsat * x + heavyPsat * (1 - x)
 
-        Uses the temperature to determine the light and heavy Psats.  An initial guess of x = 0.5 is used, and the
-        value of x is determined iteratively using Newton's Method.
+        Uses the temperature to determine the light and heavy Psats.  The relationship is linear in x, so it is solved
+        in closed form; T may be a single temperature or an array of them.
 
         Args:
             T:  Determines the light and heavy Psat, which parameterize the equation
 
         Returns:
-            x:  The value of x that satisfies the equation 760 = lightPsat * x + heavyPsat * (1 - x)
+            x:  The value of x that satisfies the equation P = lightPsat * x + heavyPsat * (1 - x)
         """
-        lightPsat = self.get_Psat(self.light_chemical, T)
-        heavyPsat = self.get_Psat(self.heavy_chemical, T)
-
-        tol, err, counter = gm.default_indefinite_iteration_parameters()
-        x = 0.5
-        f_p = lightPsat - heavyPsat
-
-        while (tol < err) & (counter < 100):
-            f = lightPsat * x + heavyPsat * (1 - x) - 760
-            x_new = x - f / f_p
-            err = abs(x - x_new)
-            x = x_new
-            counter += 1
-        return x
+        return vm.solve_binary_Raoult_Relation(self.system.light_coefficients, self.system.heavy_coefficients, T,
+                                               self.pressure)
 
     def get_light_chemical_y(self, x, T):
         """Determine the vapor mole fraction (y) of the light component using Raoult's Law
@@ -257,38 +507,122 @@ class BinarySystem:
         Returns:
             y:          Corresponding vapor liquid mole fraction, y
         """
-        Psat = self.get_Psat(self.light_chemical, T)
-        return x * Psat / 760
+        return vm.get_light_chemical_y(self.system.light_coefficients, x, T, self.pressure)
 
-    def get_vapor_liquid_equilibrium_data(self):
-        temperatures = range(self.temperature_bounds[0], self.temperature_bounds[1])
-        x = []
-        y = []
+    def get_temperature_grid(self):
+        """Determines the temperatures ideal VLE data is solved at; see distillation_core.get_temperature_grid"""
+        return dc.get_temperature_grid(self.system)
 
-        for T in temperatures:
-            x.append(self.solve_binary_Raoult_Relation(T))
-            y.append(self.get_light_chemical_y(x[-1], T))
+    def get_vapor_liquid_equilibrium_data(self, temperatures=None):
+        """Solves the liquid and vapor mole fractions at every temperature in the grid in one pass
+
+        Args:
+            temperatures:   Ascending temperature grid; defaults to the system's grid
+
+        Returns:
+            x:  array of floats; liquid mole fractions, ordered from pure heavy to pure light
+            y:  array of floats; vapor mole fractions, ordered from pure heavy to pure light
+        """
+        if temperatures is None:
+            temperatures = self.temperatures
+        return dc.get_vapor_liquid_equilibrium_data(self.system, temperatures)
 
-        return [np.flip(np.array(x)), np.flip(np.array(y))]
+    def get_non_ideal_vapor_liquid_equilibrium_data(self):
+        """Solves the VLE data of a non-ideal system on a composition grid; see distillation_core"""
+        return dc.get_non_ideal_vapor_liquid_equilibrium_data(self.system)
 
     def get_effective_vapor_liquid_equilibrium_data(self, towerSpecs):
-        _, xF, _, murphree = towerSpecs.get_tower_specifications()
-        m, b = towerSpecs.get_operating_line_parameters()
-        effVLE = []
+        """Solves the effective (Murphree) equilibrium curve of the section efficiencies in one vectorized pass
 
-        for currX, currY in zip(self.x, self.y):
-            if xF < currX:
-                currEffVLE = m[0] * currX + b[0]
-            else:
-                currEffVLE = m[1] * currX + b[1]
+        Args:
+            towerSpecs:     TowerSpecs object containing information on the tower configuration
+
+        Returns:
+            effY:   array of floats; effective vapor mole fractions corresponding to x
+        """
+        return dc.get_effective_vapor_liquid_equilibrium_data(self.solve_vapor_liquid_equilibrium(), towerSpecs)
+
+    def get_diagram_data(self, graph_type, towerSpecs, sweep_pressures=None):
+        """Collects the lines and axis limits of any diagram type, optionally overlaid with a pressure sweep
+
+        Args:
+            graph_type:         "Txy", "VLE", or "Distillation"
+            towerSpecs:         TowerSpecs object; only used by "Distillation"
+            sweep_pressures:    Pressures whose curves are overlaid, in mmHg; None or empty for no overlay
+
+        Returns:
+            lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates] or, for the overlay,
+                    [x-coordinates, y-coordinates, pyplot format string]; the same objects are returned until an
+                    input of the diagram changes, so they must not be modified
+            axis:   Axis limits of the diagram
+        """
+        self.graph.set_input("sweep_pressures", () if sweep_pressures is None else tuple(sweep_pressures))
+        if graph_type == "Distillation":
+            self.solve_stages(towerSpecs)
+        return self.graph.get(graph_type + " diagram")
+
+    def get_pressure_sweep(self, pressures, towerSpecs=None):
+        """Solves the VLE curves, and optionally the stage counts, at every pressure; see distillation_core
+
+        Args:
+            pressures:      array of floats; pressures, in mmHg
+            towerSpecs:     TowerSpecs object; if given, the stage counts at each pressure are solved too
+
+        Returns:
+            sweep:  Dictionary of "pressures" and 2D arrays "temperatures", "x" and "y", one row per pressure; with
+                    towerSpecs also "steps_required", "feed_steps" and "minimum_reflux", where steps_required equals
+                    max_permitted_steps if the distillation could not be completed
+        """
+        return dc.get_pressure_sweep(self.system, pressures, towerSpecs, self.max_permitted_steps)
+
+    def get_pressure_sweep_diagram_data(self, graph_type, towerSpecs, pressures):
+        """Collects the curves of a pressure sweep, to be overlaid on a diagram of the same type
+
+        Args:
+            graph_type:     "Txy", "VLE", or "Distillation"
+            towerSpecs:     TowerSpecs object; only used by "Distillation"
+            pressures:      array of floats; pressures, in mmHg
+
+        Returns:
+            lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates, pyplot format string]
+            axis:   Axis limits covering the overlay
+        """
+        return dc.get_pressure_sweep_diagram_data(self.system, graph_type, towerSpecs, pressures,
+                                                  self.max_permitted_steps)
+
+    def get_Txy_diagram_data(self):
+        """Collects the lines of the Txy diagram
+
+        Returns:
+            lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates]
+            axis:   Axis limits of the diagram
+        """
+        return dc.get_Txy_diagram_data(self.solve_vapor_liquid_equilibrium())
+
+    def get_vapor_liquid_equilibrium_diagram_data(self):
+        """Collects the lines of the VLE diagram
+
+        Returns:
+            lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates]
+            axis:   Axis limits of the diagram
+        """
+        return dc.get_vapor_liquid_equilibrium_diagram_data(self.solve_vapor_liquid_equilibrium())
+
+    def get_reflux_distillation_diagram_data(self, towerSpecs):
+        """Collects the lines of the binary-distillation diagram, including the McCabe Thiele steps as one polyline
 
-            effY = murphree * (currY - currEffVLE) + currEffVLE
-            effY = max(effY, currX)
-            effVLE.append(effY)
+        Args:
+            towerSpecs:     TowerSpecs object containing information on the tower configuration
 
-        return np.array(effVLE)
+        Returns:
+            lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates]
+            axis:   Axis limits of the diagram
+        """
+        self.solve_stages(towerSpecs)
+        return dc.get_reflux_distillation_diagram_data(self.solve_vapor_liquid_equilibrium(), self.graph.get("tower"),
+                                                       self.graph.get("stages"))
 
-    def plot_Txy_diagram(self, plot_element):
+    def plot_Txy_diagram(self, plot_element, diagram_data=None):
         """Creates a Txy diagram, where temperature is the x-axis and the liquid / vapor fractions are the y-axis
 
         Axis limits are determined using the initially solved temperature boundaries.  Vapor-Liquid-Equilibrium (VLE)
@@ -296,28 +630,42 @@ class BinarySystem:
 
         Args:
             plot_element:   Plot object being updated
+            diagram_data:   Lines and axis from get_Txy_diagram_data, if already computed
+
+        Returns:
+            artists:        Dictionary; key: line label; value: Line2D drawn for it
         """
-        T = range(self.temperature_bounds[0], self.temperature_bounds[1])
-        plot_element.plot(T, self.x, '-b', label='Liquid')
-        plot_element.plot(T, self.y, '-r', label='Vapor')
+        if diagram_data is None:
+            diagram_data = self.get_Txy_diagram_data()
+        lines, axis = diagram_data
+        artists = self.plot_lines(lines, plot_element)
 
-        plot_element.axis([self.temperature_bounds[0], self.temperature_bounds[1], 0, 1])
+        plot_element.axis(axis)
         self.standard_plot_format("Temperature (K)", "Mole fraction", plot_element)
+        return artists
 
-    def plot_vapor_liquid_equilibrium_diagram(self, plot_element):
+    def plot_vapor_liquid_equilibrium_diagram(self, plot_element, diagram_data=None):
         """Solves for the liquid and vapor mole fractions at successive increments within the valid temperature range
 
         Plots the liquid mole fraction (x) v. vapor mole fraction (y)
 
         Args:
             plot_element:   Plot object being updated
+            diagram_data:   Lines and axis from get_vapor_liquid_equilibrium_diagram_data, if already computed
+
+        Returns:
+            artists:        Dictionary; key: line label; value: Line2D drawn for it
         """
-        plot_element.plot(self.x, self.y, '-k', label='Eq. Curve')
+        if diagram_data is None:
+            diagram_data = self.get_vapor_liquid_equilibrium_diagram_data()
+        lines, axis = diagram_data
+        artists = self.plot_lines(lines, plot_element)
         self.plot_diagonal(plot_element)
-        plot_element.axis([0, 1, 0, 1])
+        plot_element.axis(axis)
         self.standard_plot_format("x", "y", plot_element)
+        return artists
 
-    def plot_reflux_distillation_diagram(self, towerSpecs, plot_element):
+    def plot_reflux_distillation_diagram(self, towerSpecs, plot_element, diagram_data=None):
         """Plots the VLE diagram, OP lines, and McCabe Thiele steps representing a binary distillation
 
         Uses current VLE information, and generates additional information as necessary.  The OP line and effective VLE
@@ -327,111 +675,119 @@ class BinarySystem:
         Args:
             towerSpecs:     TowerSpecs object containing information on the tower configuration
             plot_element:   Plot object being updated
+            diagram_data:   Lines and axis from get_reflux_distillation_diagram_data, if already computed
 
         Returns:
-            steps:      Number of discrete stages required to complete the distillation
+            artists:        Dictionary; key: line label; value: Line2D drawn for it
         """
-        m, b = towerSpecs.get_operating_line_parameters()
-        xB, xF, xD, murphree = towerSpecs.get_tower_specifications()
-
-        plot_element.plot([xB, xF, xD], [xB, m[0] * xF + b[0], xD], '-b', label="OP")
-        plot_element.plot(self.x, self.y, '-k', label='Eq. Curve')
+        if diagram_data is None:
+            diagram_data = self.get_reflux_distillation_diagram_data(towerSpecs)
+        lines, axis = diagram_data
+        artists = self.plot_lines(lines, plot_element)
         self.plot_diagonal(plot_element)
 
-        if murphree != 1:
-            yEff = self.get_effective_vapor_liquid_equilibrium_data(towerSpecs)
-            plot_element.plot(self.x, yEff, '--k', label="Effective Eq.")
-            self.plot_McCabe_Thiele_steps(towerSpecs, plot_element, yEff)
-        else:
-            self.plot_McCabe_Thiele_steps(towerSpecs, plot_element)
-
-        plot_element.axis([0, 1, 0, 1])
+        plot_element.axis(axis)
         self.standard_plot_format("x", "y", plot_element)
+        return artists
 
-    def find_stage_counts(self, towerSpecs):
-        _, _, _, murphree = towerSpecs.get_tower_specifications()
-        if murphree != 1:
-            yEff = self.get_effective_vapor_liquid_equilibrium_data(towerSpecs)
-            self.plot_McCabe_Thiele_steps(towerSpecs, None, yEff)
-        else:
-            self.plot_McCabe_Thiele_steps(towerSpecs)
+    def plot_lines(self, lines, plot_element):
+        """Plots each labelled line with its standard style
 
-    def plot_McCabe_Thiele_steps(self, towerSpecs, plot_element=None, effY=None):
-        """Plots the McCabe Thiele steps, which represent the number of discrete stages required
+        Args:
+            lines:          Dictionary; key: line label; value: [x-coordinates, y-coordinates], optionally followed by a
+                            pyplot format string replacing the label's standard style
+            plot_element:   Plot object being updated
+
+        Returns:
+            artists:        Dictionary; key: line label; value: Line2D drawn for it
+        """
+        artists = {}
+        for label, (x, y, *style) in lines.items():
+            line_style = style[0] if style else self._LINE_STYLES[label]
+            artists[label], = plot_element.plot(x, y, line_style, label=label)
+        return artists
 
-        Iteratively moves from the OP line, horizontally to the equilibrium line, then vertically back to the
-        equilibrium line.  This process repeats from an initial state of (xD, xD) until the threshold (xB, xB) is passed
-        If an effective VLE is provided, this replaces the equilibrium line except for the final step.
+    def find_stage_counts(self, towerSpecs):
+        """Updates the required and feed steps for the given tower specifications
 
         Args:
             towerSpecs:     TowerSpecs object containing information on the tower configuration
-            effY:           If the murphree efficiency != 1, then the effective VLE conditions are used
-            plot_element:   Plot object being updated
 
         Returns:
-            steps:      Number of discrete stages required to complete the distillation
+            stage_result:   StageResult of the solve
         """
-        xB, xF, xD, _ = towerSpecs.get_tower_specifications()
+        return self.solve_stages(towerSpecs)
+
+    def solve_stages(self, towerSpecs):
+        """Solves the McCabe Thiele steps once per system and tower specification, reusing earlier solves
 
-        self.feed_step = 1
+        Only the parts of the dependency graph the changed specifications affect are recomputed, and a stage solve of
+        the same system and specifications is restored from the shared stage cache or the disk cache
 
-        found_feed_step = False
-        currX = xD
-        currY = xD
-        steps = 0
+        Args:
+            towerSpecs:     TowerSpecs object containing information on the tower configuration
 
-        while (xB < currX) and (steps < self._MAX_PERMITTED_STEPS):
-            steps += 1
-            xEq = np.interp(currY, self.y, self.x)
+        Returns:
+            stage_result:   StageResult holding the step coordinates, stage counts, effective VLE and the temperature
+                            of every stage
+        """
+        self.set_tower_specifications(towerSpecs)
+        stage_result = self.graph.get("stages")
 
-            # Checks if we're going to the effective equilibrium instead (every step except final)
-            if (xB < xEq) and (effY is not None):
-                xEq = np.interp(currY, effY, self.x)
+        self.steps_required = stage_result.get_required_steps()
+        self.feed_step = stage_result.get_feed_step()
+        self.stage_status = stage_result.get_status()
+        self.minimum_reflux = stage_result.get_minimum_reflux()
+        return stage_result
 
-            # Checks if we're still inside stepping bounds (and therefore going to the operating line)
-            if xB < xEq:
-                yOP, state = self.get_yOperating(towerSpecs, xEq)
-                if not found_feed_step:
-                    found_feed_step = self.update_feed_step(state, steps)
+    def get_minimum_reflux(self, towerSpecs):
+        """Finds the minimum reflux ratio of the tower specifications from the pinch on the stepping curve
 
-            # Outside the stepping bounds - therefore the diagonal suffices
-            else:
-                yOP = xEq
+        Args:
+            towerSpecs:     TowerSpecs object containing information on the tower configuration
 
-            # Plot the step if a diagram is available
-            if plot_element is not None:
-                plot_element.plot([currX, xEq, xEq], [currY, currY, yOP], '-g')
+        Returns:
+            Rmin:           float; minimum reflux ratio, inf if no reflux ratio can achieve the separation
+        """
+        return dc.get_minimum_reflux(self.solve_vapor_liquid_equilibrium(), towerSpecs)
 
-            currX = xEq
-            currY = yOP
+    def get_temperature_profile(self, towerSpecs):
+        """Returns the liquid mole fraction and bubble-point temperature of every stage, from the top of the column
 
-        if plot_element is not None:
-            plot_element.plot([0], [0], '-g', label='McCabe Thiele')
+        Args:
+            towerSpecs:     TowerSpecs object containing information on the tower configuration
 
-        if steps == self._MAX_PERMITTED_STEPS:
-            self.steps_required = "N/A"
-        else:
-            self.steps_required = steps
+        Returns:
+            x:  array of floats; liquid mole fraction leaving each stage
+            T:  array of floats; temperature of each stage, in Kelvin
+        """
+        stage_result = self.solve_stages(towerSpecs)
+        return [stage_result.get_stage_compositions(), stage_result.get_stage_temperatures()]
 
-    def update_feed_step(self, state, steps):
-        """Determines if updating the feed step is valid, and if applicable, does so
+    def plot_McCabe_Thiele_steps(self, towerSpecs, plot_element=None, effY=None):
+        """Steps the McCabe Thiele construction with distillation_core.step_McCabe_Thiele, bypassing the stage cache
+
+        The outcome is stored as steps_required, feed_step, stage_status and minimum_reflux.  Consecutive steps share a
+        corner, so all of them are drawn as a single polyline.
 
         Args:
-            state:  Position of the point
-            steps:  The current step
+            towerSpecs:     TowerSpecs object containing information on the tower configuration
+            plot_element:   Plot object being updated
+            effY:           Effective VLE of the section efficiencies, used if they are not both 1
 
         Returns:
-            found:  Whether the feed_step was set this call
+            step_x:     x-coordinates of the McCabe Thiele polyline
+            step_y:     y-coordinates of the McCabe Thiele polyline
         """
-        found = False
-        if state == "stripping":
-            if steps == 0:
-                self.feed_step = 1
-            else:
-                self.feed_step = steps
-            found = True
-        return found
+        table = self.solve_vapor_liquid_equilibrium()
+        self.minimum_reflux = dc.get_minimum_reflux(table, towerSpecs)
+        self.steps_required, self.feed_step, self.stage_status, step_x, step_y = dc.step_McCabe_Thiele(
+            table, towerSpecs, effY, self.max_permitted_steps, self.minimum_reflux, self.system)
 
+        # Plot the steps if a diagram is available
+        if plot_element is not None:
+            plot_element.plot(step_x, step_y, self._LINE_STYLES["McCabe Thiele"], label='McCabe Thiele')
+        return step_x, step_y
 
     @staticmethod
     def plot_diagonal(plot_element):
@@ -442,32 +798,6 @@ class BinarySystem:
         """
         plot_element.plot([0, 1], [0, 1], '--r')
 
-    @staticmethod
-    def get_yOperating(towerSpecs, x):
-        """Retrieves the y-component of a point on the OP line, provided an x value
-
-        Determines if the point is located in the rectifying, or stripping section.  If out-of-bounds, it defaults to
-        the diagonal to provide a clean display when plotted.
-
-        Args:
-            towerSpecs:     TowerSpecs object, carries variables with it
-            x:              The equilibrium mole fraction
-
-        Returns:
-            yOP:        The point (xEq, yOP) on the OP (operating) line
-            state:      Either "rectifying" or "stripping" based on the current section
-        """
-        xB, xF, _, _ = towerSpecs.get_tower_specifications()
-        m, b = towerSpecs.get_operating_line_parameters()
-        # Stripping section
-        if x < xF:
-            return x * m[1] + b[1], "stripping"
-        # Rectifying section
-        elif xB < x:
-            return x * m[0] + b[0], "rectifying"
-        else:
-            return x, "None"
-
     def standard_plot_format(self, xLabel, yLabel, plot_element):
         """Used to default common desired pyplot parameters and then display
 
@@ -0,0 +1,176 @@
+import threading
+
+import instrumentation as im
+
+
+class DependencyGraph:
+    """Values derived from named inputs through an explicit graph, recomputed only when something upstream changed
+
+    Each node declares the inputs and nodes it reads.  Setting an input to a different value marks everything
+    downstream of it stale, and nothing else; a stale node is recomputed the next time it is requested, pulling its
+    dependencies as it needs them, while a node still holding a value for its current inputs is returned as is and
+    counted as skipped.  Nodes must be added after their dependencies, which keeps the graph acyclic.
+
+    Public-Intended Methods:
+        add_input(name, value):     Declares an input and its initial value
+        add_node(name, function, dependencies):     Declares a node computed from inputs and earlier nodes
+        set_input(name, value):     Changes an input, invalidating the nodes downstream of it if the value differs
+        get(name):                  Returns the value of an input or node, recomputing it only if stale
+        get_statistics():           Returns the computed / skipped / invalidated counters of every node
+
+    Attributes:
+        computed:       dictionary; key: node; value: times it was recomputed
+        skipped:        dictionary; key: node; value: times it was requested and its value reused
+        invalidated:    dictionary; key: node; value: times an input change discarded its value
+    """
+
+    def __init__(self):
+        self.computed = {}
+        self.skipped = {}
+        self.invalidated = {}
+        self._functions = {}
+        self._dependencies = {}
+        self._dependents = {}
+        self._values = {}
+        self._valid = set()
+        self._lock = threading.RLock()
+
+    def add_input(self, name, value):
+        """Declares an input
+
+        Args:
+            name:   Name of the input
+            value:  Its initial value; compared with == whenever it is set again
+        """
+        self._dependents[name] = []
+        self._values[name] = value
+        self._valid.add(name)
+
+    def add_node(self, name, function, dependencies):
+        """Declares a node
+
+        Args:
+            name:           Name of the node
+            function:       Callable taking the graph's get method, which it uses to read its dependencies, and
+                            returning the node's value; it must read nothing but "dependencies"
+            dependencies:   Names of the inputs and nodes the value depends on; each must already be declared
+        """
+        for dependency in dependencies:
+            self._dependents[dependency].append(name)
+        self._dependents[name] = []
+        self._dependencies[name] = tuple(dependencies)
+        self._functions[name] = function
+        self.computed[name] = self.skipped[name] = self.invalidated[name] = 0
+
+    def set_input(self, name, value):
+        """Changes an input, invalidating everything downstream of it if the new value differs
+
+        Args:
+            name:   Name of a declared input
+            value:  Its new value
+
+        Returns:
+            changed:    Whether the value differed, and so invalidated its dependents
+        """
+        if name in self._functions or name not in self._values:
+            raise KeyError(name + " is not an input")
+        with self._lock:
+            if self.is_equal(self._values[name], value):
+                return False
+            self._values[name] = value
+            self.invalidate(name)
+            return True
+
+    def invalidate(self, name):
+        """Marks every node downstream of "name" stale
+
+        A node is only recomputed when requested, so a stale node may have valid dependents that never read it; the
+        walk therefore continues through stale nodes rather than stopping at them.
+
+        Args:
+            name:   Input or node whose dependents are invalidated
+        """
+        stack = list(self._dependents[name])
+        visited = set()
+        while stack:
+            node = stack.pop()
+            if node in visited:
+                continue
+            visited.add(node)
+            if node in self._valid:
+                self._valid.discard(node)
+                self.invalidated[node] += 1
+            stack.extend(self._dependents[node])
+
+    def get(self, name):
+        """Returns the value of an input or node, recomputing a stale node and whatever stale nodes it reads
+
+        Args:
+            name:   Name of a declared input or node
+
+        Returns:
+            value:  Its value for the current inputs; shared with every other caller, so it must not be modified
+        """
+        with self._lock:
+            if name in self._valid:
+                if name in self._functions:
+                    self.skipped[name] += 1
+                    im.count("graph skipped: " + name)
+                return self._values[name]
+
+            value = self._functions[name](self.get)
+            self._values[name] = value
+            self._valid.add(name)
+            self.computed[name] += 1
+            im.count("graph computed: " + name)
+            return value
+
+    def is_valid(self, name):
+        """Returns whether "name" holds a value for the current inputs"""
+        return name in self._valid
+
+    def get_dependencies(self, name):
+        """Returns the names "name" was declared to depend on"""
+        return self._dependencies.get(name, ())
+
+    def get_statistics(self):
+        """Used to report how much recomputation the graph avoided
+
+        Returns:
+            statistics:     Dictionary of "computed", "skipped" and "invalidated" totals over every node, and "nodes",
+                            a dictionary of each node's own counters
+        """
+        with self._lock:
+            nodes = {name: {"computed": self.computed[name], "skipped": self.skipped[name],
+                            "invalidated": self.invalidated[name]} for name in self._functions}
+        return {"computed": sum(self.computed.values()), "skipped": sum(self.skipped.values()),
+                "invalidated": sum(self.invalidated.values()), "nodes": nodes}
+
+    def copy(self):
+        """Copies the graph with its current values and counters, so the copy continues incrementally on its own
+
+        Returns:
+            graph:  DependencyGraph sharing the node functions and the (unmodified) values
+        """
+        with self._lock:
+            duplicate = DependencyGraph.__new__(DependencyGraph)
+            duplicate.__setstate__(self.__getstate__())
+        return duplicate
+
+    @staticmethod
+    def is_equal(old_value, new_value):
+        """Compares input values, treating values that cannot be compared as a plain bool as different"""
+        try:
+            return bool(old_value == new_value)
+        except ValueError:
+            return False
+
+    def __getstate__(self):
+        state = {key: value for key, value in self.__dict__.items() if key != "_lock"}
+        for key in ("computed", "skipped", "invalidated", "_values", "_valid"):
+            state[key] = state[key].copy()
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.RLock()
@@ -0,0 +1,218 @@
+import hashlib
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+
+ENVIRONMENT_VARIABLE = "DISTILLATION_CACHE"
+DEFAULT_PATH = os.path.join(os.path.expanduser("~"), ".cache", "binary-distillation", "results.sqlite")
+
+
+class DiskCache:
+    """Persistent, content-addressed cache of computed results in a single SQLite file
+
+    Values are pickled and stored under the SHA-256 digest of their key, so equal inputs hit the same entry in every
+    process and every session.  The file is opened in write-ahead-log mode, letting any number of worker processes read
+    while one writes; each thread keeps its own connection.  Once the file holds more than max_bytes of values, the
+    least recently used entries are evicted.  A database error is reported once and then treated as a miss, so a
+    read-only or corrupted cache only costs the recomputation.
+
+    Public-Intended Methods:
+        get(key):           Returns the cached value for "key", or None
+        put(key, value):    Stores a value, evicting the least recently used ones past max_bytes
+        get_statistics():   Returns hit / miss / eviction counters and current usage
+
+    Attributes:
+        path:           string; address of the SQLite file
+        max_bytes:      int; maximum total size of the pickled values, in bytes
+        version:        Mixed into every digest, so results of an older solver are never returned
+        hits:           int; lookups that found a value in this process
+        misses:         int; lookups that did not
+        evictions:      int; values this process dropped to respect max_bytes
+        ACCESS_RESOLUTION:  const float; seconds within which repeated hits do not refresh an entry's recency
+    """
+    ACCESS_RESOLUTION = 60
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=256 * 1024 ** 2, version=None):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._local = threading.local()
+        self._failed = False
+
+    def get_digest(self, key):
+        """Hashes a key into the address of its entry
+
+        Args:
+            key:    Tuple of plain values (strings, numbers, None and tuples of them, including NamedTuples), whose repr
+                    is stable across processes
+
+        Returns:
+            digest: string; hexadecimal SHA-256 digest of the version and key
+        """
+        return hashlib.sha256(repr((self.version, key)).encode()).hexdigest()
+
+    def get(self, key):
+        """Retrieves a value and marks it as most recently used
+
+        Args:
+            key:    See get_digest
+
+        Returns:
+            value:  The cached value, or None if absent
+        """
+        digest = self.get_digest(key)
+        try:
+            connection = self.get_connection()
+            row = connection.execute("SELECT value, accessed FROM results WHERE digest = ?", (digest,)).fetchone()
+        except (sqlite3.Error, OSError) as inst:
+            self.report_failure(inst)
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+
+        try:
+            value = pickle.loads(row[0])
+        except (pickle.UnpicklingError, AttributeError, EOFError, ImportError, TypeError):
+            # Written by an incompatible version of the code; drop it and recompute
+            self.delete(digest)
+            self.misses += 1
+            return None
+
+        # Recency only needs to be coarse, so concurrent readers rarely have to take the write lock
+        now = time.time()
+        if now - row[1] > self.ACCESS_RESOLUTION:
+            try:
+                with connection:
+                    connection.execute("UPDATE results SET accessed = ? WHERE digest = ?", (now, digest))
+            except sqlite3.Error as inst:
+                self.report_failure(inst)
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """Stores a value, then evicts least recently used values until max_bytes is respected
+
+        Args:
+            key:    See get_digest
+            value:  Any picklable value
+        """
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        if len(blob) > self.max_bytes:
+            return
+        try:
+            connection = self.get_connection()
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO results (digest, value, size, accessed) VALUES (?, ?, ?, ?)",
+                                   (self.get_digest(key), blob, len(blob), time.time()))
+                self.evict(connection)
+        except (sqlite3.Error, OSError) as inst:
+            self.report_failure(inst)
+
+    def evict(self, connection):
+        """Deletes the least recently used values until the total size is within max_bytes
+
+        Args:
+            connection:     Connection inside an open transaction
+        """
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for digest, size in connection.execute("SELECT digest, size FROM results ORDER BY accessed").fetchall():
+            connection.execute("DELETE FROM results WHERE digest = ?", (digest,))
+            self.evictions += 1
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def delete(self, digest):
+        try:
+            connection = self.get_connection()
+            with connection:
+                connection.execute("DELETE FROM results WHERE digest = ?", (digest,))
+        except (sqlite3.Error, OSError) as inst:
+            self.report_failure(inst)
+
+    def clear(self):
+        """Drops every value; counters are kept"""
+        try:
+            connection = self.get_connection()
+            with connection:
+                connection.execute("DELETE FROM results")
+        except (sqlite3.Error, OSError) as inst:
+            self.report_failure(inst)
+
+    def get_statistics(self):
+        """Used to report cache effectiveness
+
+        Returns:
+            statistics:     Dictionary of this process' counters and the file's current usage
+        """
+        entries, size = 0, 0
+        try:
+            entries, size = self.get_connection().execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+        except (sqlite3.Error, OSError) as inst:
+            self.report_failure(inst)
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "entries": entries,
+                "bytes": size}
+
+    def get_connection(self):
+        """Opens this thread's connection on first use, creating the file and its table if needed
+
+        A connection inherited through fork() is never reused; the child opens its own
+
+        Returns:
+            connection:     sqlite3.Connection
+        """
+        connection = getattr(self._local, "connection", None)
+        if connection is None or self._local.pid != os.getpid():
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            with connection:
+                connection.execute("CREATE TABLE IF NOT EXISTS results (digest TEXT PRIMARY KEY, value BLOB NOT NULL, "
+                                   "size INTEGER NOT NULL, accessed REAL NOT NULL)")
+                connection.execute("CREATE INDEX IF NOT EXISTS results_accessed ON results (accessed)")
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+        return connection
+
+    def report_failure(self, inst):
+        if not self._failed:
+            self._failed = True
+            print(type(inst).__name__ + ": result cache " + self.path + " unavailable -", inst, file=sys.stderr)
+
+    def __getstate__(self):
+        """Connections cannot cross process boundaries; a copy opens its own"""
+        state = dict(self.__dict__)
+        del state["_local"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._local = threading.local()
+
+
+def get_default_cache(version=None):
+    """Opens the cache named by the environment variable DISTILLATION_CACHE, else the one at DEFAULT_PATH
+
+    Args:
+        version:    See DiskCache
+
+    Returns:
+        disk_cache: DiskCache, or None if DISTILLATION_CACHE is "off"
+    """
+    path = os.environ.get(ENVIRONMENT_VARIABLE) or DEFAULT_PATH
+    if path.lower() == "off":
+        return None
+    return DiskCache(path, version=version)
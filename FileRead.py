@@ -1,30 +1,52 @@
+import io
+
+import numpy as np
+
 
 class FileRead:
     """Used to read a delimited value file (i.e. CSV) of numbers and permits excess spacing for readability
 
+    The file is streamed in large blocks; each block is parsed straight into arrays by NumPy.  Rows that cannot be
+    parsed are skipped and reported with their line number rather than stopping the read.
+
     Public-Intended Methods:
-        get_data():  Returns the attribute "data"
+        get_data():     Returns the attribute "data"
+        get_keys():     Returns the first value of every row
+        get_values():   Returns the numeric columns as a 2D array, one row per key
+        get_errors():   Returns the rows that could not be parsed
 
     Attributes:
         file_name:  string; file address
         delimiter:  character; character separating values in the provided file
         header:     Boolean; indicates whether a header is present or not in the file
         data:       dictionary; the first row value is the KEY, the VALUE is the list of remaining row values
+        keys:       array strings; the first value of every parsed row, in file order
+        values:     2D array floats; the remaining values of every parsed row
+        errors:     list; (line number, line, reason) for every row that could not be parsed
     """
+    _BLOCK_SIZE = 1 << 22
 
     def __init__(self, file_name, delimiter, header=False):
         self.file_name = file_name
         self.delimiter = delimiter
         self.header = header
-        self.data = {}
+        self.data = None
+        self.keys = np.empty(0, dtype=str)
+        self.values = np.empty((0, 0))
+        self.errors = []
+        self.column_count = None
         self.read_CSV()
 
     def get_data(self):
         """Public facing method for retrieving read data from the file
 
+        The dictionary is only built the first time it is requested
+
         Returns:
             data:   Parsed data file as a dictionary
         """
+        if self.data is None:
+            self.data = dict(zip(self.keys.tolist(), self.values.tolist()))
         return self.data
 
     def get_keys(self):
@@ -33,91 +55,172 @@ class FileRead:
         Returns:
             keys:   Parsed data keys
         """
-        return self.data.keys()
+        return self.get_data().keys()
+
+    def get_values(self):
+        """Public facing method for retrieving the numeric columns without building the dictionary
+
+        Returns:
+            values: 2D array of floats, one row per entry of "keys"
+        """
+        return self.values
+
+    def get_errors(self):
+        """Public facing method for retrieving the rows that were skipped
+
+        Returns:
+            errors: List of (line number, line, reason)
+        """
+        return self.errors
 
     def read_CSV(self):
         """Handles overall process of reading CSV file
 
-        Opens the file, skips the header if necessary, and then processes the file line-by-line until complete
+        Opens the file, skips the header if necessary, and then processes the file block-by-block until complete
         """
-        file = open(self.file_name, "r")
-        self.data = {}
-        self.header_adjustment(file)
-        self.process_line_by_line(file)
+        self.data = None
+        self.errors = []
+        keys = []
+        values = []
+
+        with open(self.file_name, "r") as file:
+            line_number = self.header_adjustment(file)
+            for block in self.read_blocks(file):
+                block_keys, block_values = self.process_block(block, line_number)
+                if len(block_keys):
+                    keys.append(block_keys)
+                    values.append(block_values)
+                line_number += block.count("\n")
+
+        if keys:
+            self.keys = np.concatenate(keys)
+            self.values = np.concatenate(values)
+        else:
+            self.keys = np.empty(0, dtype=str)
+            self.values = np.empty((0, max((self.column_count or 1) - 1, 0)))
 
     def header_adjustment(self, file):
-        """Checks if a header is present, and skips a line if so
+        """Checks if a header is present, and skips a line if so; the header also fixes the expected column count
 
         Args:
             file: The file currently being read
+
+        Returns:
+            line_number:    Line number of the first data line
         """
         if self.header:
-            file.readline()
+            self.column_count = self.count_columns(file.readline())
+            return 2
+        return 1
 
-    def process_line_by_line(self, file):
-        """Parses a file line into a key-value pair and stores this pairing in "data"
+    def read_blocks(self, file):
+        """Yields large blocks of the file, each extended to end on a complete line
 
         Args:
-            file: The file currently being read
+            file:   The file currently being read
+
+        Yields:
+            block:  String of whole lines, always ending in a newline
         """
-        for line in file:
-            element = self.cut_by_delimiter(line)
-            identifier = element[0]
-            self.data[identifier] = element[1:]
+        while True:
+            block = file.read(self._BLOCK_SIZE)
+            if not block:
+                return
+            block += file.readline()
+            if not block.endswith("\n"):
+                block += "\n"
+            yield block
 
-    def cut_by_delimiter(self, line):
-        """Separates the line by the set delimiter
+    def process_block(self, block, first_line_number):
+        """Parses a block of lines into keys and numeric values
+
+        The whole block is handed to NumPy's parser; if any row is malformed, the block is parsed line-by-line instead
+        so the valid rows are kept and each bad row is reported
 
         Args:
-            line:       Line currently being adjusted
+            block:              String of whole lines
+            first_line_number:  Line number of the block's first line within the file
 
         Returns:
-            elements:   List of separated elements
+            keys:               array of strings for the block's valid rows
+            values:             2D array of floats for the block's valid rows
         """
-        start = 0
-        elements = []
-
-        while start != len(line)-1:
-            if start != 0:
-                start = self.trim_excess_spaces(line, start + 1)
-            stop = self.find_next_nearest_delimiter(line, start)
+        if self.column_count is None:
+            first_line = next((line for line in block.splitlines() if line.strip()), None)
+            if first_line is None:
+                return np.empty(0, dtype=str), np.empty((0, 0))
+            self.column_count = self.count_columns(first_line)
 
-            if start == 0:
-                elements.append(line[start:stop])
-            else:
-                elements.append(float(line[start:stop]))
+        dtype = [("key", object), ("values", float, (self.column_count - 1,))]
+        try:
+            rows = np.loadtxt(io.StringIO(block), delimiter=self.delimiter, dtype=dtype, comments=None, ndmin=1)
+        except ValueError:
+            return self.process_line_by_line(block, first_line_number)
 
-            start = stop
+        keys = np.strings.strip(rows["key"].astype(str))
+        return keys, rows["values"].reshape(len(rows), self.column_count - 1)
 
-        return elements
-
-    @staticmethod
-    def trim_excess_spaces(line, index):
-        """Trims away excess spaces from the left-hand-side
+    def process_line_by_line(self, block, first_line_number):
+        """Parses a block one line at a time, skipping and reporting malformed rows
 
         Args:
-            line:   Current line being parsed
-            index:  Initial starting index
+            block:              String of whole lines
+            first_line_number:  Line number of the block's first line within the file
 
         Returns:
-            index:  New initial starting index, skipping over spaces
+            keys:               array of strings for the block's valid rows
+            values:             2D array of floats for the block's valid rows
+        """
+        keys = []
+        values = []
+        for line_number, line in enumerate(block.splitlines(), first_line_number):
+            if not line.strip():
+                continue
+            element = self.cut_by_delimiter(line)
+
+            if len(element) != self.column_count:
+                self.report_error(line_number, line, "expected %d columns, found %d"
+                                  % (self.column_count, len(element)))
+                continue
+            try:
+                row = [float(value) for value in element[1:]]
+            except ValueError as inst:
+                self.report_error(line_number, line, inst.args[0])
+                continue
+
+            keys.append(element[0].strip())
+            values.append(row)
+        return np.array(keys, dtype=str), np.array(values, dtype=float).reshape(len(values), self.column_count - 1)
 
+    def report_error(self, line_number, line, reason):
+        """Records and prints a row that could not be parsed
+
+        Args:
+            line_number:    Line number of the row within the file
+            line:           The row's text
+            reason:         Why the row was rejected
         """
-        while line[index] == " ":
-            index += 1
-        return index
+        self.errors.append((line_number, line, reason))
+        print("ValueError: " + self.file_name + ", line " + str(line_number) + ": " + reason)
 
-    def find_next_nearest_delimiter(self, line, index):
-        """Identifies the index of the next delimiter
+    def cut_by_delimiter(self, line):
+        """Separates the line by the set delimiter
 
         Args:
-            line:   Current line being parsed
-            index:  Initial starting index
+            line:       Line currently being adjusted
 
         Returns:
-            index:  Index of the next delimiter
+            elements:   List of separated elements
+        """
+        return line.rstrip("\r\n").split(self.delimiter)
 
+    def count_columns(self, line):
+        """Counts the values within a line
+
+        Args:
+            line:       Line being counted
+
+        Returns:
+            count:      Number of delimited values
         """
-        while line[index] != self.delimiter and index < len(line)-1:
-            index += 1
-        return index
+        return len(self.cut_by_delimiter(line))
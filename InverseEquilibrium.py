@@ -0,0 +1,103 @@
+from bisect import bisect_right
+
+import numpy as np
+
+
+class InverseEquilibrium:
+    """Constant-time lookup of x(y) on an equilibrium curve, in place of np.interp(q, yCurve, xCurve)
+
+    The y-range is divided into uniform buckets, each storing the index of the first curve node it covers, so a lookup
+    is one multiplication and a search over the few nodes within a single bucket rather than over the whole curve.
+    The result is the same linear interpolation np.interp performs, including clamping to the curve's ends, so there
+    is no approximation error to bound.  Curves whose y values are not ascending, which np.interp does not support
+    either, are passed to np.interp unchanged so both give the same result.
+
+    Public-Intended Methods:
+        __call__(q):    Returns x at the vapor mole fraction q
+
+    Attributes:
+        y_start:        float; vapor mole fraction of the curve's first node
+        y_end:          float; vapor mole fraction of the curve's last node
+        buckets:        int; number of uniform buckets the y-range is divided into
+        ascending:      Boolean; whether the curve's y values ascend, and so whether buckets are used
+    """
+
+    def __init__(self, y, x, buckets_per_node=4):
+        y = np.asarray(y, dtype=float)
+        x = np.asarray(x, dtype=float)
+        self.y_start = float(y[0])
+        self.y_end = float(y[-1])
+        self.buckets = max(1, buckets_per_node * len(y))
+
+        self._y = y.tolist()
+        self._x = x.tolist()
+        dy = y[1:] - y[:-1]
+        self.ascending = bool(np.all(dy >= 0))
+        self._curve = (y, x)
+        self._slopes = np.divide(x[1:] - x[:-1], dy, out=np.zeros(len(dy)), where=dy != 0).tolist()
+
+        span = self.y_end - self.y_start
+        self._scale = self.buckets / span if span > 0 else 0.0
+        edges = self.y_start + np.arange(self.buckets + 1) * (span / self.buckets)
+        self._starts = np.maximum(np.searchsorted(y, edges, side="right") - 1, 0).tolist()
+
+    def __call__(self, q):
+        """Returns x at a single vapor mole fraction q
+
+        Args:
+            q:  float; vapor mole fraction
+
+        Returns:
+            x:  float; liquid mole fraction on the curve
+        """
+        if not self.ascending:
+            return float(np.interp(q, *self._curve))
+        if q <= self.y_start:
+            return self._x[0]
+        if q >= self.y_end:
+            return self._x[-1]
+
+        # The neighbouring buckets are searched too, in case rounding placed q in the wrong one
+        bucket = int((q - self.y_start) * self._scale)
+        lower = self._starts[max(bucket - 1, 0)]
+        upper = self._starts[min(bucket + 2, self.buckets)] + 1
+        index = bisect_right(self._y, q, lower, upper) - 1
+        return self._x[index] + (q - self._y[index]) * self._slopes[index]
+
+
+class SectionedInverseEquilibrium:
+    """x(y) lookup on an effective equilibrium curve that may jump at the feed, inverted one section at a time
+
+    With different rectifying and stripping Murphree efficiencies the effective curve is discontinuous at the feed, so
+    it is not invertible as a whole.  A vapor mole fraction at or above the rectifying section's lowest point is
+    inverted on the rectifying samples, and anything lower on the stripping samples, each with an InverseEquilibrium;
+    this is the same rule stage_methods.invert_effective_vapor_liquid_equilibrium applies.
+
+    Public-Intended Methods:
+        __call__(q):    Returns x at the vapor mole fraction q
+
+    Attributes:
+        feed_y:         float; effective vapor mole fraction at the first rectifying sample
+    """
+
+    def __init__(self, y, x, feed_index):
+        y = np.asarray(y, dtype=float)
+        x = np.asarray(x, dtype=float)
+        self.feed_y = float(y[feed_index])
+        # The stripping lookup ends at the first rectifying sample, where the section search of the batch solver ends
+        stripping_end = max(self.feed_y, y[feed_index - 1]) if feed_index else self.feed_y
+        self._rectifying = InverseEquilibrium(y[feed_index:], x[feed_index:])
+        self._stripping = InverseEquilibrium(np.append(y[:feed_index], stripping_end), x[:feed_index + 1])
+
+    def __call__(self, q):
+        """Returns x at a single vapor mole fraction q
+
+        Args:
+            q:  float; vapor mole fraction
+
+        Returns:
+            x:  float; liquid mole fraction on the curve
+        """
+        if q >= self.feed_y:
+            return self._rectifying(q)
+        return self._stripping(q)
@@ -0,0 +1,146 @@
+from PyQt5.QtWidgets import QSizePolicy
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
+from matplotlib.figure import Figure
+
+import BinarySystem
+import instrumentation as im
+import TowerSpecifications
+
+
+class PlotCanvas(FigureCanvas):
+    """Used to render plots generated by the BinarySystem class
+
+    The axes, grid, diagonal, labels and legend are drawn once per graph and cached as a background; the data lines
+    are persistent artists whose data is replaced in place and blitted over that background on each update.
+
+    Public-Intended Methods:
+        recreate_plot():        Updates the existing plot in place, rebuilding it only if its layout changed
+        create_plot(new_type):  Creates a new plot of type "new_type"
+
+    Attributes:
+        graph_type:             The current graph type being rendered
+        artists:                Dictionary; key: line label; value: Line2D updated in place
+        background:             Cached render of everything except the artists
+        layout:                 Title, axis limits and line labels the current background was drawn for
+    """
+
+    def __init__(self, binary_system: BinarySystem, tower_specs: TowerSpecifications,
+                 parent=None, width=5, height=4, graph_type="Txy", dpi=100):
+        fig = Figure(figsize=(width, height), dpi=dpi)
+        super().__init__(fig)
+        self.setParent(parent)
+
+        FigureCanvas.setSizePolicy(self, QSizePolicy.Expanding, QSizePolicy.Expanding)
+        FigureCanvas.updateGeometry(self)
+
+        self.binary_system = binary_system
+        self.tower_specs = tower_specs
+
+        self.graph_type = None
+        self.artists = {}
+        self.background = None
+        self.layout = None
+        self.mpl_connect("draw_event", self.capture_background)
+        if graph_type is not None:
+            self.create_plot(graph_type)
+
+    def recreate_plot(self):
+        """Recreates the existing plot; used for updating it when parameters change
+
+        Only the line data is replaced when the title, axis limits and set of lines are unchanged, otherwise the plot
+        is rebuilt
+        """
+        self.show_diagram(self.graph_type, self.binary_system.get_diagram_data(self.graph_type, self.tower_specs))
+
+    def show_diagram(self, graph_type, diagram_data):
+        """Displays already computed diagram data, updating the existing artists in place where possible
+
+        Args:
+            graph_type:     "Txy", "VLE", or "Distillation"
+            diagram_data:   Lines and axis limits, as returned by BinarySystem.get_diagram_data
+        """
+        lines, axis = diagram_data
+        if (graph_type != self.graph_type or self.background is None
+                or self.get_layout(lines, axis) != self.layout):
+            self.create_plot(graph_type, diagram_data)
+            return
+
+        for label, (x, y, *_) in lines.items():
+            self.artists[label].set_data(x, y)
+        self.blit_artists()
+
+    def create_plot(self, new_type, diagram_data=None):
+        """Used to create a new plot of form "new_type" using the BinarySystem class that is then rendered
+
+        Args:
+            new_type:       New graph desired from BinarySystem. Can be "Txy", "VLE", or "Distillation"
+            diagram_data:   Lines and axis limits of the graph, if already computed
+        """
+
+        self.figure.clf()
+        self.figure.suptitle(new_type, fontweight="bold")
+        ax = self.figure.add_subplot(111)
+
+        if new_type == "Txy":
+            self.artists = self.binary_system.plot_Txy_diagram(ax, diagram_data)
+        elif new_type == "VLE":
+            self.artists = self.binary_system.plot_vapor_liquid_equilibrium_diagram(ax, diagram_data)
+        elif new_type == "Distillation":
+            self.artists = self.binary_system.plot_reflux_distillation_diagram(self.tower_specs, ax, diagram_data)
+        self.graph_type = new_type
+        self.layout = self.get_layout(self.artists, ax.axis())
+
+        # Data lines are left out of the full draw, and are blitted over the captured background instead
+        for artist in self.artists.values():
+            artist.set_animated(True)
+        self.background = None
+
+        try:
+            with im.span("render"):
+                self.draw()
+        except RuntimeError as inst:
+            # Canvas object was deleted
+            # Cannot determine how to stop this - I think it's automatically cleaned up by the parent based on some
+            # digging.  I tried to force it to redraw; but the UI disappears and it infinitely loops.
+            print("RuntimeError:", inst.args[0])
+        except KeyError as inst:
+            # Occurred once, when boiling point difference was within 1 degree (L-lactide and n-hexadecane)
+            # Was an error using figure.clf() where the axes were missing
+            print("KeyError:", inst.args)
+
+    def get_layout(self, lines, axis):
+        """Summarises everything drawn into the background, so a change to it can be detected
+
+        Args:
+            lines:      Line labels in the plot
+            axis:       Axis limits of the plot
+
+        Returns:
+            layout:     Tuple of title, axis limits and line labels
+        """
+        title = self.binary_system.light_chemical + " (L) & " + self.binary_system.heavy_chemical + " (H)"
+        return title, tuple(float(limit) for limit in axis), tuple(lines)
+
+    def capture_background(self, event):
+        """Caches the freshly drawn static elements, then draws the data lines over them
+
+        Args:
+            event:  Required parameter by the draw_event callback
+        """
+        if not self.figure.axes:
+            return
+        self.background = self.copy_from_bbox(self.figure.bbox)
+        self.draw_artists()
+
+    def blit_artists(self):
+        """Redraws only the data lines over the cached background"""
+        with im.span("render (blit)"):
+            self.restore_region(self.background)
+            self.draw_artists()
+            self.blit(self.figure.bbox)
+
+    def draw_artists(self):
+        """Draws every data line onto the current renderer"""
+        ax = self.figure.axes[0]
+        for artist in self.artists.values():
+            ax.draw_artist(artist)
@@ -0,0 +1,61 @@
+import numpy as np
+
+import stage_methods as sm
+
+
+class StageResult:
+    """Outcome of one McCabe Thiele solve, shared by everything that displays it
+
+    Public-Intended Methods:
+        get_required_steps():   Returns the stage count, or "N/A" if the step limit was reached
+        get_feed_step():        Returns the optimal feed stage
+        get_step_coordinates(): Returns the McCabe Thiele polyline
+        get_stage_compositions():   Returns the liquid mole fraction leaving each stage
+        get_stage_temperatures():   Returns the bubble-point temperature of each stage
+        get_status():           Returns whether the solve completed, was infeasible below Rmin, or reached the limit
+        get_minimum_reflux():   Returns the minimum reflux ratio of the tower specifications
+
+    Attributes:
+        steps_required:     int or "N/A"; discrete stages required to complete the distillation
+        feed_step:          int; optimal feed stage
+        step_x:             array floats; x-coordinates of the McCabe Thiele polyline
+        step_y:             array floats; y-coordinates of the McCabe Thiele polyline
+        effective_y:        array floats or None; effective equilibrium curve of the section efficiencies,
+                            None if both are 1
+        stage_temperatures: array floats or None; bubble-point temperature of each stage, from the top of the column
+        status:             string; stage_methods.COMPLETE, INFEASIBLE or STEP_LIMIT
+        minimum_reflux:     float or None; minimum reflux ratio, inf if no reflux ratio achieves the separation
+    """
+
+    def __init__(self, steps_required, feed_step, step_x, step_y, effective_y=None, stage_temperatures=None,
+                 status=sm.COMPLETE, minimum_reflux=None):
+        self.steps_required = steps_required
+        self.feed_step = feed_step
+        self.step_x = np.asarray(step_x, dtype=float)
+        self.step_y = np.asarray(step_y, dtype=float)
+        self.effective_y = effective_y
+        self.stage_temperatures = stage_temperatures
+        self.status = status
+        self.minimum_reflux = minimum_reflux
+
+    def get_required_steps(self):
+        return self.steps_required
+
+    def get_feed_step(self):
+        return self.feed_step
+
+    def get_step_coordinates(self):
+        return [self.step_x, self.step_y]
+
+    def get_stage_compositions(self):
+        """Each step of the polyline adds two corners at the liquid mole fraction leaving that stage"""
+        return self.step_x[1::2]
+
+    def get_stage_temperatures(self):
+        return self.stage_temperatures
+
+    def get_status(self):
+        return self.status
+
+    def get_minimum_reflux(self):
+        return self.minimum_reflux
@@ -11,7 +11,10 @@ class TowerSpecs:
         xB:         float; the light fraction in the bottoms (problem space name)
         xF:         float; the light fraction in the feed (problem space name)
         xD:         float; the light fraction in the distillate (problem space name)
-        murphree:   float; Murphree efficiency of each stage
+        murphree:   float; Murphree efficiency of each stage, or of each rectifying stage if stripping_murphree is set
+        stripping_murphree: float or None; Murphree efficiency of each stripping stage; None to use murphree
+        stage_murphree:     tuple of floats or None; Murphree efficiency of each stage from the top of the column,
+                            overriding the section efficiencies; stages past its end use the section efficiencies
 
     """
     def __init__(self, R, xB, xF, xD, murphree=1):
@@ -20,6 +23,8 @@ class TowerSpecs:
         self.xF = self.set_initial_values(self.xB + 0.001, xF, self.xB + 0.001)
         self.xD = self.set_initial_values(self.xF + 0.001, xD, self.xF + 0.001)
         self.murphree = self.set_initial_values(1, murphree)
+        self.stripping_murphree = None
+        self.stage_murphree = None
 
     def set_initial_values(self, default, value, lower_limit=0):
         """Ensures the initial values are properly bounded from lower_limit < value <= 1; if not, sets them to default
@@ -90,6 +95,15 @@ class TowerSpecs:
         """
         return self.xB, self.xF, self.xD, self.murphree
 
+    def get_section_efficiencies(self):
+        """Returns the rectifying and stripping Murphree efficiencies"""
+        if self.stripping_murphree is None:
+            return self.murphree, self.murphree
+        return self.murphree, self.stripping_murphree
+
+    def get_stage_efficiencies(self):
+        return self.stage_murphree
+
     def get_reflux_ratio(self):
         return self.R
 
@@ -117,6 +131,32 @@ class TowerSpecs:
         if self.confirm_valid_bounding(murphree):
             self.murphree = murphree
 
+    def set_section_efficiencies(self, rectifying, stripping):
+        """Sets separate Murphree efficiencies for the rectifying and stripping sections; invalid values are ignored
+
+        Args:
+            rectifying:     Efficiency of each stage above the feed
+            stripping:      Efficiency of each stage at and below the feed
+        """
+        rectifying = self.check_valid_input(rectifying)
+        stripping = self.check_valid_input(stripping)
+        if self.confirm_valid_bounding(rectifying) and self.confirm_valid_bounding(stripping):
+            self.murphree = rectifying
+            self.stripping_murphree = stripping
+
+    def set_stage_efficiencies(self, efficiencies):
+        """Sets the Murphree efficiency of each stage from the top of the column; invalid profiles are ignored
+
+        Args:
+            efficiencies:   Sequence of efficiencies, or None to use the section efficiencies for every stage
+        """
+        if efficiencies is None:
+            self.stage_murphree = None
+            return
+        efficiencies = tuple(self.check_valid_input(murphree) for murphree in efficiencies)
+        if all(self.confirm_valid_bounding(murphree) for murphree in efficiencies):
+            self.stage_murphree = efficiencies
+
     def set_distillate_fraction(self, xD):
         xD = self.check_valid_input(xD)
         if self.confirm_valid_bounding(xD, self.xF):
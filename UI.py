@@ -1,10 +1,14 @@
 from PyQt5.QtWidgets import *
 from PyQt5.QtGui import QIcon, QDoubleValidator, QFont
-from PyQt5.QtCore import QCoreApplication, Qt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.figure import Figure
+from PyQt5.QtCore import QCoreApplication, Qt, QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+
+import copy
+import sys
+import threading
 
 import BinarySystem
+import instrumentation as im
+import stage_methods as sm
 import TowerSpecifications
 
 
@@ -24,14 +28,30 @@ class Window(QMainWindow):
         _selected_chemicals:            Stores the chemicals currently selected by the two ComboBoxes
         _display_required_steps:        QLabel displaying the required steps to complete the distillation process
         _display_feed_step:             QLabel displaying the optimal feed step for the distillation process
+        _pressure:                      Operating pressure entered, in mmHg
+        _sweep_pressures:               Pressures whose curves are overlaid on the plot, in mmHg; empty for none
+        _UPDATE_DELAY_MS:               Quiet period after the last edit before a recomputation is started
+        _generation:                    Identifies the latest requested computation; older results are discarded
+        _worker:                        The most recently started ComputeWorker
+        _displayed:                     Graph type, diagram data and StageResult currently displayed; a result whose
+                                        dependency graph reused them leaves the display untouched
+        _INITIAL_GRAPH_TYPE:            Graph displayed once the window has been shown
+        plot_canvas:                    PlotCanvas; None until created just after the window is first shown
+        plot_displayed:                 Signal emitted each time a computed plot has been displayed
+        computation_failed:             Signal emitted with the error message when the current computation fails
     """
 
     _WINDOW_MINIMUM_WIDTH = 640
-    _WINDOW_MINIMUM_HEIGHT = 400
+    _WINDOW_MINIMUM_HEIGHT = 460
     _SIDEBAR_BUTTON_HEIGHT = 26
     _SIDEBAR_BUTTON_WIDTH = 120
     _SIDEBAR_HORIZONTAL_PADDING = 6
     _SIDEBAR_HEIGHT_PADDING = 2
+    _UPDATE_DELAY_MS = 150
+    _INITIAL_GRAPH_TYPE = "Txy"
+
+    plot_displayed = pyqtSignal()
+    computation_failed = pyqtSignal(str)
 
     _selected_chemicals = []
     _chemical_combo_boxes = []
@@ -49,13 +69,36 @@ class Window(QMainWindow):
         self.binary_system = binary_system
         self.tower_specs = tower_specs
         self._selected_chemicals = binary_system.get_current_chemicals()
+        self._pressure = binary_system.get_pressure()
+        self._sweep_pressures = []
+
+        # Recomputations run one at a time off the GUI thread, started once edits pause for _UPDATE_DELAY_MS
+        self._generation = 0
+        self._worker = None
+        self._requested_graph_type = None
+        self._displayed = (None, None, None)
+        self._thread_pool = QThreadPool()
+        self._thread_pool.setMaxThreadCount(1)
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.timeout.connect(self.start_computation)
+
+        self.plot_canvas = None
+        self.make_sidebar()
+        self.show()
 
-        self.plot_canvas = PlotCanvas(binary_system, tower_specs, self)
-        self.plot_canvas.move(self.sidebar_x, 0)
+        # The plotting stack is only loaded, and the first plot only computed, once the window is on screen
+        QTimer.singleShot(0, self.create_plot_canvas)
 
-        self.make_sidebar()
+    def create_plot_canvas(self):
+        """Loads the matplotlib-based canvas, places it beside the sidebar, and requests the initial plot"""
+        import PlotCanvas
 
-        self.show()
+        self.plot_canvas = PlotCanvas.PlotCanvas(self.binary_system, self.tower_specs, self, graph_type=None)
+        self.plot_canvas.move(self.sidebar_x, 0)
+        self.plot_canvas.resize(self.geometry().width() - self.sidebar_x, self.geometry().height())
+        self.plot_canvas.show()
+        self.request_update(self._INITIAL_GRAPH_TYPE, 0)
 
     def make_sidebar(self):
         """Hub function for generating all elements of the side bar
@@ -65,7 +108,8 @@ class Window(QMainWindow):
         2. Graph selection buttons
         3. Chemical selection buttons
         4. Tower property forms
-        5. Number of stages displayed
+        5. Operating pressure and pressure sweep forms
+        6. Number of stages displayed
         """
         self.make_escape_button(0)
 
@@ -77,13 +121,12 @@ class Window(QMainWindow):
         self.make_chemical_combo_boxes(5)
 
         self.make_tower_specification_box(7)
+        self.make_pressure_boxes(12)
 
         feed_steps = str(self.binary_system.get_feed_step())
-        self._display_feed_step = self.make_text_box("Feed stage: " + feed_steps, 12)
+        self._display_feed_step = self.make_text_box("Feed stage: " + feed_steps, 14)
         required_steps = str(self.binary_system.get_required_steps())
-        self._display_required_steps = self.make_text_box("No. stages: " + required_steps, 13)
-
-        self.update_stage_display()
+        self._display_required_steps = self.make_text_box("No. stages: " + required_steps, 15)
 
     def make_escape_button(self, offset):
         """Creates a button that allows the user to terminate the program
@@ -103,7 +146,7 @@ class Window(QMainWindow):
             offset:         Number of buttons above it; determines how far down it displays
         """
         btn = QPushButton(desired_type, self)
-        btn.clicked.connect(lambda: self.plot_canvas.create_plot(desired_type))
+        btn.clicked.connect(lambda: self.request_update(desired_type, 0))
         self.set_generic_sidebar_geometry(btn, offset)
 
     def make_text_box(self, txt, offset):
@@ -196,9 +239,7 @@ class Window(QMainWindow):
 
     def process_valid_chemical_update(self):
         """When a chemical selected is valid, the binary system object is updated and the plot redrawn"""
-        self.binary_system.set_new_chemicals(self._selected_chemicals)
-        self.update_stage_display()
-        self.plot_canvas.recreate_plot()
+        self.request_update(delay=0)
 
     def reset_combo_boxes_selection(self):
         """Reverts the combo boxes to the previous selection"""
@@ -233,11 +274,129 @@ class Window(QMainWindow):
                 self.set_text_input_sidebar_geometry("\u03B7", box, offset + count)
 
             box.textChanged.connect(self.update_tower_specifications(spec_name))
+            box.textChanged.connect(self.chemical_update_completed)
             box.editingFinished.connect(self.chemical_update_completed)
 
+    def make_pressure_boxes(self, offset):
+        """Creates user inputs for the operating pressure, and for the pressures of a sweep overlaid on the plot
+
+        Args:
+            offset:     Number of buttons above it; determines how far down it displays
+        """
+        pressure_box = QLineEdit(self)
+        pressure_box.setValidator(self.make_numeric_validator([1, 100000, 2]))
+        pressure_box.setText(str(self._pressure))
+        pressure_box.setAlignment(Qt.AlignRight)
+        pressure_box.setToolTip("Operating pressure (mmHg)")
+        self.set_text_input_sidebar_geometry("P", pressure_box, offset)
+        pressure_box.textChanged.connect(self.update_pressure)
+
+        sweep_box = QLineEdit(self)
+        sweep_box.setPlaceholderText("Sweep P: 200, 1500")
+        sweep_box.setToolTip("Pressures (mmHg) overlaid on the plot, separated by commas")
+        self.set_generic_sidebar_geometry(sweep_box, offset + 1)
+        sweep_box.textChanged.connect(self.update_sweep_pressures)
+
+    def update_pressure(self, text):
+        """Stores a newly entered operating pressure and schedules a recomputation; incomplete entries are ignored
+
+        Args:
+            text:   Contents of the pressure box
+        """
+        try:
+            pressure = float(text)
+        except ValueError:
+            return
+        if pressure > 0:
+            self._pressure = pressure
+            self.request_update()
+
+    def update_sweep_pressures(self, text):
+        """Stores the pressures to overlay and schedules a recomputation; entries that are not positive numbers are
+        skipped
+
+        Args:
+            text:   Contents of the sweep box, pressures separated by commas or spaces
+        """
+        pressures = []
+        for entry in text.replace(",", " ").split():
+            try:
+                pressure = float(entry)
+            except ValueError:
+                continue
+            if pressure > 0:
+                pressures.append(pressure)
+        self._sweep_pressures = pressures
+        self.request_update()
+
     def chemical_update_completed(self):
-        self.update_stage_display()
-        self.plot_canvas.recreate_plot()
+        """Schedules a debounced recomputation after a tower specification edit"""
+        self.request_update()
+
+    def request_update(self, graph_type=None, delay=None):
+        """Schedules a recomputation of the stage counts and plot, restarting the debounce timer
+
+        Args:
+            graph_type:     Graph to display once computed; defaults to the current one
+            delay:          Milliseconds to wait for further edits; defaults to _UPDATE_DELAY_MS
+        """
+        if graph_type is not None:
+            self._requested_graph_type = graph_type
+        self._update_timer.start(self._UPDATE_DELAY_MS if delay is None else delay)
+
+    def start_computation(self):
+        """Cancels any stale computation and starts one on snapshots of the current system and specifications"""
+        self._generation += 1
+        if self._worker is not None:
+            self._worker.cancel()
+
+        graph_type = self._requested_graph_type
+        if graph_type is None:
+            graph_type = self.plot_canvas.graph_type if self.plot_canvas is not None else self._INITIAL_GRAPH_TYPE
+        self._worker = ComputeWorker(self._generation, copy.copy(self.binary_system), copy.copy(self.tower_specs),
+                                     list(self._selected_chemicals), graph_type, self._pressure,
+                                     list(self._sweep_pressures))
+        self._worker.signals.finished.connect(self.apply_computation)
+        self._worker.signals.failed.connect(self.report_computation_failure)
+        self._thread_pool.start(self._worker)
+
+    def apply_computation(self, result):
+        """Receives a finished computation on the GUI thread and displays it, unless it has been superseded
+
+        Args:
+            result:     ComputeResult posted by a ComputeWorker
+        """
+        if result.generation != self._generation or self.plot_canvas is None:
+            return
+        self._requested_graph_type = None
+        self.binary_system = result.binary_system
+        self.plot_canvas.binary_system = result.binary_system
+
+        # Unchanged values come back as the same objects from the dependency graph, so identity shows what is current
+        displayed_type, displayed_data, displayed_stages = self._displayed
+        if result.stage_result is not displayed_stages:
+            self.display_stage_counts()
+        else:
+            im.count("graph skipped: stage display")
+        if result.graph_type != displayed_type or result.diagram_data is not displayed_data \
+                or result.graph_type != self.plot_canvas.graph_type:
+            self.plot_canvas.show_diagram(result.graph_type, result.diagram_data)
+        else:
+            im.count("graph skipped: artists")
+        self._displayed = (result.graph_type, result.diagram_data, result.stage_result)
+        self.plot_displayed.emit()
+
+    def report_computation_failure(self, generation, message):
+        """Receives a failed computation on the GUI thread and reports it, keeping the previous display
+
+        Args:
+            generation:     Generation of the ComputeWorker that failed
+            message:        Description of the error
+        """
+        if generation != self._generation:
+            return
+        print(message, file=sys.stderr)
+        self.computation_failed.emit(message)
 
     @staticmethod
     def make_numeric_validator(properties):
@@ -276,17 +435,16 @@ class Window(QMainWindow):
         if tower_property == "murphree":
             return self.tower_specs.set_murphree_efficiency
 
-    def update_stage_display(self):
-        """Refreshes the stage display with the current number of feed and required stages"""
-        # Refreshes the number of steps required
-        self.binary_system.find_stage_counts(self.tower_specs)
-
+    def display_stage_counts(self):
+        """Shows the feed and required stages last found by the binary system"""
         # Updates feed step display
         feed_steps = str(self.binary_system.get_feed_step())
         self._display_feed_step.setText("Feed stage:\t" + feed_steps)
 
-        # Updates required step display
+        # Updates required step display; a reflux ratio below the minimum is reported instead of "N/A"
         required_steps = str(self.binary_system.get_required_steps())
+        if self.binary_system.get_stage_status() == sm.INFEASIBLE:
+            required_steps = "R < Rmin = %.3g" % self.binary_system.get_last_minimum_reflux()
         self._display_required_steps.setText("No. stages:\t" + required_steps)
 
     def set_generic_sidebar_geometry(self, gui_object, offset):
@@ -339,67 +497,95 @@ class Window(QMainWindow):
         Args:
             event:  Required parameter by class being overrode
         """
-        self.plot_canvas.resize(self.geometry().width() - self.sidebar_x, self.geometry().height())
+        if self.plot_canvas is not None:
+            self.plot_canvas.resize(self.geometry().width() - self.sidebar_x, self.geometry().height())
 
 
-class PlotCanvas(FigureCanvas):
-    """Used to render plots generated by the BinarySystem class
-
-    Public-Intended Methods:
-        recreate_plot():        Recreates the existing plot
-        create_plot(new_type):  Creates a new plot of type "new_type"
+class ComputeResult:
+    """Stage counts and diagram data produced by a ComputeWorker
 
     Attributes:
-        graph_type:             The current graph type being rendered
+        generation:     Identifies the request that produced this result
+        binary_system:  The worker's BinarySystem snapshot, holding the found stage counts
+        graph_type:     The graph the diagram data belongs to
+        diagram_data:   Lines and axis limits, as returned by BinarySystem.get_diagram_data
+        stage_result:   StageResult the stage counts were taken from
     """
 
-    def __init__(self, binary_system: BinarySystem, tower_specs: TowerSpecifications,
-                 parent=None, width=5, height=4, graph_type="Txy", dpi=100):
-        fig = Figure(figsize=(width, height), dpi=dpi)
-        super().__init__(fig)
-        self.setParent(parent)
-
-        FigureCanvas.setSizePolicy(self, QSizePolicy.Expanding, QSizePolicy.Expanding)
-        FigureCanvas.updateGeometry(self)
-
+    def __init__(self, generation, binary_system, graph_type, diagram_data, stage_result=None):
+        self.generation = generation
         self.binary_system = binary_system
-        self.tower_specs = tower_specs
+        self.graph_type = graph_type
+        self.diagram_data = diagram_data
+        self.stage_result = stage_result
 
-        self.graph_type = None
-        self.create_plot(graph_type)
 
-    def recreate_plot(self):
-        """Recreates the existing plot; used for updating it when parameters change"""
-        self.create_plot(self.graph_type)
+class ComputeSignals(QObject):
+    """Carries a ComputeWorker's result, or the generation and message of its error, back to the GUI thread"""
+    finished = pyqtSignal(object)
+    failed = pyqtSignal(int, str)
 
-    def create_plot(self, new_type):
-        """Used to create a new plot of form "new_type" using the BinarySystem class that is then rendered
 
-        Args:
-            new_type:   New graph desired from BinarySystem. Can be "Txy", "VLE", or "Distillation"
-        """
+class ComputeWorker(QRunnable):
+    """Recomputes the binary system, stage counts and diagram data away from the GUI thread
 
-        self.figure.clf()
-        self.figure.suptitle(new_type, fontweight="bold")
-        ax = self.figure.add_subplot(111)
+    Works only on snapshots taken when it was created, so the GUI is free to keep editing the originals.  The
+    BinarySystem snapshot carries its own copy of the dependency graph, so only the values the edit affects are
+    recomputed.  A cancelled worker stops at the next phase boundary without posting a result; an error is posted
+    through the failed signal instead of escaping run, where it would abort the application.
 
-        if new_type == "Txy":
-            self.binary_system.plot_Txy_diagram(ax)
-        elif new_type == "VLE":
-            self.binary_system.plot_vapor_liquid_equilibrium_diagram(ax)
-        elif new_type == "Distillation":
-            self.binary_system.plot_reflux_distillation_diagram(self.tower_specs, ax)
-        self.graph_type = new_type
+    Attributes:
+        generation:     Identifies the request this worker serves
+        binary_system:  Shallow copy of the window's BinarySystem
+        tower_specs:    Copy of the window's TowerSpecs
+        chemicals:      Chemicals selected when the request was made
+        graph_type:     Graph whose data is computed
+        pressure:       Operating pressure entered when the request was made, in mmHg
+        sweep_pressures: Pressures whose curves are overlaid on the graph, in mmHg
+        signals:        ComputeSignals used to post the ComputeResult or the error
+    """
 
+    def __init__(self, generation, binary_system, tower_specs, chemicals, graph_type, pressure, sweep_pressures=None):
+        super().__init__()
+        self.generation = generation
+        self.binary_system = binary_system
+        self.tower_specs = tower_specs
+        self.chemicals = chemicals
+        self.graph_type = graph_type
+        self.pressure = pressure
+        self.sweep_pressures = sweep_pressures
+        self.signals = ComputeSignals()
+        self._cancelled = threading.Event()
+
+    def cancel(self):
+        """Requests the worker to stop at the next phase boundary"""
+        self._cancelled.set()
+
+    def run(self):
+        """Solves each phase in turn, checking for cancellation between them"""
         try:
-            self.draw()
-        except RuntimeError as inst:
-            # Canvas object was deleted
-            # Cannot determine how to stop this - I think it's automatically cleaned up by the parent based on some
-            # digging.  I tried to force it to redraw; but the UI disappears and it infinitely loops.
-            print("RuntimeError:", inst.args[0])
-        except KeyError as inst:
-            # Occurred once, when boiling point difference was within 1 degree (L-lactide and n-hexadecane)
-            # Was an error using figure.clf() where the axes were missing
-            print("KeyError:", inst.args)
-
+            self.compute()
+        except Exception as inst:
+            if not self._cancelled.is_set():
+                self.signals.failed.emit(self.generation, type(inst).__name__ + ": " + str(inst))
+
+    def compute(self):
+        """Runs the phases of run, letting any error propagate"""
+        if self._cancelled.is_set():
+            return
+        if set(self.binary_system.get_current_chemicals()) != set(self.chemicals):
+            self.binary_system.set_new_chemicals(self.chemicals)
+        if self.binary_system.get_pressure() != self.pressure:
+            self.binary_system.set_pressure(self.pressure)
+
+        if self._cancelled.is_set():
+            return
+        stage_result = self.binary_system.find_stage_counts(self.tower_specs)
+
+        if self._cancelled.is_set():
+            return
+        diagram_data = self.binary_system.get_diagram_data(self.graph_type, self.tower_specs, self.sweep_pressures)
+
+        if not self._cancelled.is_set():
+            self.signals.finished.emit(ComputeResult(self.generation, self.binary_system, self.graph_type,
+                                                     diagram_data, stage_result))
@@ -0,0 +1,131 @@
+import sys
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+
+class VLECache:
+    """Bounded least-recently-used cache of computed VLE tables, or any other computed results; safe to share between
+    threads
+
+    Public-Intended Methods:
+        get(key):           Returns the cached table for "key", or None
+        put(key, table):    Stores a table, evicting the least recently used ones past the limits
+        get_statistics():   Returns hit / miss / eviction counters and current usage
+
+    Attributes:
+        max_entries:    int; maximum number of tables held
+        max_bytes:      int; maximum total size of the tables held, in bytes; see get_table_size
+        hits:           int; lookups that found a table
+        misses:         int; lookups that did not
+        evictions:      int; tables dropped to respect the limits
+    """
+
+    def __init__(self, max_entries=64, max_bytes=64 * 1024 ** 2):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._tables = OrderedDict()
+        self._sizes = {}
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Retrieves a table and marks it as most recently used
+
+        Args:
+            key:    Hashable key, e.g. (light, heavy, pressure, resolution)
+
+        Returns:
+            table:  The cached table, or None if absent
+        """
+        with self._lock:
+            if key not in self._tables:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._tables.move_to_end(key)
+            return self._tables[key]
+
+    def put(self, key, table):
+        """Stores a table, then evicts least recently used tables until both limits are respected
+
+        Args:
+            key:    Hashable key, e.g. (light, heavy, pressure, resolution)
+            table:  Dictionary of values, or an object; its size towards max_bytes is found by get_table_size
+        """
+        size = self.get_table_size(table)
+        with self._lock:
+            if key in self._tables:
+                self._total_bytes -= self._sizes.pop(key)
+                del self._tables[key]
+            if size > self.max_bytes:
+                return
+
+            self._tables[key] = table
+            self._sizes[key] = size
+            self._total_bytes += size
+
+            while len(self._tables) > self.max_entries or self._total_bytes > self.max_bytes:
+                oldest, _ = self._tables.popitem(last=False)
+                self._total_bytes -= self._sizes.pop(oldest)
+                self.evictions += 1
+
+    def clear(self):
+        """Drops every table; counters are kept"""
+        with self._lock:
+            self._tables.clear()
+            self._sizes.clear()
+            self._total_bytes = 0
+
+    def get_statistics(self):
+        """Used to report cache effectiveness
+
+        Returns:
+            statistics:     Dictionary of counters and current usage
+        """
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                "entries": len(self._tables), "bytes": self._total_bytes}
+
+    @classmethod
+    def get_table_size(cls, table, counted=None):
+        """Approximates the memory held by a table: its NumPy arrays, and its Python lists with the numbers within them
+
+        Nested tuples, dictionaries and objects, such as the InverseEquilibrium of a VLETable, are walked; a value
+        reachable more than once, like an array shared by two attributes, is counted once.
+
+        Args:
+            table:      Dictionary of values, a NamedTuple, or an object whose attributes are counted; bytes count whole
+            counted:    Identities of the values already counted; None for a new count
+
+        Returns:
+            size:       Total bytes of the arrays and lists within "table"
+        """
+        if counted is None:
+            counted = set()
+        if id(table) in counted:
+            return 0
+        counted.add(id(table))
+
+        if isinstance(table, np.ndarray):
+            return table.nbytes
+        if isinstance(table, bytes):
+            return len(table)
+        if isinstance(table, list):
+            return sys.getsizeof(table) + sum(sys.getsizeof(value) if isinstance(value, (int, float))
+                                              else cls.get_table_size(value, counted) for value in table)
+        if isinstance(table, dict):
+            values = table.values()
+        elif isinstance(table, tuple):
+            values = table
+        elif hasattr(table, "__dict__"):
+            values = vars(table).values()
+        else:
+            return 0
+        return sum(cls.get_table_size(value, counted) for value in values)
+
+    def __len__(self):
+        return len(self._tables)
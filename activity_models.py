@@ -0,0 +1,143 @@
+"""Liquid-phase activity coefficient models for binary systems, evaluated element-wise on NumPy arrays
+
+Each model is registered in ACTIVITY_MODELS under its name, with its function and default binary-interaction-parameter
+file.  A parameter file is a CSV keyed by "chemical 1/chemical 2" whose columns are that model's parameters, with the
+interaction terms written as a + b / T (T in Kelvin):
+    Wilson: a12, b12, a21, b21          ln(Lambda_ij) = a_ij + b_ij / T
+    NRTL:   a12, b12, a21, b21, alpha   tau_ij = a_ij + b_ij / T, G_ij = exp(-alpha * tau_ij)
+"""
+import numpy as np
+
+import FileRead as FR
+
+IDEAL = "Ideal"
+
+
+def get_ideal_activity_coefficients(parameters, x, T):
+    """Raoult's law: both activity coefficients are 1
+
+    Args:
+        parameters:     Unused
+        x:              float or array of floats; liquid mole fraction(s) of chemical 1
+        T:              float or array of floats; temperature(s), in Kelvin
+
+    Returns:
+        gamma_1:        array of floats; activity coefficient(s) of chemical 1
+        gamma_2:        array of floats; activity coefficient(s) of chemical 2
+    """
+    ones = np.ones(np.broadcast(x, T).shape)
+    return ones, ones
+
+
+def get_Wilson_activity_coefficients(parameters, x, T):
+    """Wilson equation:
+            ln(gamma_1) = -ln(x1 + L12 x2) + x2 (L12 / (x1 + L12 x2) - L21 / (x2 + L21 x1)), and symmetrically
+
+    Args:
+        parameters:     [a12, b12, a21, b21]
+        x:              float or array of floats; liquid mole fraction(s) of chemical 1
+        T:              float or array of floats; temperature(s), in Kelvin
+
+    Returns:
+        gamma_1:        array of floats; activity coefficient(s) of chemical 1
+        gamma_2:        array of floats; activity coefficient(s) of chemical 2
+    """
+    a12, b12, a21, b21 = parameters
+    x1 = np.asarray(x, dtype=float)
+    x2 = 1 - x1
+    lambda_12 = np.exp(a12 + b12 / T)
+    lambda_21 = np.exp(a21 + b21 / T)
+
+    sum_1 = x1 + lambda_12 * x2
+    sum_2 = x2 + lambda_21 * x1
+    shared = lambda_12 / sum_1 - lambda_21 / sum_2
+    return np.exp(-np.log(sum_1) + x2 * shared), np.exp(-np.log(sum_2) - x1 * shared)
+
+
+def get_NRTL_activity_coefficients(parameters, x, T):
+    """Non-Random Two-Liquid (NRTL) equation:
+            ln(gamma_1) = x2^2 (tau21 (G21 / (x1 + x2 G21))^2 + tau12 G12 / (x2 + x1 G12)^2), and symmetrically
+
+    Args:
+        parameters:     [a12, b12, a21, b21, alpha]
+        x:              float or array of floats; liquid mole fraction(s) of chemical 1
+        T:              float or array of floats; temperature(s), in Kelvin
+
+    Returns:
+        gamma_1:        array of floats; activity coefficient(s) of chemical 1
+        gamma_2:        array of floats; activity coefficient(s) of chemical 2
+    """
+    a12, b12, a21, b21, alpha = parameters
+    x1 = np.asarray(x, dtype=float)
+    x2 = 1 - x1
+    tau_12 = a12 + b12 / T
+    tau_21 = a21 + b21 / T
+    G_12 = np.exp(-alpha * tau_12)
+    G_21 = np.exp(-alpha * tau_21)
+
+    sum_1 = x1 + x2 * G_21
+    sum_2 = x2 + x1 * G_12
+    ln_gamma_1 = x2 ** 2 * (tau_21 * (G_21 / sum_1) ** 2 + tau_12 * G_12 / sum_2 ** 2)
+    ln_gamma_2 = x1 ** 2 * (tau_12 * (G_12 / sum_2) ** 2 + tau_21 * G_21 / sum_1 ** 2)
+    return np.exp(ln_gamma_1), np.exp(ln_gamma_2)
+
+
+# Model name: [activity coefficient function, default parameter file]
+ACTIVITY_MODELS = {IDEAL: [get_ideal_activity_coefficients, None],
+                   "Wilson": [get_Wilson_activity_coefficients, "wilsonData.csv"],
+                   "NRTL": [get_NRTL_activity_coefficients, "nrtlData.csv"]}
+
+
+def get_activity_coefficients(model, parameters, x, T):
+    """Evaluates the named activity coefficient model
+
+    Args:
+        model:          Key of ACTIVITY_MODELS
+        parameters:     Binary interaction parameters of the model, oriented so chemical 1 is the one x refers to
+        x:              float or array of floats; liquid mole fraction(s) of chemical 1
+        T:              float or array of floats; temperature(s), in Kelvin
+
+    Returns:
+        gamma_1:        array of floats; activity coefficient(s) of chemical 1
+        gamma_2:        array of floats; activity coefficient(s) of chemical 2
+    """
+    return ACTIVITY_MODELS[model][0](parameters, x, T)
+
+
+def read_interaction_parameters(parameter_file):
+    """Reads a binary-interaction-parameter file
+
+    Args:
+        parameter_file: CSV keyed by "chemical 1/chemical 2"
+
+    Returns:
+        parameters:     Dictionary; key: (chemical 1, chemical 2); value: list of the model's parameters
+    """
+    data = FR.FileRead(parameter_file, ",", True).get_data()
+    return {tuple(chemical.strip() for chemical in pair.split("/")): values for pair, values in data.items()}
+
+
+def get_pair_parameters(model, interaction_parameters, light_chemical, heavy_chemical):
+    """Finds a pair's interaction parameters, oriented so the light chemical is chemical 1
+
+    The "12" and "21" terms are exchanged if the file lists the pair the other way round; any remaining parameters,
+    such as NRTL's alpha, are symmetric.
+
+    Args:
+        model:                  Key of ACTIVITY_MODELS
+        interaction_parameters: Dictionary from read_interaction_parameters
+        light_chemical:         Chemical 1 of the returned parameters
+        heavy_chemical:         Chemical 2 of the returned parameters
+
+    Returns:
+        parameters:             List of the model's parameters, or None if the pair is not listed
+    """
+    if model == IDEAL:
+        return None
+    parameters = interaction_parameters.get((light_chemical, heavy_chemical))
+    if parameters is not None:
+        return list(parameters)
+    parameters = interaction_parameters.get((heavy_chemical, light_chemical))
+    if parameters is not None:
+        return list(parameters[2:4]) + list(parameters[0:2]) + list(parameters[4:])
+    return None
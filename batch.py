@@ -0,0 +1,274 @@
+"""Headless batch mode: solves distillation cases from a CSV or JSONL file without loading the GUI
+
+Each case gives "light" and "heavy" chemicals plus "R", "xB", "xF", "xD" and optionally "murphree" (default 1),
+"murphree_stripping" (the stripping-section efficiency, if it differs), "murphree_stages" (efficiencies of the stages
+from the top, ";"-separated in a CSV cell or a list in JSONL), "pressure" in mmHg (default 760) and "activity_model"
+("Ideal", "Wilson" or "NRTL"; default "Ideal").  The "activity_model" result is the model actually used, which is
+"Ideal" for pairs without interaction parameters.  Results are streamed as each chunk of cases is solved; "status"
+tells a completed design from one infeasible below its minimum reflux or one needing more than --max-steps stages.
+With --profiles, the bubble-point temperature of every stage is added, from the top of the column down; the profile
+is empty unless the status is "complete".  Solved VLE tables are kept in the persistent result cache (see DiskCache),
+so repeated runs over the same pairs start warm.
+
+Usage:
+    python batch.py CASES [--output FILE] [--format csv|jsonl] [--data FILE] [--chunk-size N] [--profiles]
+                    [--max-steps N] [--cache FILE|off]
+"""
+import argparse
+import csv
+import itertools
+import json
+import sys
+
+import numpy as np
+
+import activity_models as am
+import BinarySystem as BS
+import DiskCache
+import distillation_core as dc
+import TowerSpecifications as TS
+import stage_methods as sm
+import vle_methods as vm
+
+RESULT_FIELDS = ["light", "heavy", "R", "xB", "xF", "xD", "murphree", "pressure", "activity_model",
+                 "stages", "feed_stage", "minimum_reflux", "status"]
+PROFILE_FIELD = "temperature_profile"
+
+
+def read_cases(file, case_format):
+    """Lazily reads cases from an open CSV or JSONL file
+
+    Args:
+        file:           Open text file
+        case_format:    "csv" or "jsonl"
+
+    Yields:
+        line_number:    Line the case was read from
+        case:           Dictionary of case fields
+    """
+    if case_format == "jsonl":
+        for line_number, line in enumerate(file, 1):
+            if line.strip():
+                yield line_number, json.loads(line)
+    else:
+        for line_number, case in enumerate(csv.DictReader(file), 2):
+            yield line_number, case
+
+
+def solve_cases(cases, data_file="antoineData.csv", profiles=False, max_steps=sm.DEFAULT_MAX_PERMITTED_STEPS):
+    """Solves a chunk of cases, batching together every case that shares a chemical pair, pressure and activity model
+
+    Args:
+        cases:          List of (line number, case dictionary)
+        data_file:      Antoine coefficient CSV
+        profiles:       Whether the stage temperatures of every case are added under PROFILE_FIELD
+        max_steps:      Stage limit of each case
+
+    Returns:
+        results:        List of result dictionaries, ordered as RESULT_FIELDS and in the order of "cases"; a case with a
+                        missing or non-numeric field, or an unknown chemical, is reported on stderr and left out
+    """
+    results = [None] * len(cases)
+    pairs = {}
+    tower_specs = {}
+    for index, (line_number, case) in enumerate(cases):
+        try:
+            pressure = get_number(case, "pressure", vm.STANDARD_PRESSURE)
+            if not pressure > 0:
+                raise ValueError("pressure must be positive")
+            activity_model = (case.get("activity_model") or am.IDEAL).strip()
+            pair = (case["light"].strip(), case["heavy"].strip(), pressure, activity_model)
+            tower_specs[index] = get_tower_specs(case)
+        except KeyError as inst:
+            print("KeyError: line", line_number, "- missing field", inst.args[0], file=sys.stderr)
+            continue
+        except (TypeError, ValueError, AttributeError) as inst:
+            print(type(inst).__name__ + ": line", line_number, "-", inst, file=sys.stderr)
+            continue
+        pairs.setdefault(pair, []).append(index)
+
+    for pair, indices in pairs.items():
+        try:
+            binary_system = BS.BinarySystem(pair[0], pair[1], data_file=data_file, pressure=pair[2],
+                                            activity_model=pair[3])
+        except KeyError as inst:
+            for index in indices:
+                print("KeyError: line", cases[index][0], "- unknown chemical or activity model", inst.args[0],
+                      file=sys.stderr)
+            continue
+
+        counts = dc.solve_stage_counts(binary_system.get_cache_key(), [tower_specs[index] for index in indices],
+                                       binary_system.solve_vapor_liquid_equilibrium(), max_steps, profiles)
+        steps, feed_steps, minimum_reflux, status = (counts["steps_required"], counts["feed_steps"],
+                                                     counts["minimum_reflux"], counts["status"])
+        R, xB, xF, xD, murphree = counts["R"], counts["xB"], counts["xF"], counts["xD"], counts["murphree"]
+
+        light, heavy = binary_system.get_current_chemicals()
+        for position, index in enumerate(indices):
+            complete = status[position] == sm.COMPLETE
+            results[index] = {"light": light, "heavy": heavy, "R": R[position], "xB": xB[position],
+                              "xF": xF[position], "xD": xD[position], "murphree": murphree[position],
+                              "pressure": pair[2], "activity_model": binary_system.get_activity_model(),
+                              "stages": int(steps[position]) if complete else "N/A",
+                              "feed_stage": int(feed_steps[position]) if complete else "N/A",
+                              "minimum_reflux": round(float(minimum_reflux[position]), 6)
+                              if np.isfinite(minimum_reflux[position]) else "inf",
+                              "status": str(status[position])}
+            if profiles:
+                # Only a completed design has a profile; the others would only hold NaN, which is not valid JSON
+                results[index][PROFILE_FIELD] = np.round(counts["temperatures"][position][:steps[position]],
+                                                         3).tolist() if complete else []
+
+    return [result for result in results if result is not None]
+
+
+def get_number(case, field, default=None):
+    """Reads a numeric field of a case; a missing field or an empty CSV cell takes the default, while 0 is kept
+
+    Args:
+        case:       Dictionary of case fields
+        field:      Name of the field
+        default:    Value of a missing field; None if the field is required
+
+    Returns:
+        value:      float
+
+    Raises:
+        KeyError:   If a required field is missing
+        ValueError: If the field is not numeric
+    """
+    value = case.get(field)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        if default is None:
+            raise KeyError(field)
+        value = default
+    return float(value)
+
+
+def get_tower_specs(case):
+    """Builds the TowerSpecs of a case, including any section or per-stage Murphree efficiencies
+
+    TowerSpecs replaces out-of-range values with defaults, which suits the GUI but would silently solve a different
+    design, so a case is checked first
+
+    Args:
+        case:           Dictionary of case fields
+
+    Returns:
+        tower_specs:    TowerSpecs object
+
+    Raises:
+        KeyError:       If R, xB, xF or xD is missing
+        ValueError:     If a field is not numeric, or the specification is out of bounds
+    """
+    R, xB, xF, xD = (get_number(case, field) for field in ("R", "xB", "xF", "xD"))
+    murphree = get_number(case, "murphree", 1)
+    stripping_murphree = get_number(case, "murphree_stripping", murphree)
+    stage_efficiencies = case.get("murphree_stages")
+    if isinstance(stage_efficiencies, str):
+        stage_efficiencies = [float(value) for value in stage_efficiencies.split(";") if value.strip()]
+    stage_efficiencies = [float(value) for value in stage_efficiencies] if stage_efficiencies else None
+
+    if not R >= 0:
+        raise ValueError("R must not be negative")
+    if not 0 <= xB < xF < xD <= 1:
+        raise ValueError("compositions must satisfy 0 <= xB < xF < xD <= 1")
+    if not all(0 < value <= 1 for value in [murphree, stripping_murphree] + (stage_efficiencies or [])):
+        raise ValueError("Murphree efficiencies must be above 0 and at most 1")
+
+    tower_specs = TS.TowerSpecs(R, xB, xF, xD, murphree)
+    if tower_specs.get_tower_specifications() != (xB, xF, xD, murphree):
+        raise ValueError("compositions must be at least 0.001 apart")
+    if stripping_murphree != murphree:
+        tower_specs.set_section_efficiencies(murphree, stripping_murphree)
+    if stage_efficiencies:
+        tower_specs.set_stage_efficiencies(stage_efficiencies)
+    return tower_specs
+
+
+def run_batch(cases_file, output, case_format=None, output_format="csv", data_file="antoineData.csv",
+              chunk_size=1000, profiles=False, max_steps=sm.DEFAULT_MAX_PERMITTED_STEPS):
+    """Streams every case of "cases_file" through the solver, writing results chunk by chunk
+
+    Args:
+        cases_file:     CSV or JSONL file of cases
+        output:         Open text file results are written to
+        case_format:    "csv" or "jsonl"; inferred from the file extension if None
+        output_format:  "csv" or "jsonl"
+        data_file:      Antoine coefficient CSV
+        chunk_size:     Cases solved together
+        profiles:       Whether the stage temperatures are written too; ";"-separated within a CSV cell
+        max_steps:      Stage limit of each case
+
+    Returns:
+        count:          Number of results written
+    """
+    if case_format is None:
+        case_format = "jsonl" if cases_file.endswith((".jsonl", ".json")) else "csv"
+
+    fields = RESULT_FIELDS + [PROFILE_FIELD] if profiles else RESULT_FIELDS
+    writer = None
+    if output_format == "csv":
+        writer = csv.DictWriter(output, fields, lineterminator="\n")
+        writer.writeheader()
+
+    count = 0
+    with open(cases_file, newline="") as file:
+        cases = read_cases(file, case_format)
+        while True:
+            chunk = list(itertools.islice(cases, chunk_size))
+            if not chunk:
+                break
+            for result in solve_cases(chunk, data_file, profiles, max_steps):
+                if writer is not None:
+                    if profiles:
+                        result[PROFILE_FIELD] = ";".join(str(T) for T in result[PROFILE_FIELD])
+                    writer.writerow(result)
+                else:
+                    output.write(json.dumps({field: to_json_value(result[field]) for field in fields}) + "\n")
+                count += 1
+            output.flush()
+    return count
+
+
+def to_json_value(value):
+    """Converts NumPy scalars to their plain Python equivalents for json.dumps"""
+    return value.item() if isinstance(value, np.generic) else value
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Solves distillation cases without loading the GUI")
+    parser.add_argument("cases", help="CSV or JSONL file of cases")
+    parser.add_argument("--output", default=None, help="Results file; defaults to stdout")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None,
+                        help="Output format; inferred from --output, else csv")
+    parser.add_argument("--data", default="antoineData.csv", help="Antoine coefficient CSV")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    parser.add_argument("--profiles", action="store_true", help="Add the temperature of every stage")
+    parser.add_argument("--max-steps", type=int, default=sm.DEFAULT_MAX_PERMITTED_STEPS,
+                        help="Stage limit; designs needing more are reported as N/A")
+    parser.add_argument("--cache", default=None,
+                        help="Persistent result cache file, or off; defaults to $DISTILLATION_CACHE, else " +
+                             DiskCache.DEFAULT_PATH)
+    args = parser.parse_args()
+
+    if args.cache is None:
+        BS.BinarySystem.set_disk_cache(DiskCache.get_default_cache(dc.SOLVER_VERSION))
+    elif args.cache.lower() != "off":
+        BS.BinarySystem.set_disk_cache(DiskCache.DiskCache(args.cache, version=dc.SOLVER_VERSION))
+
+    output_format = args.format
+    if output_format is None:
+        output_format = "jsonl" if args.output and args.output.endswith((".jsonl", ".json")) else "csv"
+
+    if args.output is None:
+        run_batch(args.cases, sys.stdout, None, output_format, args.data, args.chunk_size, args.profiles,
+                  args.max_steps)
+    else:
+        with open(args.output, "w", newline="") as output:
+            run_batch(args.cases, output, None, output_format, args.data, args.chunk_size, args.profiles,
+                      args.max_steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""Measures cold-start time of the GUI: process start to window shown, and to the first plot displayed
+
+Each run is a fresh interpreter, so module imports are measured cold.  Without a display, Qt's offscreen platform is
+used.
+
+Usage:
+    python benchmark_startup.py [--runs N] [--output FILE]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+_PROBE = """
+import time
+start = time.perf_counter()
+import json
+import main
+from PyQt5.QtCore import QTimer
+
+imported = time.perf_counter()
+app, window = main.create_window()
+shown = time.perf_counter()
+times = {"import": imported - start, "window_shown": shown - start}
+
+def plot_displayed():
+    times["first_plot"] = time.perf_counter() - start
+    app.quit()
+
+window.plot_displayed.connect(plot_displayed)
+QTimer.singleShot(30000, app.quit)
+app.exec_()
+print(json.dumps(times))
+"""
+
+
+def measure_startup(runs=5):
+    """Launches the application "runs" times in fresh interpreters and collects the startup phases
+
+    Args:
+        runs:       Number of cold starts
+
+    Returns:
+        results:    Dictionary; key: phase; value: list of seconds, one per run
+    """
+    environment = dict(os.environ)
+    if not environment.get("DISPLAY") and sys.platform.startswith("linux"):
+        environment.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+    results = {}
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True, env=environment,
+                                cwd=os.path.dirname(os.path.abspath(__file__)), check=True).stdout
+        for phase, seconds in json.loads(output.strip().splitlines()[-1]).items():
+            results.setdefault(phase, []).append(seconds)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measures GUI cold-start time")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", default=None, help="Optional JSON file for the raw timings")
+    args = parser.parse_args()
+
+    results = measure_startup(args.runs)
+    for phase, seconds in results.items():
+        print("%-14s median %7.1f ms   min %7.1f ms" % (phase, statistics.median(seconds) * 1000,
+                                                       min(seconds) * 1000))
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
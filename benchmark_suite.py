@@ -0,0 +1,237 @@
+"""Benchmark suite for the numerical hot paths, over a matrix of chemical pairs and tower specifications
+
+Results are stored as JSON so two runs can be compared and regressions flagged.
+
+Usage:
+    python benchmark_suite.py run [--output FILE] [--quick] [--filter TEXT]
+    python benchmark_suite.py compare BASELINE CURRENT [--threshold FRACTION]
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+import BinarySystem as BS
+import FileRead as FR
+import TowerSpecifications as TS
+
+CHEMICAL_PAIRS = [("ethanol", "n-nonane"), ("n-hexane", "water"), ("n-pentane", "1-octanol")]
+TOWER_SPECIFICATIONS = {"R2.5-eta0.95": (2.5, 0.1, 0.4, 0.95, 0.95),
+                        "R1-eta1": (1.0, 0.05, 0.5, 0.99, 1.0),
+                        "R5-eta0.7": (5.0, 0.02, 0.3, 0.9, 0.7)}
+GRAPH_TYPES = ["Txy", "VLE", "Distillation"]
+
+
+def time_call(function, minimum_time, repeats):
+    """Times a callable, calibrating how many calls make up one measurement
+
+    Args:
+        function:       Callable taking no arguments
+        minimum_time:   Seconds each measurement should last at least
+        repeats:        Number of measurements
+
+    Returns:
+        timing:         Dictionary of per-call "median" and "min" seconds, and the "number" of calls per measurement
+    """
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= minimum_time or number >= 1 << 20:
+            break
+        number *= 2 if elapsed == 0 else max(2, int(minimum_time / elapsed * 1.2))
+
+    measurements = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            function()
+        measurements.append((time.perf_counter() - start) / number)
+    return {"median": statistics.median(measurements), "min": min(measurements), "number": number}
+
+
+def make_system(pair):
+    """Creates a BinarySystem with its VLE data already solved"""
+    binary_system = BS.BinarySystem(*pair)
+    binary_system.solve_vapor_liquid_equilibrium()
+    return binary_system
+
+
+def pair_name(pair):
+    return pair[0] + "/" + pair[1]
+
+
+def get_solver_cases():
+    """Builds the benchmark cases of the BinarySystem solvers
+
+    Yields:
+        benchmark:  Name of the benchmarked function
+        case:       Name of the pair / specification combination
+        function:   Callable taking no arguments
+    """
+    for pair in CHEMICAL_PAIRS:
+        binary_system = make_system(pair)
+        T_middle = sum(binary_system.temperature_bounds) / 2
+        case = pair_name(pair)
+
+        yield ("solve_binary_Raoult_Relation", case,
+               lambda s=binary_system, T=T_middle: s.solve_binary_Raoult_Relation(T))
+        yield "get_vapor_liquid_equilibrium_data", case, binary_system.get_vapor_liquid_equilibrium_data
+
+        yield "get_temperature_from_x", case, lambda s=binary_system: s.get_temperature_from_x(0.5)
+        yield ("get_temperature_from_x", case + " 51 stages",
+               lambda s=binary_system, x=np.linspace(0.02, 0.98, 51): s.get_temperature_from_x(x))
+
+        for spec_name, specification in TOWER_SPECIFICATIONS.items():
+            tower_specs = TS.TowerSpecs(*specification)
+            spec_case = case + " " + spec_name
+            yield ("get_effective_vapor_liquid_equilibrium_data", spec_case,
+                   lambda s=binary_system, t=tower_specs: s.get_effective_vapor_liquid_equilibrium_data(t))
+
+            effective_y = None
+            if tower_specs.get_murphree() != 1:
+                effective_y = binary_system.get_effective_vapor_liquid_equilibrium_data(tower_specs)
+            yield ("plot_McCabe_Thiele_steps", spec_case,
+                   lambda s=binary_system, t=tower_specs, e=effective_y: s.plot_McCabe_Thiele_steps(t, None, e))
+            yield ("get_pressure_sweep", spec_case + " 50 pressures",
+                   lambda s=binary_system, t=tower_specs: s.get_pressure_sweep(np.geomspace(100, 5000, 50), t))
+
+
+def get_file_read_cases(directory):
+    """Builds the FileRead parsing cases: the shipped coefficient file and a generated 100k-row file
+
+    Args:
+        directory:  Directory the generated file is written to
+
+    Yields:
+        benchmark, case, function:  As get_solver_cases
+    """
+    generated_file = os.path.join(directory, "coefficients_100k.csv")
+    coefficients = np.random.default_rng(0).uniform(-100, 4000, (100000, 3))
+    with open(generated_file, "w") as file:
+        file.write("Species,         A,        B,         C\n")
+        file.writelines("chemical-%06d,  %.4f,  %.2f,  %.2f\n" % (index, *row)
+                        for index, row in enumerate(coefficients))
+
+    yield "FileRead", "antoineData.csv", lambda: FR.FileRead("antoineData.csv", ",", True)
+    yield "FileRead", "100k rows", lambda: FR.FileRead(generated_file, ",", True)
+
+
+def get_canvas_cases():
+    """Builds the PlotCanvas.create_plot cases, on Qt's offscreen platform; skipped if PyQt5 is unavailable
+
+    Yields:
+        benchmark, case, function:  As get_solver_cases
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    try:
+        from PyQt5.QtWidgets import QApplication
+        import PlotCanvas
+    except ImportError as inst:
+        print("ImportError: skipping PlotCanvas.create_plot -", inst, file=sys.stderr)
+        return
+
+    get_canvas_cases.application = QApplication.instance() or QApplication([])
+    for pair in CHEMICAL_PAIRS:
+        canvas = PlotCanvas.PlotCanvas(make_system(pair), TS.TowerSpecs(*TOWER_SPECIFICATIONS["R2.5-eta0.95"]),
+                                       graph_type=None)
+        canvas.resize(640, 400)
+        for graph_type in GRAPH_TYPES:
+            yield ("PlotCanvas.create_plot", pair_name(pair) + " " + graph_type,
+                   lambda c=canvas, g=graph_type: c.create_plot(g))
+
+
+def run_benchmarks(quick=False, name_filter=None):
+    """Runs every benchmark case
+
+    Args:
+        quick:          Shorter, fewer measurements; for smoke-testing the suite
+        name_filter:    Only benchmarks whose name contains this text are run
+
+    Returns:
+        report:         Dictionary with run "metadata" and "results"[benchmark][case] timings
+    """
+    minimum_time, repeats = (0.005, 3) if quick else (0.05, 7)
+    report = {"metadata": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                           "numpy": np.__version__, "platform": platform.platform(), "quick": quick},
+              "results": {}}
+
+    with tempfile.TemporaryDirectory() as directory:
+        for cases in (get_solver_cases(), get_file_read_cases(directory), get_canvas_cases()):
+            for benchmark, case, function in cases:
+                if name_filter is not None and name_filter not in benchmark:
+                    continue
+                timing = time_call(function, minimum_time, repeats)
+                report["results"].setdefault(benchmark, {})[case] = timing
+                print("%-45s %-32s %12.1f us" % (benchmark, case, timing["median"] * 1e6))
+    return report
+
+
+def compare_reports(baseline, current, threshold=0.1):
+    """Compares two benchmark reports case by case
+
+    Args:
+        baseline:   Report from run_benchmarks used as the reference
+        current:    Report from run_benchmarks being checked
+        threshold:  Relative slowdown of the median above which a case is flagged
+
+    Returns:
+        rows:       List of (benchmark, case, baseline median, current median, ratio, flagged)
+    """
+    rows = []
+    for benchmark, cases in current["results"].items():
+        for case, timing in cases.items():
+            reference = baseline["results"].get(benchmark, {}).get(case)
+            if reference is None:
+                continue
+            ratio = timing["median"] / reference["median"]
+            rows.append((benchmark, case, reference["median"], timing["median"], ratio, ratio > 1 + threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the numerical hot paths")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Run the suite and store the results as JSON")
+    run_parser.add_argument("--output", default="benchmark_results.json")
+    run_parser.add_argument("--quick", action="store_true")
+    run_parser.add_argument("--filter", default=None)
+
+    compare_parser = commands.add_parser("compare", help="Flag cases that slowed down between two runs")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=0.1)
+    args = parser.parse_args()
+
+    if args.command == "run":
+        report = run_benchmarks(args.quick, args.filter)
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=2)
+        print("Results written to", args.output)
+        return
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)
+    with open(args.current) as file:
+        current = json.load(file)
+
+    regressions = 0
+    for benchmark, case, before, after, ratio, flagged in compare_reports(baseline, current, args.threshold):
+        regressions += flagged
+        print("%-45s %-32s %10.1f -> %10.1f us  x%.2f%s" % (benchmark, case, before * 1e6, after * 1e6, ratio,
+                                                            "  REGRESSION" if flagged else ""))
+    print(regressions, "regression(s) above", "%.0f%%" % (args.threshold * 100))
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,666 @@
+"""Stateless compute core: pure functions over immutable system and tower specifications
+
+Nothing here keeps state between calls or mutates its inputs, so every function may be called concurrently from thread
+pools or process pools without locks.  Specifications are hashable NamedTuples, usable directly as cache keys, and
+every result pickles.  BinarySystem wraps these functions for the GUI, keeping the mutable selections and the caches.
+
+Typical use:
+    system = make_system_spec("ethanol", "n-nonane", light_coefficients, heavy_coefficients)
+    table = solve_vle(system)
+    stage_result = solve_stages(system, TowerSpec(2.5, 0.1, 0.4, 0.95, 0.95), table)
+"""
+import math
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+import activity_models as am
+import instrumentation as im
+import vle_methods as vm
+import stage_methods as sm
+import InverseEquilibrium
+import StageResult
+
+COMPOSITION_POINTS = 201
+# Part of every persistent cache key; increase it whenever a change alters any solved result
+SOLVER_VERSION = 1
+
+
+class SystemSpec(NamedTuple):
+    """Immutable description of a binary system, ordered so the light chemical boils first; see make_system_spec
+
+    Attributes:
+        light_chemical:         string; name of the light chemical
+        heavy_chemical:         string; name of the heavy chemical
+        light_coefficients:     tuple floats; Antoine coefficients of the light chemical
+        heavy_coefficients:     tuple floats; Antoine coefficients of the heavy chemical
+        pressure:               float; operating pressure, in mmHg
+        interpolation_tolerance: float or None; if set, the temperature grid is refined adaptively until linear
+                                interpolation is within this error, else a fixed 1 K step is used
+        activity_model:         string; key of activity_models.ACTIVITY_MODELS actually used
+        activity_parameters:    tuple floats or None; interaction parameters, light chemical first; None if ideal
+    """
+    light_chemical: str
+    heavy_chemical: str
+    light_coefficients: Tuple[float, float, float]
+    heavy_coefficients: Tuple[float, float, float]
+    pressure: float = vm.STANDARD_PRESSURE
+    interpolation_tolerance: Optional[float] = None
+    activity_model: str = am.IDEAL
+    activity_parameters: Optional[Tuple[float, ...]] = None
+
+
+class TowerSpec(NamedTuple):
+    """Immutable tower specification, offering the same accessors as TowerSpecs so either can be solved
+
+    Attributes:
+        R:                  float; reflux ratio
+        xB:                 float; light fraction in the bottoms
+        xF:                 float; light fraction in the feed
+        xD:                 float; light fraction in the distillate
+        murphree:           float; Murphree efficiency of each stage, or of each rectifying stage
+        stripping_murphree: float or None; Murphree efficiency of each stripping stage; None to use murphree
+        stage_murphree:     tuple floats or None; Murphree efficiency of each stage from the top, see TowerSpecs
+    """
+    R: float
+    xB: float
+    xF: float
+    xD: float
+    murphree: float = 1
+    stripping_murphree: Optional[float] = None
+    stage_murphree: Optional[Tuple[float, ...]] = None
+
+    def get_tower_specifications(self):
+        return self.xB, self.xF, self.xD, self.murphree
+
+    def get_reflux_ratio(self):
+        return self.R
+
+    def get_operating_line_parameters(self):
+        return sm.get_operating_line_parameters(self.R, self.xB, self.xF, self.xD)
+
+    def get_section_efficiencies(self):
+        if self.stripping_murphree is None:
+            return self.murphree, self.murphree
+        return self.murphree, self.stripping_murphree
+
+    def get_stage_efficiencies(self):
+        return self.stage_murphree
+
+
+class VLETable(NamedTuple):
+    """Solved VLE data of a SystemSpec; the arrays are read-only so one table can be shared by any number of solves
+
+    Attributes:
+        temperature_bounds:     tuple ints; temperature range of the system, slightly beyond the pure boiling points
+        temperatures:           array floats; temperatures the data is solved at; np.flip(temperatures) matches x
+        x:                      array floats; liquid mole fractions, ordered from pure heavy to pure light
+        y:                      array floats; vapor mole fractions, ordered from pure heavy to pure light
+        stepping_x:             array floats; liquid mole fractions of the stepping branch, see get_stepping_branch
+        stepping_y:             array floats; vapor mole fractions of the stepping branch
+        azeotrope:              float or None; liquid mole fraction of the azeotrope, None if there is none
+        inverse:                InverseEquilibrium of the stepping branch
+    """
+    temperature_bounds: Tuple[int, int]
+    temperatures: np.ndarray
+    x: np.ndarray
+    y: np.ndarray
+    stepping_x: np.ndarray
+    stepping_y: np.ndarray
+    azeotrope: Optional[float]
+    inverse: InverseEquilibrium.InverseEquilibrium
+
+
+def make_system_spec(light_chemical, heavy_chemical, light_coefficients, heavy_coefficients,
+                     pressure=vm.STANDARD_PRESSURE, interpolation_tolerance=None, activity_model=am.IDEAL,
+                     interaction_parameters=None):
+    """Builds the SystemSpec of a pair, swapping the chemicals if the "light" one actually boils later
+
+    Args:
+        light_chemical:         Chemical expected to boil first
+        heavy_chemical:         The other chemical
+        light_coefficients:     Antoine coefficients of light_chemical
+        heavy_coefficients:     Antoine coefficients of heavy_chemical
+        pressure:               Operating pressure, in mmHg
+        interpolation_tolerance: See SystemSpec
+        activity_model:         Key of activity_models.ACTIVITY_MODELS requested
+        interaction_parameters: Dictionary from activity_models.read_interaction_parameters; required unless ideal
+
+    Returns:
+        system:                 SystemSpec; ideal if the pair has no parameters for the requested model
+    """
+    light_coefficients = tuple(float(value) for value in light_coefficients)
+    heavy_coefficients = tuple(float(value) for value in heavy_coefficients)
+    if vm.get_boiling_point(heavy_coefficients, pressure) < vm.get_boiling_point(light_coefficients, pressure):
+        light_chemical, heavy_chemical = heavy_chemical, light_chemical
+        light_coefficients, heavy_coefficients = heavy_coefficients, light_coefficients
+
+    parameters = None
+    if interaction_parameters is not None:
+        parameters = am.get_pair_parameters(activity_model, interaction_parameters, light_chemical, heavy_chemical)
+    if parameters is None:
+        activity_model = am.IDEAL
+    else:
+        parameters = tuple(float(value) for value in parameters)
+
+    return SystemSpec(light_chemical, heavy_chemical, light_coefficients, heavy_coefficients, float(pressure),
+                      interpolation_tolerance, activity_model, parameters)
+
+
+def freeze_tower_specs(tower_specs):
+    """Converts a TowerSpecs object into a hashable TowerSpec
+
+    Args:
+        tower_specs:    TowerSpecs, or TowerSpec, which is returned unchanged
+
+    Returns:
+        tower:          TowerSpec
+    """
+    if isinstance(tower_specs, TowerSpec):
+        return tower_specs
+    xB, xF, xD, murphree = tower_specs.get_tower_specifications()
+    rectifying, stripping = tower_specs.get_section_efficiencies()
+    stage_murphree = tower_specs.get_stage_efficiencies()
+    return TowerSpec(float(tower_specs.get_reflux_ratio()), float(xB), float(xF), float(xD), float(murphree),
+                     None if stripping == rectifying else float(stripping),
+                     None if stage_murphree is None else tuple(float(value) for value in stage_murphree))
+
+
+def get_temperature_bounds(system):
+    """Finds the temperature range of the system: the pure boiling points, extended by 2 K on either side
+
+    Args:
+        system:     SystemSpec
+
+    Returns:
+        bounds:     tuple ints; lower and upper temperature, in Kelvin
+    """
+    return (math.floor(vm.get_boiling_point(system.light_coefficients, system.pressure)) - 2,
+            math.ceil(vm.get_boiling_point(system.heavy_coefficients, system.pressure)) + 2)
+
+
+def get_temperature_grid(system, bounds=None):
+    """Determines the temperatures ideal VLE data is solved at
+
+    Uses a fixed 1 K step within the temperature bounds, unless an interpolation tolerance is set, in which case the
+    grid is refined only where the VLE curves bend sharply
+
+    Args:
+        system:     SystemSpec
+        bounds:     Temperature bounds; found by get_temperature_bounds if None
+
+    Returns:
+        temperatures:   array of floats; ascending temperatures
+    """
+    if bounds is None:
+        bounds = get_temperature_bounds(system)
+    if system.interpolation_tolerance is None:
+        return np.arange(bounds[0], bounds[1])
+    return vm.get_adaptive_temperatures(system.light_coefficients, system.heavy_coefficients, list(bounds),
+                                        system.interpolation_tolerance, system.pressure)
+
+
+def get_vapor_liquid_equilibrium_data(system, temperatures):
+    """Solves the ideal liquid and vapor mole fractions at every temperature in one pass
+
+    Args:
+        system:         SystemSpec
+        temperatures:   Ascending temperature grid
+
+    Returns:
+        x:  array of floats; liquid mole fractions, ordered from pure heavy to pure light
+        y:  array of floats; vapor mole fractions, ordered from pure heavy to pure light
+    """
+    x, y = vm.get_vapor_liquid_equilibrium_data(system.light_coefficients, system.heavy_coefficients, temperatures,
+                                                system.pressure)
+    return [np.flip(x), np.flip(y)]
+
+
+def get_non_ideal_vapor_liquid_equilibrium_data(system, points=COMPOSITION_POINTS):
+    """Solves the VLE data of a non-ideal system on a composition grid, all bubble points in one vectorized call
+
+    Across an azeotrope x(T) is not single-valued, so the grid is laid out in x rather than T; the interpolation
+    tolerance does not apply.
+
+    Args:
+        system:     SystemSpec
+        points:     Size of the composition grid
+
+    Returns:
+        temperatures:   array of floats; bubble-point temperatures, ordered from pure light to pure heavy
+        x:              array of floats; liquid mole fractions, ordered from pure heavy to pure light
+        y:              array of floats; vapor mole fractions, ordered from pure heavy to pure light
+    """
+    x = vm.get_composition_grid(points)
+    T, y = vm.get_bubble_point_data(system.light_coefficients, system.heavy_coefficients, x, system.pressure,
+                                    system.activity_model, system.activity_parameters)
+    return np.flip(T), x, y
+
+
+def solve_vle(system, bounds=None):
+    """Solves the VLE table of a system, including its stepping branch and the branch's inverse lookup
+
+    Args:
+        system:     SystemSpec
+        bounds:     Temperature bounds of the system, from get_temperature_bounds; found if None
+
+    Returns:
+        table:      VLETable
+    """
+    with im.span("VLE build"):
+        if bounds is None:
+            bounds = get_temperature_bounds(system)
+        if system.activity_parameters is None:
+            temperatures = get_temperature_grid(system, bounds)
+            x, y = get_vapor_liquid_equilibrium_data(system, temperatures)
+        else:
+            temperatures, x, y = get_non_ideal_vapor_liquid_equilibrium_data(system)
+
+        stepping_x, stepping_y = sm.get_stepping_branch(x, y)
+        azeotrope = sm.get_azeotrope(x, y)
+        arrays = [np.array(values, dtype=float) for values in (temperatures, x, y, stepping_x, stepping_y)]
+        inverse = InverseEquilibrium.InverseEquilibrium(arrays[4], arrays[3])
+
+    return set_read_only(VLETable(bounds, *arrays, None if np.isnan(azeotrope) else float(azeotrope), inverse))
+
+
+def set_read_only(table):
+    """Marks the arrays of a VLETable read-only; needed again after unpickling, which restores them writable
+
+    Args:
+        table:  VLETable
+
+    Returns:
+        table:  The same VLETable
+    """
+    for values in table[1:6]:
+        values.setflags(write=False)
+    return table
+
+
+def get_temperature_from_x(system, xDesired):
+    """Determines the bubble-point temperature(s) that fulfill the relationship x(T) = xDesired
+
+    Args:
+        system:     SystemSpec
+        xDesired:   float or array of floats; liquid mole fraction(s) of the light chemical
+
+    Returns:
+        T:          float or array of floats; bubble-point temperature(s), in Kelvin
+    """
+    return vm.get_bubble_point_temperatures(system.light_coefficients, system.heavy_coefficients, xDesired,
+                                            system.pressure, activity_model=system.activity_model,
+                                            activity_parameters=system.activity_parameters)
+
+
+def get_effective_vapor_liquid_equilibrium_data(table, tower):
+    """Solves the effective (Murphree) equilibrium curve of the section efficiencies in one vectorized pass
+
+    Args:
+        table:      VLETable
+        tower:      TowerSpec or TowerSpecs
+
+    Returns:
+        effY:       array of floats; effective vapor mole fractions corresponding to table.x
+    """
+    _, xF, _, _ = tower.get_tower_specifications()
+    m, b = tower.get_operating_line_parameters()
+    with im.span("effective VLE"):
+        return sm.get_effective_curve(table.x, table.y, m, b, xF, tower.get_section_efficiencies())
+
+
+def get_minimum_reflux(table, tower):
+    """Finds the minimum reflux ratio of a tower from the pinch on the stepping branch
+
+    Args:
+        table:      VLETable
+        tower:      TowerSpec or TowerSpecs
+
+    Returns:
+        Rmin:       float; minimum reflux ratio, inf if no reflux ratio can achieve the separation
+    """
+    xB, xF, xD, _ = tower.get_tower_specifications()
+    return float(sm.get_minimum_reflux(table.stepping_x, table.stepping_y, xB, xF, xD)[0])
+
+
+def step_McCabe_Thiele(table, tower, effY=None, max_steps=sm.DEFAULT_MAX_PERMITTED_STEPS, minimum_reflux=None,
+                       system=None):
+    """Steps the McCabe Thiele construction of one tower, returning the steps instead of storing them
+
+    Iteratively moves from the OP line, horizontally to the equilibrium line, then vertically back to the OP line,
+    from (xD, xD) until the threshold (xB, xB) is passed.  The effective curve replaces the equilibrium line on every
+    step except the final one; a stage with its own efficiency in the tower's per-stage profile steps to that
+    efficiency's effective curve, inverted by stage_methods.invert_stage_effective_curve.  A reflux ratio at or below
+    the minimum reflux is rejected before stepping, and stepping stops as soon as a step makes no progress.
+
+    Args:
+        table:          VLETable
+        tower:          TowerSpec or TowerSpecs
+        effY:           Effective VLE of the section efficiencies, used if they are not both 1
+        max_steps:      Stage limit
+        minimum_reflux: Minimum reflux ratio of the tower; found by get_minimum_reflux if None
+        system:         SystemSpec, only used to describe a failure to the instrumentation
+
+    Returns:
+        steps_required: int or "N/A"; stages required
+        feed_step:      int; optimal feed stage
+        status:         stage_methods.COMPLETE, INFEASIBLE or STEP_LIMIT
+        step_x:         list of floats; x-coordinates of the McCabe Thiele polyline
+        step_y:         list of floats; y-coordinates of the McCabe Thiele polyline
+    """
+    xB, xF, xD, _ = tower.get_tower_specifications()
+    m, b = tower.get_operating_line_parameters()
+    if minimum_reflux is None:
+        minimum_reflux = get_minimum_reflux(table, tower)
+    feasible = tower.get_reflux_ratio() > minimum_reflux
+
+    inverse = table.inverse
+    effective_inverse = None
+    if effY is not None:
+        feed_index = int(sm.get_feed_indices(table.x, xF))
+        effective_x, effective_y = sm.get_stepping_branch(table.x, effY, np.nan if table.azeotrope is None else
+                                                          table.azeotrope, feed_index)
+        effective_inverse = InverseEquilibrium.SectionedInverseEquilibrium(effective_y, effective_x, feed_index)
+
+    stage_efficiencies = tower.get_stage_efficiencies() or ()
+    if stage_efficiencies:
+        branch_x = table.stepping_x
+        branch_yOP = np.where(xF < branch_x, m[0] * branch_x + b[0], m[1] * branch_x + b[1])
+        stage_curve = [branch_x.tolist(), branch_yOP.tolist(), (table.stepping_y - branch_yOP).tolist()]
+
+    feed_step = 1
+    found_feed_step = False
+    currX = xD
+    currY = xD
+    steps = 0
+    step_x = [currX]
+    step_y = [currY]
+
+    while feasible and (xB < currX) and (steps < max_steps):
+        steps += 1
+        xEq = inverse(currY)
+
+        # Checks if we're going to the effective equilibrium instead (every step except final)
+        if (xB < xEq) and (steps <= len(stage_efficiencies)):
+            if stage_efficiencies[steps - 1] != 1:
+                xEq = sm.invert_stage_effective_curve(currY, *stage_curve, stage_efficiencies[steps - 1])
+        elif (xB < xEq) and (effective_inverse is not None):
+            xEq = effective_inverse(currY)
+
+        # Inside the stepping bounds the step returns to the operating line, else the diagonal suffices
+        if xB < xEq:
+            if xEq < xF:
+                yOP = m[1] * xEq + b[1]
+                if not found_feed_step:
+                    feed_step = steps
+                    found_feed_step = True
+            else:
+                yOP = m[0] * xEq + b[0]
+        else:
+            yOP = xEq
+
+        step_x += [xEq, xEq]
+        step_y += [currY, yOP]
+
+        # A step that makes no progress would repeat until the limit
+        if xB < xEq and currX <= xEq:
+            steps = max_steps
+        currX = xEq
+        currY = yOP
+
+    im.count("stepping iterations", len(step_x) // 2)
+    if not feasible:
+        return "N/A", feed_step, sm.INFEASIBLE, step_x, step_y
+    if steps >= max_steps:
+        im.record_failure("step_McCabe_Thiele", {"chemicals": None if system is None else list(system[:2]),
+                                                 "reflux_ratio": tower.get_reflux_ratio(),
+                                                 "specifications": [xB, xF, xD], "x": currX})
+        return "N/A", feed_step, sm.STEP_LIMIT, step_x, step_y
+    return steps, feed_step, sm.COMPLETE, step_x, step_y
+
+
+def solve_stages(system, tower, table=None, max_steps=sm.DEFAULT_MAX_PERMITTED_STEPS, effective_y=None):
+    """Solves the McCabe Thiele steps of one tower, with the temperature of every stage
+
+    Args:
+        system:     SystemSpec
+        tower:      TowerSpec or TowerSpecs
+        table:      VLETable of the system; solved if None
+        max_steps:  Stage limit
+        effective_y: Read-only effective VLE of the tower's section efficiencies, if already solved; solved if None and
+                    the efficiencies are not both 1
+
+    Returns:
+        stage_result:   StageResult holding the step coordinates, stage counts, status, minimum reflux, effective VLE
+                        and the temperature of every stage
+    """
+    if table is None:
+        table = solve_vle(system)
+    minimum_reflux = get_minimum_reflux(table, tower)
+    effY = effective_y
+    if effY is None and tower.get_section_efficiencies() != (1, 1):
+        effY = get_effective_vapor_liquid_equilibrium_data(table, tower)
+        effY.setflags(write=False)
+
+    with im.span("stepping"):
+        steps, feed_step, status, step_x, step_y = step_McCabe_Thiele(table, tower, effY, max_steps, minimum_reflux,
+                                                                      system)
+    stage_result = StageResult.StageResult(steps, feed_step, step_x, step_y, effY, status=status,
+                                           minimum_reflux=minimum_reflux)
+    stage_result.stage_temperatures = get_temperature_from_x(system, stage_result.get_stage_compositions())
+    return stage_result
+
+
+def solve_stage_counts(system, towers, table=None, max_steps=sm.DEFAULT_MAX_PERMITTED_STEPS, profiles=False):
+    """Solves the stage counts of many towers of one system together, stepping them in lockstep
+
+    Args:
+        system:     SystemSpec
+        towers:     List of TowerSpec or TowerSpecs objects
+        table:      VLETable of the system; solved if None
+        max_steps:  Stage limit of each tower
+        profiles:   Whether the bubble-point temperature of every stage is solved too
+
+    Returns:
+        counts:     Dictionary of arrays "R", "xB", "xF", "xD", "murphree", "steps_required", "feed_steps",
+                    "minimum_reflux" and "status", one entry per tower, where steps_required equals max_steps unless the
+                    status is stage_methods.COMPLETE; with profiles also "temperatures", one row per tower and one
+                    column per stage from the top, valid up to each tower's steps_required
+    """
+    if table is None:
+        table = solve_vle(system)
+    R, xB, xF, xD, murphree = sm.get_specification_arrays(towers)
+    stripping_murphree, stage_murphree = sm.get_efficiency_arrays(towers)
+    minimum_reflux = sm.get_minimum_reflux(table.stepping_x, table.stepping_y, xB, xF, xD)
+    steps, feed_steps, compositions = sm.find_stage_counts(table.stepping_x, table.stepping_y, R, xB, xF, xD, murphree,
+                                                           max_steps, return_compositions=True,
+                                                           minimum_reflux=minimum_reflux,
+                                                           stripping_murphree=stripping_murphree,
+                                                           stage_murphree=stage_murphree)
+    counts = {"R": R, "xB": xB, "xF": xF, "xD": xD, "murphree": murphree, "steps_required": steps,
+              "feed_steps": feed_steps, "minimum_reflux": minimum_reflux,
+              "status": sm.get_stage_status(steps, R, minimum_reflux, max_steps)}
+    if profiles:
+        # Every stage of every tower is solved in one vectorized call
+        counts["temperatures"] = get_temperature_from_x(system, compositions)
+    return counts
+
+
+def get_pressure_sweep(system, pressures, tower=None, max_steps=sm.DEFAULT_MAX_PERMITTED_STEPS):
+    """Solves the VLE curves, and optionally the stage counts, at every pressure in one broadcast computation
+
+    Each curve is sampled at vle_methods.get_pressure_sweep_data's default resolution; the stage counts of all
+    pressures are stepped together by stage_methods.find_stage_counts, one equilibrium curve per pressure
+
+    Args:
+        system:     SystemSpec; its own pressure is not used
+        pressures:  array of floats; pressures, in mmHg
+        tower:      TowerSpec or TowerSpecs; if given, the stage counts at each pressure are solved too
+        max_steps:  Stage limit
+
+    Returns:
+        sweep:  Dictionary of "pressures" and 2D arrays "temperatures", "x" and "y", one row per pressure; with tower
+                also "steps_required", "feed_steps" and "minimum_reflux", where steps_required equals max_steps if
+                the distillation could not be completed
+    """
+    pressures = np.ravel(np.asarray(pressures, dtype=float))
+    T, x, y = vm.get_pressure_sweep_data(system.light_coefficients, system.heavy_coefficients, pressures,
+                                         activity_model=system.activity_model,
+                                         activity_parameters=system.activity_parameters)
+    sweep = {"pressures": pressures, "temperatures": T, "x": x, "y": y}
+
+    if tower is not None:
+        xB, xF, xD, murphree = tower.get_tower_specifications()
+        step_x, step_y = sm.get_stepping_branch(x, y)
+        minimum_reflux = sm.get_minimum_reflux(step_x, step_y, xB, xF, xD)
+        stripping_murphree, stage_murphree = sm.get_efficiency_arrays([tower])
+        steps, feed_steps = sm.find_stage_counts(step_x, step_y, tower.get_reflux_ratio(), xB, xF, xD, murphree,
+                                                 max_steps, minimum_reflux=minimum_reflux,
+                                                 stripping_murphree=stripping_murphree, stage_murphree=stage_murphree)
+        sweep["steps_required"] = steps
+        sweep["feed_steps"] = feed_steps
+        sweep["minimum_reflux"] = minimum_reflux
+    return sweep
+
+
+def get_Txy_diagram_data(table):
+    """Collects the lines of the Txy diagram
+
+    Args:
+        table:  VLETable
+
+    Returns:
+        lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates]
+        axis:   Axis limits of the diagram
+    """
+    T = np.flip(table.temperatures)
+    lines = {"Liquid": [T, table.x], "Vapor": [T, table.y]}
+    # An azeotrope can boil outside the pure boiling points
+    return lines, [min(table.temperature_bounds[0], math.floor(T.min())),
+                   max(table.temperature_bounds[1], math.ceil(T.max())), 0, 1]
+
+
+def get_vapor_liquid_equilibrium_diagram_data(table):
+    """Collects the lines of the VLE diagram
+
+    Args:
+        table:  VLETable
+
+    Returns:
+        lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates]
+        axis:   Axis limits of the diagram
+    """
+    return {"Eq. Curve": [table.x, table.y]}, [0, 1, 0, 1]
+
+
+def get_reflux_distillation_diagram_data(table, tower, stage_result):
+    """Collects the lines of the binary-distillation diagram, including the McCabe Thiele steps as one polyline
+
+    Args:
+        table:          VLETable
+        tower:          TowerSpec or TowerSpecs
+        stage_result:   StageResult of the tower
+
+    Returns:
+        lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates]
+        axis:   Axis limits of the diagram
+    """
+    m, b = tower.get_operating_line_parameters()
+    xB, xF, xD, _ = tower.get_tower_specifications()
+    lines = {"OP": [[xB, xF, xD], [xB, m[0] * xF + b[0], xD]], "Eq. Curve": [table.x, table.y]}
+    if stage_result.effective_y is not None:
+        lines["Effective Eq."] = [table.x, stage_result.effective_y]
+    lines["McCabe Thiele"] = stage_result.get_step_coordinates()
+    return lines, [0, 1, 0, 1]
+
+
+def get_pressure_sweep_diagram_data(system, graph_type, tower, pressures, max_steps=sm.DEFAULT_MAX_PERMITTED_STEPS):
+    """Collects the curves of a pressure sweep, to be overlaid on a diagram of the same type
+
+    Each pressure has its own color.  On the Txy diagram only the liquid curves are named in the legend; on the
+    binary-distillation diagram the legend also gives the stages required at each pressure.
+
+    Args:
+        system:         SystemSpec
+        graph_type:     "Txy", "VLE", or "Distillation"
+        tower:          TowerSpec or TowerSpecs; only used by "Distillation"
+        pressures:      array of floats; pressures, in mmHg
+        max_steps:      Stage limit
+
+    Returns:
+        lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates, pyplot format string]
+        axis:   Axis limits covering the overlay
+    """
+    sweep = get_pressure_sweep(system, pressures, tower if graph_type == "Distillation" else None, max_steps)
+    lines = {}
+    for index, P in enumerate(sweep["pressures"]):
+        color = "C" + str((index + 1) % 10)
+        label = "%g mmHg" % P
+        if graph_type == "Txy":
+            lines["Liquid, " + label] = [sweep["temperatures"][index], sweep["x"][index], "-" + color]
+            lines["_Vapor, " + label] = [sweep["temperatures"][index], sweep["y"][index], "--" + color]
+            continue
+        if graph_type == "Distillation":
+            steps = sweep["steps_required"][index]
+            if steps < max_steps:
+                label += ": " + str(steps) + " stages"
+            elif tower.get_reflux_ratio() <= sweep["minimum_reflux"][index]:
+                label += ": R < Rmin = %.3g" % sweep["minimum_reflux"][index]
+            else:
+                label += ": N/A stages"
+        lines["Eq. Curve, " + label] = [sweep["x"][index], sweep["y"][index], ":" + color]
+
+    if graph_type != "Txy":
+        return lines, [0, 1, 0, 1]
+    T = sweep["temperatures"]
+    return lines, [math.floor(T.min()), math.ceil(T.max()), 0, 1]
+
+
+def get_diagram_data(system, graph_type, tower=None, sweep_pressures=None, max_steps=sm.DEFAULT_MAX_PERMITTED_STEPS,
+                     table=None, stage_result=None):
+    """Collects the lines and axis limits of any diagram type, optionally overlaid with a pressure sweep
+
+    Args:
+        system:             SystemSpec
+        graph_type:         "Txy", "VLE", or "Distillation"
+        tower:              TowerSpec or TowerSpecs; only used by "Distillation"
+        sweep_pressures:    Pressures whose curves are overlaid, in mmHg; None or empty for no overlay
+        max_steps:          Stage limit
+        table:              VLETable of the system; solved if None
+        stage_result:       StageResult of the tower, for "Distillation"; solved if None
+
+    Returns:
+        lines:  Dictionary; key: line label; value: [x-coordinates, y-coordinates] or, for the overlay,
+                [x-coordinates, y-coordinates, pyplot format string]
+        axis:   Axis limits of the diagram
+    """
+    if table is None:
+        table = solve_vle(system)
+    if graph_type == "Txy":
+        lines, axis = get_Txy_diagram_data(table)
+    elif graph_type == "VLE":
+        lines, axis = get_vapor_liquid_equilibrium_diagram_data(table)
+    else:
+        if stage_result is None:
+            stage_result = solve_stages(system, tower, table, max_steps)
+        lines, axis = get_reflux_distillation_diagram_data(table, tower, stage_result)
+
+    if sweep_pressures is not None and len(sweep_pressures):
+        return overlay_diagram_data((lines, axis), get_pressure_sweep_diagram_data(system, graph_type, tower,
+                                                                                   sweep_pressures, max_steps))
+    return lines, axis
+
+
+def overlay_diagram_data(diagram_data, overlay_data):
+    """Combines the lines of a diagram with those of an overlay, widening the temperature axis to cover both
+
+    Args:
+        diagram_data:   Lines and axis limits of the diagram
+        overlay_data:   Lines and axis limits of the overlay, e.g. from get_pressure_sweep_diagram_data
+
+    Returns:
+        lines:  New dictionary of the diagram's lines followed by the overlay's
+        axis:   Axis limits covering both
+    """
+    (lines, axis), (overlay_lines, overlay_axis) = diagram_data, overlay_data
+    return {**lines, **overlay_lines}, [min(axis[0], overlay_axis[0]), max(axis[1], overlay_axis[1]), axis[2], axis[3]]
@@ -0,0 +1,183 @@
+"""Renders Txy, VLE and binary-distillation diagrams of many pairs and tower specifications to image files, headlessly
+
+Figures are drawn with Matplotlib's Agg renderer in a pool of worker processes; Qt is never imported.  Each worker keeps
+a single Figure and clears it between diagrams, and solves each pair's VLE once for all of its diagrams.  The Txy and
+VLE diagrams do not depend on the tower, so they are rendered once per pair; a distillation diagram is rendered per
+pair and --spec.  Files are named LIGHT_HEAVY_TYPE[_specN].FORMAT.
+
+Usage:
+    python export_figures.py PAIR [PAIR ...] [--spec R xB xF xD [murphree]] ... [--types Txy VLE Distillation]
+                             [--formats png svg pdf] [--output DIR] [--pressure P] [--activity-model MODEL]
+                             [--data FILE] [--processes N] [--dpi N]
+
+    where each PAIR is written "light/heavy", e.g. ethanol/n-nonane
+"""
+import argparse
+import multiprocessing
+import os
+import re
+import sys
+import time
+
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+import activity_models as am
+import BinarySystem as BS
+import DiskCache
+import distillation_core as dc
+import TowerSpecifications as TS
+import vle_methods as vm
+
+GRAPH_TYPES = ["Txy", "VLE", "Distillation"]
+FIGURE_SIZE = (5, 4)
+
+_figure = None
+_settings = None
+
+
+def initialize_worker(settings):
+    """Creates the Figure reused by every diagram of this worker, and the persistent result cache
+
+    Args:
+        settings:   Dictionary of "output", "formats", "dpi", "pressure", "activity_model" and "data_file"
+    """
+    global _figure, _settings
+    _settings = settings
+    _figure = Figure(figsize=FIGURE_SIZE, dpi=settings["dpi"])
+    FigureCanvasAgg(_figure)
+    BS.BinarySystem.set_disk_cache(DiskCache.get_default_cache(dc.SOLVER_VERSION))
+
+
+def export_pair(task):
+    """Renders every requested diagram of one pair in the current worker
+
+    Args:
+        task:       (pair, tower specifications, graph types); pair is (light, heavy), each tower specification is
+                    (R, xB, xF, xD, murphree)
+
+    Returns:
+        files:      List of the files written
+    """
+    pair, specifications, graph_types = task
+    try:
+        binary_system = BS.BinarySystem(pair[0], pair[1], data_file=_settings["data_file"],
+                                        pressure=_settings["pressure"], activity_model=_settings["activity_model"])
+    except KeyError as inst:
+        print("KeyError: " + "/".join(pair) + " - unknown chemical or activity model", inst.args[0], file=sys.stderr)
+        return []
+
+    files = []
+    for graph_type in graph_types:
+        if graph_type == "Distillation":
+            for index, specification in enumerate(specifications, 1):
+                tower_specs = TS.TowerSpecs(*specification)
+                files += render(binary_system, graph_type, tower_specs, "_spec%d" % index)
+        else:
+            files += render(binary_system, graph_type)
+    return files
+
+
+def render(binary_system, graph_type, tower_specs=None, suffix=""):
+    """Draws one diagram onto the worker's Figure and saves it in every requested format
+
+    Args:
+        binary_system:  BinarySystem of the pair
+        graph_type:     "Txy", "VLE", or "Distillation"
+        tower_specs:    TowerSpecs object; only used by "Distillation"
+        suffix:         Appended to the file name, before the extension
+
+    Returns:
+        files:          List of the files written
+    """
+    _figure.clf()
+    _figure.suptitle(graph_type, fontweight="bold")
+    ax = _figure.add_subplot(111)
+    if graph_type == "Txy":
+        binary_system.plot_Txy_diagram(ax)
+    elif graph_type == "VLE":
+        binary_system.plot_vapor_liquid_equilibrium_diagram(ax)
+    else:
+        binary_system.plot_reflux_distillation_diagram(tower_specs, ax)
+
+    light, heavy = binary_system.get_current_chemicals()
+    name = "_".join(get_file_name(part) for part in (light, heavy, graph_type)) + suffix
+    files = []
+    for file_format in _settings["formats"]:
+        file = os.path.join(_settings["output"], name + "." + file_format)
+        _figure.savefig(file, format=file_format)
+        files.append(file)
+    return files
+
+
+def get_file_name(text):
+    """Replaces every character that is not safe in a file name with "-" """
+    return re.sub(r"[^\w.-]+", "-", text).strip("-")
+
+
+def export_figures(pairs, specifications, graph_types=GRAPH_TYPES, formats=("png",), output=".", processes=None,
+                   dpi=100, pressure=vm.STANDARD_PRESSURE, activity_model=am.IDEAL, data_file="antoineData.csv"):
+    """Renders the diagrams of every pair over a process pool, one pair per task
+
+    Args:
+        pairs:          List of (light, heavy)
+        specifications: List of (R, xB, xF, xD, murphree); every pair gets a distillation diagram for each
+        graph_types:    Diagram types rendered; any of GRAPH_TYPES
+        formats:        File formats written, e.g. "png", "svg" and "pdf"
+        output:         Directory the files are written to; created if needed
+        processes:      Worker process count; defaults to the CPU count
+        dpi:            Resolution of raster formats
+        pressure:       Operating pressure of every pair, in mmHg
+        activity_model: Key of activity_models.ACTIVITY_MODELS used for every pair
+        data_file:      Antoine coefficient CSV
+
+    Returns:
+        count:          Number of figures rendered; each is written once per format
+        elapsed:        Wall-clock time taken, in seconds
+    """
+    os.makedirs(output, exist_ok=True)
+    settings = {"output": output, "formats": list(formats), "dpi": dpi, "pressure": pressure,
+                "activity_model": activity_model, "data_file": data_file}
+    tasks = [(tuple(pair), [tuple(specification) for specification in specifications], list(graph_types))
+             for pair in pairs]
+
+    start = time.perf_counter()
+    count = 0
+    with multiprocessing.Pool(processes, initialize_worker, (settings,)) as pool:
+        for files in pool.imap_unordered(export_pair, tasks):
+            count += len(files) // len(settings["formats"])
+    return count, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Renders diagrams of many pairs and tower specifications headlessly")
+    parser.add_argument("pairs", nargs="+", help='Chemical pairs, each written "light/heavy"')
+    parser.add_argument("--spec", type=float, nargs="+", action="append", default=[], metavar="VALUE",
+                        help="Tower specification R xB xF xD [murphree]; repeat for several")
+    parser.add_argument("--types", nargs="+", choices=GRAPH_TYPES, default=GRAPH_TYPES)
+    parser.add_argument("--formats", nargs="+", choices=["png", "svg", "pdf"], default=["png"])
+    parser.add_argument("--output", default="figures")
+    parser.add_argument("--pressure", type=float, default=vm.STANDARD_PRESSURE, help="Operating pressure, in mmHg")
+    parser.add_argument("--activity-model", choices=list(am.ACTIVITY_MODELS), default=am.IDEAL)
+    parser.add_argument("--data", default="antoineData.csv")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--dpi", type=int, default=100)
+    args = parser.parse_args()
+
+    for specification in args.spec:
+        if len(specification) not in (4, 5):
+            parser.error("--spec takes R xB xF xD and optionally murphree")
+    if "Distillation" in args.types and not args.spec:
+        parser.error("Distillation diagrams need at least one --spec")
+    pairs = [pair.split("/") for pair in args.pairs]
+    if any(len(pair) != 2 for pair in pairs):
+        parser.error('pairs are written "light/heavy"')
+
+    count, elapsed = export_figures(pairs, args.spec, args.types, args.formats, args.output, args.processes, args.dpi,
+                                    args.pressure, args.activity_model, args.data)
+    print("Rendered %d figures (%d files) in %.2f s: %.1f figures/s; written to %s"
+          % (count, count * len(args.formats), elapsed, count / elapsed if elapsed else 0, args.output))
+
+
+if __name__ == "__main__":
+    main()
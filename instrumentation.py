@@ -0,0 +1,173 @@
+"""Opt-in instrumentation of the solver hot paths: timing spans, iteration counters and convergence failures
+
+Disabled by default, in which case span() returns a shared no-op context and count() / record_failure() return after a
+single flag check.  Enable it with enable(), or by setting the environment variable DISTILLATION_INSTRUMENTATION to
+"summary" (print a table on exit) or to a file name ending in ".json" (dump the report there on exit).
+"""
+import atexit
+import contextlib
+import json
+import os
+import threading
+import time
+
+ENVIRONMENT_VARIABLE = "DISTILLATION_INSTRUMENTATION"
+MAX_RECORDED_FAILURES = 1000
+
+enabled = False
+_lock = threading.Lock()
+_spans = {}
+_counters = {}
+_failures = []
+_failure_count = 0
+_NO_SPAN = contextlib.nullcontext()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def reset():
+    """Clears every recorded span, counter and failure"""
+    global _failure_count
+    with _lock:
+        _spans.clear()
+        _counters.clear()
+        _failures.clear()
+        _failure_count = 0
+
+
+def span(name):
+    """Times the enclosed block under "name"
+
+    Args:
+        name:   Stage being timed, e.g. "VLE build", "effective VLE", "stepping" or "render"
+
+    Returns:
+        context:    Context manager recording the elapsed time on exit; a no-op while disabled
+    """
+    if not enabled:
+        return _NO_SPAN
+    return _timed_span(name)
+
+
+@contextlib.contextmanager
+def _timed_span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        add_span(name, time.perf_counter() - start)
+
+
+def add_span(name, elapsed):
+    """Adds one timing to the totals of span "name"
+
+    Args:
+        name:       Stage that was timed
+        elapsed:    Duration, in seconds
+    """
+    with _lock:
+        totals = _spans.get(name)
+        if totals is None:
+            _spans[name] = {"count": 1, "total": elapsed, "min": elapsed, "max": elapsed}
+        else:
+            totals["count"] += 1
+            totals["total"] += elapsed
+            totals["min"] = min(totals["min"], elapsed)
+            totals["max"] = max(totals["max"], elapsed)
+
+
+def count(name, amount=1):
+    """Adds to the counter "name", e.g. the iterations a solver loop used
+
+    Args:
+        name:       Counter to increase
+        amount:     Amount added
+    """
+    if not enabled:
+        return
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+
+def record_failure(name, detail):
+    """Records a solver that stopped at its iteration limit without converging
+
+    Only the first MAX_RECORDED_FAILURES are kept in full; all are counted
+
+    Args:
+        name:       Solver that failed
+        detail:     Dictionary describing the inputs and the final state
+    """
+    global _failure_count
+    if not enabled:
+        return
+    with _lock:
+        _failure_count += 1
+        if len(_failures) < MAX_RECORDED_FAILURES:
+            _failures.append({"name": name, "detail": detail})
+
+
+def get_report():
+    """Returns a snapshot of everything recorded
+
+    Returns:
+        report:     Dictionary of "spans" (count, total, mean, min and max seconds), "counters", "failure_count" and
+                    "failures"
+    """
+    with _lock:
+        spans = {name: dict(totals, mean=totals["total"] / totals["count"]) for name, totals in _spans.items()}
+        return {"spans": spans, "counters": dict(_counters), "failure_count": _failure_count,
+                "failures": list(_failures)}
+
+
+def dump_json(file_name):
+    """Writes get_report() to "file_name" as JSON"""
+    with open(file_name, "w") as file:
+        json.dump(get_report(), file, indent=2, default=float)
+
+
+def format_summary():
+    """Formats get_report() as a table
+
+    Returns:
+        summary:    String of the spans, counters and failure count
+    """
+    report = get_report()
+    lines = ["%-28s %8s %12s %12s %12s" % ("span", "count", "total ms", "mean ms", "max ms")]
+    for name, totals in sorted(report["spans"].items(), key=lambda item: -item[1]["total"]):
+        lines.append("%-28s %8d %12.3f %12.3f %12.3f" % (name, totals["count"], totals["total"] * 1e3,
+                                                          totals["mean"] * 1e3, totals["max"] * 1e3))
+    lines.append("")
+    lines.append("%-28s %8s" % ("counter", "value"))
+    for name, value in sorted(report["counters"].items()):
+        lines.append("%-28s %8d" % (name, value))
+    lines.append("")
+    lines.append("convergence failures: %d" % report["failure_count"])
+    return "\n".join(lines)
+
+
+def print_summary():
+    print(format_summary())
+
+
+def enable_from_environment():
+    """Enables instrumentation if DISTILLATION_INSTRUMENTATION is set, reporting at interpreter exit"""
+    setting = os.environ.get(ENVIRONMENT_VARIABLE)
+    if not setting:
+        return
+    enable()
+    if setting.endswith(".json"):
+        atexit.register(dump_json, setting)
+    else:
+        atexit.register(print_summary)
+
+
+enable_from_environment()
@@ -0,0 +1,202 @@
+"""Load-tests a running calculation service (see service.py) and reports its latency percentiles
+
+Sends a mix of /stages, /vle, /txy and /sweep requests over keep-alive connections, a fraction of them repeats of
+earlier requests so the response cache is exercised, and reports throughput with p50 / p99 latency overall and per
+endpoint.  With --start, a service is launched on a free port for the duration of the test, and --port is ignored.
+
+Usage:
+    python load_test.py [--host HOST] [--port PORT] [--start] [--requests N] [--concurrency N] [--repeat-fraction F]
+                        [--seed N]
+"""
+import argparse
+import asyncio
+import json
+import re
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+PAIRS = [("ethanol", "n-nonane", "Ideal"), ("n-hexane", "water", "Ideal"), ("n-pentane", "1-octanol", "Ideal"),
+         ("ethanol", "water", "NRTL"), ("methanol", "water", "Wilson")]
+# Share of each endpoint in the request mix
+MIX = {"/stages": 0.7, "/vle": 0.1, "/txy": 0.1, "/sweep": 0.1}
+
+
+def make_requests(count, repeat_fraction, seed=0):
+    """Generates the request mix, repeating earlier requests at the given rate
+
+    Args:
+        count:              Number of requests
+        repeat_fraction:    Fraction of requests that repeat an earlier one
+        seed:               Seed of the random generator
+
+    Returns:
+        requests:           List of (path, request dictionary)
+    """
+    rng = np.random.default_rng(seed)
+    paths = list(MIX)
+    requests = []
+    for _ in range(count):
+        if requests and rng.random() < repeat_fraction:
+            requests.append(requests[rng.integers(len(requests))])
+            continue
+        path = paths[rng.choice(len(paths), p=list(MIX.values()))]
+        light, heavy, activity_model = PAIRS[rng.integers(len(PAIRS))]
+        request = {"light": light, "heavy": heavy, "activity_model": activity_model}
+        if path == "/sweep":
+            request["pressures"] = np.round(np.geomspace(200, 3000, 20), 1).tolist()
+        if path == "/stages":
+            xB = rng.uniform(0.01, 0.2)
+            xF = rng.uniform(xB + 0.05, 0.6)
+            request.update({"R": round(rng.uniform(0.5, 6), 4), "xB": round(xB, 4), "xF": round(xF, 4),
+                            "xD": round(rng.uniform(xF + 0.05, 0.85), 4), "murphree": round(rng.uniform(0.5, 1), 3)})
+        requests.append((path, request))
+    return requests
+
+
+async def send(reader, writer, host, path, request):
+    """Sends one request on a keep-alive connection and reads the response
+
+    Returns:
+        status:     HTTP status code
+        body:       Decoded response
+    """
+    body = json.dumps(request).encode() if request is not None else b""
+    method = "GET" if request is None else "POST"
+    writer.write(("%s %s HTTP/1.1\r\nHost: %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n"
+                  % (method, path, host, len(body))).encode("latin-1") + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if not line.strip():
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def run_clients(host, port, requests, concurrency):
+    """Sends every request from "concurrency" clients, each on its own connection
+
+    Returns:
+        latencies:  dictionary; key: path; value: list of latencies, in seconds
+        errors:     Number of responses that were not 200
+        elapsed:    Wall-clock time taken, in seconds
+    """
+    queue = list(reversed(requests))
+    latencies = {path: [] for path in MIX}
+    errors = 0
+
+    async def client():
+        nonlocal errors
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            while queue:
+                path, request = queue.pop()
+                start = time.perf_counter()
+                status, _ = await send(reader, writer, host, path, request)
+                latencies[path].append(time.perf_counter() - start)
+                if status != 200:
+                    errors += 1
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def get_statistics(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        return (await send(reader, writer, host, "/statistics", None))[1]
+    finally:
+        writer.close()
+
+
+def report(latencies, errors, elapsed):
+    """Prints throughput and latency percentiles, overall and per endpoint"""
+    everything = [latency for values in latencies.values() for latency in values]
+    print("%d requests in %.2f s: %.0f requests/s, %d errors" % (len(everything), elapsed, len(everything) / elapsed,
+                                                                errors))
+    print("%-10s %8s %10s %10s %10s" % ("endpoint", "count", "p50 (ms)", "p99 (ms)", "max (ms)"))
+    for path, values in [("all", everything)] + list(latencies.items()):
+        if values:
+            p50, p99 = np.percentile(values, [50, 99]) * 1000
+            print("%-10s %8d %10.2f %10.2f %10.2f" % (path, len(values), p50, p99, max(values) * 1000))
+
+
+async def wait_for_service(host, port, timeout=60):
+    """Waits until a freshly launched service accepts connections"""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            await asyncio.sleep(0.1)
+
+
+def start_service(host, processes=None):
+    """Launches a service on a free port and waits until it listens
+
+    Args:
+        host:       Address the service listens on
+        processes:  Worker process count of the service; defaults to the CPU count
+
+    Returns:
+        service:    subprocess.Popen of the service
+        port:       Port the service chose
+    """
+    command = [sys.executable, "service.py", "--host", host, "--port", "0"]
+    if processes is not None:
+        command += ["--processes", str(processes)]
+    service = subprocess.Popen(command, stdout=subprocess.PIPE, text=True)
+    # The service announces the address it bound to once it accepts connections
+    for line in service.stdout:
+        match = re.match(r"Serving on http://.+:(\d+)", line)
+        if match:
+            return service, int(match.group(1))
+    service.wait()
+    raise RuntimeError("the service exited with code %d before listening" % service.returncode)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load-tests a calculation service and reports p50 / p99 latency")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8750, help="Port of a running service; ignored with --start")
+    parser.add_argument("--start", action="store_true", help="Launch a service for the duration of the test")
+    parser.add_argument("--processes", type=int, default=None, help="Worker processes of a launched service")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--repeat-fraction", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    service = None
+    if args.start:
+        service, args.port = start_service(args.host, args.processes)
+    try:
+        asyncio.run(wait_for_service(args.host, args.port))
+        requests = make_requests(args.requests, args.repeat_fraction, args.seed)
+        latencies, errors, elapsed = asyncio.run(run_clients(args.host, args.port, requests, args.concurrency))
+        report(latencies, errors, elapsed)
+        print("Service statistics:", json.dumps(asyncio.run(get_statistics(args.host, args.port))))
+    finally:
+        if service is not None:
+            service.terminate()
+            service.wait()
+            service.stdout.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,8 @@
 import sys
-from PyQt5.QtWidgets import QApplication
 
-import UI
 import BinarySystem as BS
+import DiskCache
+import distillation_core as dc
 import TowerSpecifications as TS
 
 # Initial System Conditions
@@ -13,16 +13,39 @@ xB = 0.1
 xF = 0.4
 xD = 0.95
 murphree = 0.95
-# Objects for generating plots
-tower_specs = TS.TowerSpecs(R, xB, xF, xD, murphree)
-binary_system = BS.BinarySystem(light_chemical, heavy_chemical)
+pressure = 760  # mmHg
+activity_model = "Ideal"  # "Ideal", "Wilson" or "NRTL"; see activity_models.py
+
+
+def create_window():
+    """Creates the application and its window, loading the GUI stack only now
+
+    The binary system is created without solving its VLE data; that is deferred until the first plot is requested,
+    after the window is already on screen.  VLE tables and stage solves of earlier sessions are then restored from the
+    persistent result cache instead of being solved again.
+
+    Returns:
+        app:        QApplication
+        window:     UI.Window
+    """
+    from PyQt5.QtWidgets import QApplication
+    import UI
+
+    app = QApplication(sys.argv)
+    BS.BinarySystem.set_disk_cache(DiskCache.get_default_cache(dc.SOLVER_VERSION))
+    # Objects for generating plots
+    tower_specs = TS.TowerSpecs(R, xB, xF, xD, murphree)
+    binary_system = BS.BinarySystem(light_chemical, heavy_chemical, pressure=pressure,
+                                    activity_model=activity_model)
+    window = UI.Window(binary_system, tower_specs)
+    return app, window
 
 
 def activate_UI():
     """Activates the UI"""
-    app = QApplication([])
-    UI.Window(binary_system, tower_specs)
+    app, window = create_window()
     sys.exit(app.exec_())
 
 
-activate_UI()
\ No newline at end of file
+if __name__ == "__main__":
+    activate_UI()
@@ -0,0 +1,199 @@
+"""Screens every chemical pair in a coefficient file against one tower specification
+
+Usage:
+    python screening.py R xB xF xD [murphree] [--data FILE] [--output FILE] [--processes N] [--chunk-size N]
+"""
+import argparse
+import csv
+import heapq
+import itertools
+import math
+import multiprocessing
+
+import numpy as np
+
+import FileRead as FR
+import stage_methods as sm
+import vle_methods as vm
+
+RESULT_FIELDS = ["light_chemical", "heavy_chemical", "stages", "feed_stage", "minimum_reflux", "status",
+                 "relative_volatility", "boiling_point_gap"]
+NO_EQUILIBRIUM = "no VLE data"
+
+_species = []
+_coefficients = None
+_tower_specification = None
+
+
+def initialize_worker(species, coefficients, tower_specification):
+    """Stores the data shared by every task once per worker process, rather than once per pair
+
+    Args:
+        species:                List of chemical names
+        coefficients:           2D array of Antoine coefficients, one row per chemical in "species"
+        tower_specification:    (R, xB, xF, xD, murphree) used for every pair
+    """
+    global _species, _coefficients, _tower_specification
+    _species = species
+    _coefficients = coefficients
+    _tower_specification = tower_specification
+
+
+def evaluate_pairs(pairs):
+    """Evaluates a chunk of chemical pairs in the current worker
+
+    Args:
+        pairs:      List of (i, j) indices into the worker's species list
+
+    Returns:
+        rows:       List of result rows, ordered as RESULT_FIELDS
+    """
+    return [evaluate_pair(_species, _coefficients, i, j, _tower_specification) for i, j in pairs]
+
+
+def evaluate_pair(species, coefficients, i, j, tower_specification, P=vm.STANDARD_PRESSURE):
+    """Solves the VLE and McCabe Thiele stage count of a single pair
+
+    The chemical with the lower boiling point is taken as the light chemical, and the temperature boundaries are
+    found the same way BinarySystem does
+
+    Args:
+        species:                List of chemical names
+        coefficients:           2D array of Antoine coefficients, one row per chemical in "species"
+        i, j:                   Indices of the two chemicals
+        tower_specification:    (R, xB, xF, xD, murphree)
+        P:                      System pressure, in mmHg
+
+    Returns:
+        row:        [light, heavy, stages, feed stage, minimum reflux, status, relative volatility, boiling point gap];
+                    stages and feed stage are "N/A" unless the status is stage_methods.COMPLETE, and the status is
+                    NO_EQUILIBRIUM if the VLE data could not be solved
+    """
+    boiling_points = [vm.get_boiling_point(coefficients[i], P), vm.get_boiling_point(coefficients[j], P)]
+    light, heavy = (i, j) if boiling_points[0] <= boiling_points[1] else (j, i)
+    light_boiling_point, heavy_boiling_point = sorted(boiling_points)
+
+    # Relative volatility as the geometric mean of Psat_light / Psat_heavy at both pure-component boiling points
+    volatility = [vm.get_Psat(coefficients[light], T) / vm.get_Psat(coefficients[heavy], T)
+                  for T in (light_boiling_point, heavy_boiling_point)]
+    relative_volatility = math.sqrt(volatility[0] * volatility[1])
+
+    temperatures = np.arange(math.floor(light_boiling_point) - 2, math.ceil(heavy_boiling_point) + 2)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        x, y = vm.get_vapor_liquid_equilibrium_data(coefficients[light], coefficients[heavy], temperatures, P)
+
+    if np.all(np.isfinite(x)) and len(x) > 1:
+        R, xB, xF, xD = tower_specification[:4]
+        minimum_reflux = sm.get_minimum_reflux(np.flip(x), np.flip(y), xB, xF, xD)
+        steps, feed_steps = sm.find_stage_counts(np.flip(x), np.flip(y), *tower_specification,
+                                                 minimum_reflux=minimum_reflux)
+        status = str(sm.get_stage_status(steps, R, minimum_reflux)[0])
+        complete = status == sm.COMPLETE
+        stages = int(steps[0]) if complete else "N/A"
+        feed_stage = int(feed_steps[0]) if complete else "N/A"
+        minimum_reflux = round(float(minimum_reflux[0]), 6) if np.isfinite(minimum_reflux[0]) else "inf"
+    else:
+        stages, feed_stage, minimum_reflux, status = "N/A", "N/A", "N/A", NO_EQUILIBRIUM
+
+    return [species[light], species[heavy], stages, feed_stage, minimum_reflux, status, round(relative_volatility, 6),
+            round(heavy_boiling_point - light_boiling_point, 3)]
+
+
+def chunk_pairs(count, chunk_size):
+    """Lazily yields every (i, j) pair with i < j in chunks, so the pair list is never held in memory
+
+    Args:
+        count:          Number of chemicals
+        chunk_size:     Pairs per chunk
+
+    Yields:
+        chunk:          List of up to "chunk_size" pairs
+    """
+    pairs = itertools.combinations(range(count), 2)
+    while True:
+        chunk = list(itertools.islice(pairs, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def screen_all_pairs(data_file, tower_specification, output_file, processes=None, chunk_size=256):
+    """Evaluates every chemical pair in "data_file" over a process pool, streaming results to "output_file"
+
+    Args:
+        data_file:              Antoine coefficient CSV, as read by FileRead
+        tower_specification:    (R, xB, xF, xD, murphree) used for every pair
+        output_file:            CSV file results are written to as each chunk finishes
+        processes:              Worker process count; defaults to the CPU count
+        chunk_size:             Pairs sent to a worker per task
+
+    Returns:
+        count:                  Number of pairs evaluated
+    """
+    data = FR.FileRead(data_file, ",", True).get_data()
+    species = list(data.keys())
+    coefficients = np.array([data[chemical] for chemical in species], dtype=float)
+
+    count = 0
+    with open(output_file, "w", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(RESULT_FIELDS)
+        with multiprocessing.Pool(processes, initialize_worker, (species, coefficients, tower_specification)) as pool:
+            for rows in pool.imap_unordered(evaluate_pairs, chunk_pairs(len(species), chunk_size)):
+                writer.writerows(rows)
+                file.flush()
+                count += len(rows)
+    return count
+
+
+def ranking_key(row):
+    """Sorts by fewest stages (incomplete distillations last), then highest relative volatility and boiling point gap
+
+    Args:
+        row:    Dictionary read from a screening results file
+
+    Returns:
+        key:    Tuple used for ordering
+    """
+    stages = float("inf") if row["stages"] == "N/A" else int(row["stages"])
+    return stages, -float(row["relative_volatility"]), -float(row["boiling_point_gap"])
+
+
+def rank_screening_results(results_file, count=20):
+    """Reads a screening results file back and returns the best pairs, holding only "count" rows at a time
+
+    Args:
+        results_file:   CSV file written by screen_all_pairs
+        count:          Number of pairs returned
+
+    Returns:
+        rows:           The best "count" rows, best first
+    """
+    with open(results_file, newline="") as file:
+        return heapq.nsmallest(count, csv.DictReader(file), key=ranking_key)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ranks every chemical pair for a given tower specification")
+    parser.add_argument("R", type=float)
+    parser.add_argument("xB", type=float)
+    parser.add_argument("xF", type=float)
+    parser.add_argument("xD", type=float)
+    parser.add_argument("murphree", type=float, nargs="?", default=1.0)
+    parser.add_argument("--data", default="antoineData.csv")
+    parser.add_argument("--output", default="screening_results.csv")
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=256)
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    tower_specification = (args.R, args.xB, args.xF, args.xD, args.murphree)
+    count = screen_all_pairs(args.data, tower_specification, args.output, args.processes, args.chunk_size)
+    print("Evaluated", count, "pairs; results written to", args.output)
+
+    for row in rank_screening_results(args.output, args.top):
+        print("\t".join(row[field] for field in RESULT_FIELDS))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,414 @@
+"""Local HTTP/JSON calculation service: VLE curves, Txy data, stage counts and pressure sweeps without the GUI
+
+Requests are JSON objects POSTed to /vle, /txy, /stages or /sweep; GET /statistics reports the service's counters.
+Every request names a pair with "light" and "heavy", optionally with "pressure" in mmHg (default 760) and
+"activity_model" ("Ideal", "Wilson" or "NRTL"; default "Ideal").  /stages takes the tower fields of batch.py ("R", "xB",
+"xF", "xD" and optionally "murphree", "murphree_stripping" and "murphree_stages") and optionally "max_steps", and
+returns the fields of a batch.py result with the temperature profile.  /sweep takes "pressures", a list in mmHg, and
+optionally the tower fields to add the stage count at each pressure.
+
+The asyncio front end only parses requests, answers repeats from an in-memory cache and shares the solve of identical
+requests in flight; every solve runs in a process pool.  /stages requests for one system that arrive within
+--batch-window milliseconds of each other are solved together by distillation_core.solve_stage_counts, in one task.
+Invalid requests, including out-of-range values such as "xB": 5 or "pressure": 0, are answered with status 400 and
+{"error": message}.
+
+Usage:
+    python service.py [--host HOST] [--port PORT] [--processes N] [--batch-window MS] [--data FILE]
+"""
+import argparse
+import asyncio
+import concurrent.futures
+import functools
+import json
+import multiprocessing
+import signal
+
+import numpy as np
+
+import activity_models as am
+import batch
+import distillation_core as dc
+import AntoineStore
+import VLECache
+import stage_methods as sm
+import vle_methods as vm
+
+ENDPOINTS = ["/vle", "/txy", "/stages", "/sweep"]
+MAX_BODY_BYTES = 1024 ** 2
+MAX_SWEEP_PRESSURES = 1000
+MAX_BATCH_SIZE = 512
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 413: "Payload Too Large",
+           500: "Internal Server Error"}
+
+
+@functools.lru_cache(maxsize=64)
+def get_table(system):
+    """Solves a system's VLE table once per worker process; SystemSpecs are hashable, so they key the cache directly"""
+    return dc.solve_vle(system)
+
+
+def solve_vle_request(system):
+    table = get_table(system)
+    return {"light": system.light_chemical, "heavy": system.heavy_chemical, "activity_model": system.activity_model,
+            "x": table.x.tolist(), "y": table.y.tolist(), "azeotrope": table.azeotrope}
+
+
+def solve_txy_request(system):
+    lines, axis = dc.get_Txy_diagram_data(get_table(system))
+    return {"light": system.light_chemical, "heavy": system.heavy_chemical, "activity_model": system.activity_model,
+            "temperatures": lines["Liquid"][0].tolist(), "x": lines["Liquid"][1].tolist(),
+            "y": lines["Vapor"][1].tolist(), "axis": axis}
+
+
+def solve_stage_batch(system, towers, max_steps):
+    """Solves a batch of /stages requests for one system in a single lockstep stage count
+
+    Args:
+        system:     SystemSpec
+        towers:     List of TowerSpec
+        max_steps:  Stage limit of every tower
+
+    Returns:
+        results:    List of response dictionaries, in the order of "towers"
+    """
+    counts = dc.solve_stage_counts(system, towers, get_table(system), max_steps, profiles=True)
+    results = []
+    for position, tower in enumerate(towers):
+        steps = int(counts["steps_required"][position])
+        complete = counts["status"][position] == sm.COMPLETE
+        results.append({"light": system.light_chemical, "heavy": system.heavy_chemical,
+                        "pressure": system.pressure, "activity_model": system.activity_model, **tower._asdict(),
+                        "stages": steps if complete else "N/A",
+                        "feed_stage": int(counts["feed_steps"][position]) if complete else "N/A",
+                        "minimum_reflux": to_json_number(counts["minimum_reflux"][position]),
+                        "status": str(counts["status"][position]),
+                        "temperature_profile": np.round(counts["temperatures"][position][:steps], 3).tolist()
+                        if complete else []})
+    return results
+
+
+def solve_sweep_request(system, pressures, tower, max_steps):
+    sweep = dc.get_pressure_sweep(system, pressures, tower, max_steps)
+    result = {"light": system.light_chemical, "heavy": system.heavy_chemical, "activity_model": system.activity_model}
+    for name, values in sweep.items():
+        result[name] = [to_json_number(value) for value in values] if name == "minimum_reflux" else values.tolist()
+    return result
+
+
+def to_json_number(value):
+    """Rounds a float for a response, writing infinity as "inf" as batch.py does"""
+    return round(float(value), 6) if np.isfinite(value) else "inf"
+
+
+class CalculationService:
+    """asyncio front end of the service: parses HTTP requests, caches responses and batches stage counts
+
+    Public-Intended Methods:
+        handle_connection(reader, writer):  Serves every request of one keep-alive connection
+        get_statistics():                   Returns request, cache and batching counters
+
+    Attributes:
+        executor:           ProcessPoolExecutor the solves run in
+        batch_window:       float; seconds a /stages batch stays open for further requests
+        data_source:        AntoineStore built from the Antoine coefficient CSV
+        response_cache:     VLECache of encoded responses, keyed by endpoint and canonical request JSON
+        in_flight:          dictionary; key: response cache key; value: future of the response being solved
+        pending:            dictionary; key: (SystemSpec, max_steps); value: open batch of (TowerSpec, future)
+        counters:           dictionary of request, error, batch and shared-solve counts
+    """
+
+    def __init__(self, executor, batch_window=0.002, data_file="antoineData.csv"):
+        self.executor = executor
+        self.batch_window = batch_window
+        self.data_source = AntoineStore.AntoineStore(data_file)
+        self._parameter_files = {}
+        self.response_cache = VLECache.VLECache(max_entries=4096)
+        self.in_flight = {}
+        self.pending = {}
+        self.counters = {"requests": 0, "errors": 0, "shared": 0, "batches": 0, "batched_requests": 0}
+
+    async def handle_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests from one connection until the client closes it or asks to
+
+        Args:
+            reader:     asyncio.StreamReader of the connection
+            writer:     asyncio.StreamWriter of the connection
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, path, version = request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if not line.strip():
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_BYTES:
+                    status, payload = 413, encode({"error": "request body is limited to %d bytes" % MAX_BODY_BYTES})
+                    headers["connection"] = "close"
+                else:
+                    body = await reader.readexactly(length)
+                    status, payload = await self.dispatch(method, path.split("?")[0], body)
+
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                writer.write(("HTTP/1.1 %d %s\r\nContent-Type: application/json\r\nContent-Length: %d\r\n"
+                              "Connection: %s\r\n\r\n" % (status, REASONS[status], len(payload),
+                                                          "keep-alive" if keep_alive else "close")).encode("latin-1"))
+                writer.write(payload)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Malformed or abandoned connection; nothing can be answered on it
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, body):
+        """Routes one request
+
+        Args:
+            method:     HTTP method
+            path:       Request path, without any query string
+            body:       Request body
+
+        Returns:
+            status:     HTTP status code
+            payload:    Encoded JSON response
+        """
+        self.counters["requests"] += 1
+        if path == "/statistics":
+            return 200, encode(self.get_statistics())
+        if path not in ENDPOINTS:
+            self.counters["errors"] += 1
+            return 404, encode({"error": "unknown endpoint " + path + "; use one of " + ", ".join(ENDPOINTS)})
+        if method != "POST":
+            self.counters["errors"] += 1
+            return 405, encode({"error": path + " takes a POST of a JSON object"})
+
+        try:
+            request = json.loads(body or b"{}")
+            if not isinstance(request, dict):
+                raise ValueError("the request must be a JSON object")
+            return 200, await self.respond(path, request)
+        except (KeyError, ValueError, TypeError) as inst:
+            self.counters["errors"] += 1
+            message = inst.args[0] if inst.args else ""
+            return 400, encode({"error": type(inst).__name__ + ": " + str(message)})
+        except Exception as inst:
+            # A solver failure should cost this request only, not the connection
+            self.counters["errors"] += 1
+            return 500, encode({"error": type(inst).__name__ + ": " + str(inst)})
+
+    async def respond(self, path, request):
+        """Answers a request from the response cache, from an identical request already being solved, or by solving it
+
+        Args:
+            path:       One of ENDPOINTS
+            request:    Decoded request
+
+        Returns:
+            payload:    Encoded JSON response
+        """
+        key = (path, json.dumps(request, sort_keys=True))
+        payload = self.response_cache.get(key)
+        if payload is not None:
+            return payload
+        if key in self.in_flight:
+            self.counters["shared"] += 1
+            return await asyncio.shield(self.in_flight[key])
+
+        future = asyncio.get_running_loop().create_future()
+        self.in_flight[key] = future
+        try:
+            payload = encode(await self.solve(path, request))
+            self.response_cache.put(key, payload)
+            future.set_result(payload)
+            return payload
+        except Exception as inst:
+            future.set_exception(inst)
+            # Marks the exception as retrieved when no identical request was waiting on it
+            future.exception()
+            raise
+        finally:
+            del self.in_flight[key]
+
+    async def solve(self, path, request):
+        """Validates a request in the front end, then solves it in the process pool
+
+        Args:
+            path:       One of ENDPOINTS
+            request:    Decoded request
+
+        Returns:
+            result:     Response dictionary
+        """
+        loop = asyncio.get_running_loop()
+        system = self.get_system(request)
+        max_steps = int(batch.get_number(request, "max_steps", sm.DEFAULT_MAX_PERMITTED_STEPS))
+        if max_steps < 1:
+            raise ValueError("max_steps must be positive")
+
+        if path == "/vle":
+            return await loop.run_in_executor(self.executor, solve_vle_request, system)
+        if path == "/txy":
+            return await loop.run_in_executor(self.executor, solve_txy_request, system)
+        if path == "/stages":
+            return await self.solve_stages(system, dc.freeze_tower_specs(batch.get_tower_specs(request)), max_steps)
+
+        pressures = [float(P) for P in request["pressures"]]
+        if not 0 < len(pressures) <= MAX_SWEEP_PRESSURES or min(pressures) <= 0:
+            raise ValueError("pressures must be 1 to %d positive values" % MAX_SWEEP_PRESSURES)
+        tower = dc.freeze_tower_specs(batch.get_tower_specs(request)) if "R" in request else None
+        return await loop.run_in_executor(self.executor, solve_sweep_request, system, pressures, tower, max_steps)
+
+    async def solve_stages(self, system, tower, max_steps):
+        """Adds a tower to the open batch of its system, opening one if needed, and waits for the batch to be solved
+
+        Args:
+            system:     SystemSpec
+            tower:      TowerSpec
+            max_steps:  Stage limit
+
+        Returns:
+            result:     Response dictionary of this tower
+        """
+        loop = asyncio.get_running_loop()
+        key = (system, max_steps)
+        towers = self.pending.get(key)
+        if towers is None:
+            towers = self.pending[key] = []
+            loop.call_later(self.batch_window, self.flush, key, towers)
+        future = loop.create_future()
+        towers.append((tower, future))
+        if len(towers) >= MAX_BATCH_SIZE:
+            self.flush(key, towers)
+        return await future
+
+    def flush(self, key, towers):
+        """Closes a batch and submits it to the process pool as one task
+
+        Args:
+            key:        (SystemSpec, max_steps) of the batch
+            towers:     The batch; ignored if it was already flushed for reaching MAX_BATCH_SIZE
+        """
+        if self.pending.get(key) is not towers:
+            return
+        del self.pending[key]
+        self.counters["batches"] += 1
+        self.counters["batched_requests"] += len(towers)
+        task = asyncio.get_running_loop().run_in_executor(self.executor, solve_stage_batch, key[0],
+                                                         [tower for tower, _ in towers], key[1])
+        task.add_done_callback(functools.partial(self.distribute, towers))
+
+    @staticmethod
+    def distribute(towers, task):
+        """Hands each request of a solved batch its own result, or the batch's exception"""
+        if task.exception() is not None:
+            for _, future in towers:
+                if not future.done():
+                    future.set_exception(task.exception())
+            return
+        for (_, future), result in zip(towers, task.result()):
+            if not future.done():
+                future.set_result(result)
+
+    def get_system(self, request):
+        """Builds the SystemSpec of a request, ordering the pair by boiling point
+
+        Args:
+            request:    Decoded request
+
+        Returns:
+            system:     distillation_core.SystemSpec
+        """
+        light, heavy = str(request["light"]).strip(), str(request["heavy"]).strip()
+        pressure = batch.get_number(request, "pressure", vm.STANDARD_PRESSURE)
+        if not pressure > 0:
+            raise ValueError("pressure must be positive")
+        activity_model = str(request.get("activity_model") or am.IDEAL).strip()
+        if activity_model not in am.ACTIVITY_MODELS:
+            raise KeyError("unknown activity model " + activity_model)
+
+        interaction_parameters = None
+        if activity_model != am.IDEAL:
+            parameter_file = am.ACTIVITY_MODELS[activity_model][1]
+            if parameter_file not in self._parameter_files:
+                self._parameter_files[parameter_file] = am.read_interaction_parameters(parameter_file)
+            interaction_parameters = self._parameter_files[parameter_file]
+        try:
+            coefficients = [self.data_source.get_coefficients(chemical) for chemical in (light, heavy)]
+        except KeyError as inst:
+            raise KeyError("unknown chemical " + str(inst.args[0])) from None
+        return dc.make_system_spec(light, heavy, *coefficients, pressure, None, activity_model,
+                                   interaction_parameters)
+
+    def get_statistics(self):
+        """Used to report the effect of the response cache, shared solves and batching
+
+        Returns:
+            statistics:     Dictionary of counters, with the response cache's under "cache"
+        """
+        return {**self.counters, "cache": self.response_cache.get_statistics()}
+
+
+def encode(result):
+    return json.dumps(result).encode()
+
+
+async def serve(host, port, processes=None, batch_window=0.002, data_file="antoineData.csv"):
+    """Runs the service until cancelled, or until it receives SIGTERM
+
+    Either way the process pool is shut down on the way out, so no worker process outlives the service
+
+    Args:
+        host:           Address listened on
+        port:           Port listened on; 0 picks a free one
+        processes:      Worker process count; defaults to the CPU count
+        batch_window:   Seconds a /stages batch stays open
+        data_file:      Antoine coefficient CSV
+    """
+    # Workers are spawned rather than forked from the running event loop
+    with concurrent.futures.ProcessPoolExecutor(processes, multiprocessing.get_context("spawn")) as executor:
+        service = CalculationService(executor, batch_window, data_file)
+        server = await asyncio.start_server(service.handle_connection, host, port)
+        address = server.sockets[0].getsockname()
+        print("Serving on http://%s:%d" % (address[0], address[1]), flush=True)
+        async with server:
+            serving = asyncio.ensure_future(server.serve_forever())
+            try:
+                asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, serving.cancel)
+            except NotImplementedError:
+                # Not available on Windows, where only Ctrl-C stops the service
+                pass
+            try:
+                await serving
+            except asyncio.CancelledError:
+                if not serving.cancelled():
+                    raise
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves VLE, Txy, stage count and sweep calculations over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8750)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--batch-window", type=float, default=2, help="Milliseconds a /stages batch stays open")
+    parser.add_argument("--data", default="antoineData.csv", help="Antoine coefficient CSV")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.processes, args.batch_window / 1000, args.data))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
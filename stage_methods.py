@@ -0,0 +1,496 @@
+from bisect import bisect_right
+
+import numpy as np
+
+import instrumentation as im
+
+DEFAULT_MAX_PERMITTED_STEPS = 51
+
+# Outcomes of a McCabe Thiele solve
+COMPLETE = "complete"
+INFEASIBLE = "infeasible below Rmin"
+STEP_LIMIT = "step limit reached"
+
+
+def get_specification_arrays(tower_specs_list):
+    """Converts a list of TowerSpecs objects into the arrays used by the batched stage solver
+
+    Args:
+        tower_specs_list:   List of TowerSpecs objects
+
+    Returns:
+        R, xB, xF, xD, murphree:    arrays of floats, one entry per tower
+    """
+    specs = np.array([[tower_specs.get_reflux_ratio(), *tower_specs.get_tower_specifications()]
+                      for tower_specs in tower_specs_list], dtype=float).reshape(-1, 5)
+    return tuple(specs.T)
+
+
+def get_efficiency_arrays(tower_specs_list):
+    """Converts the Murphree efficiency profiles of a list of TowerSpecs objects into arrays for find_stage_counts
+
+    Args:
+        tower_specs_list:   List of TowerSpecs objects
+
+    Returns:
+        stripping_murphree: array of floats; stripping-section efficiency of each tower
+        stage_murphree:     2D array of floats, one row per tower and one column per profiled stage, NaN where a tower's
+                            profile has ended; None if no tower has a per-stage profile
+    """
+    stripping_murphree = np.array([tower_specs.get_section_efficiencies()[1] for tower_specs in tower_specs_list],
+                                  dtype=float)
+    profiles = [tower_specs.get_stage_efficiencies() or () for tower_specs in tower_specs_list]
+    length = max((len(profile) for profile in profiles), default=0)
+    if not length:
+        return stripping_murphree, None
+
+    stage_murphree = np.full((len(profiles), length), np.nan)
+    for row, profile in enumerate(profiles):
+        stage_murphree[row, :len(profile)] = profile
+    return stripping_murphree, stage_murphree
+
+
+def get_operating_line_parameters(R, xB, xF, xD):
+    """Array form of TowerSpecs.get_operating_line_parameters
+
+    Returns:
+        m:  Rectifying and stripping slopes, as two arrays
+        b:  Rectifying and stripping y-intercepts, as two arrays
+    """
+    m_rectifying = R / (R + 1)
+    b_rectifying = xD / (R + 1)
+    transition_y = m_rectifying * xF + b_rectifying
+    m_stripping = (transition_y - xB) / (xF - xB)
+    b_stripping = xB * (1 - m_stripping)
+    return [m_rectifying, m_stripping], [b_rectifying, b_stripping]
+
+
+def get_samples(values, index, curves=None):
+    """Picks one sample per tower from a shared curve, or from each tower's own row of a 2D array of curves
+
+    Args:
+        values:     array of floats, or 2D array of floats with one curve per row
+        index:      array of ints; sample taken, one per tower
+        curves:     array of ints; row of "values" used by each tower; None if "values" is a single curve
+
+    Returns:
+        samples:    array of floats, one per tower
+    """
+    return values[index] if curves is None else values[curves, index]
+
+
+def get_effective_curve(x, y, m, b, xF, murphree):
+    """Evaluates a whole effective (Murphree) equilibrium curve in one pass, the sections chosen by NumPy masks
+
+    Each sample moves murphree of the way from the operating line to the equilibrium curve, using the operating line
+    and efficiency of the section it lies in, and is kept on or above the diagonal
+
+    Args:
+        x:          array of floats; liquid mole fractions of the equilibrium curve
+        y:          array of floats; vapor mole fractions of the equilibrium curve
+        m, b:       Rectifying and stripping slopes and y-intercepts of the operating line
+        xF:         float; feed fraction
+        murphree:   Rectifying and stripping Murphree efficiencies
+
+    Returns:
+        effY:       array of floats; effective vapor mole fractions corresponding to x
+    """
+    rectifying = xF < x
+    yOP = np.where(rectifying, m[0] * x + b[0], m[1] * x + b[1])
+    efficiency = np.where(rectifying, murphree[0], murphree[1])
+    return np.maximum(efficiency * (y - yOP) + yOP, x)
+
+
+def get_effective_y(x, y, index, m, b, xF, murphree, curves=None):
+    """Evaluates the effective (Murphree) equilibrium curve of each tower at one sample index per tower
+
+    Args:
+        x:          array of floats; liquid mole fractions of the equilibrium curve(s)
+        y:          array of floats; vapor mole fractions of the equilibrium curve(s)
+        index:      array of ints; sample of the equilibrium curve evaluated, one per tower
+        m, b:       Operating line parameters, as returned by get_operating_line_parameters
+        xF:         array of floats; feed fraction of each tower
+        murphree:   Rectifying and stripping Murphree efficiencies, as two arrays with one entry per tower
+        curves:     array of ints; equilibrium curve used by each tower, see get_samples
+
+    Returns:
+        effY:       array of floats; effective vapor mole fraction of each tower
+    """
+    currX = get_samples(x, index, curves)
+    rectifying = xF < currX
+    yOP = np.where(rectifying, m[0] * currX + b[0], m[1] * currX + b[1])
+    effY = np.where(rectifying, murphree[0], murphree[1]) * (get_samples(y, index, curves) - yOP) + yOP
+    return np.maximum(effY, currX)
+
+
+def invert_stage_effective_curve(q, x, yOP, gap, murphree):
+    """Equivalent of np.interp(q, effY, x) on the effective curve of a single stage efficiency, for one tower
+
+    Only the samples a bisection probes are evaluated, so a stage whose efficiency differs from every other costs
+    O(log(len(x))) rather than rebuilding its curve
+
+    Args:
+        q:          float; vapor mole fraction to invert
+        x:          list of floats; liquid mole fractions of the equilibrium curve
+        yOP:        list of floats; operating line at each x
+        gap:        list of floats; equilibrium curve minus operating line at each x
+        murphree:   float; efficiency of the stage
+
+    Returns:
+        xEq:        float; liquid mole fraction on the stage's effective curve at q
+    """
+    def effective_y(index):
+        return max(yOP[index] + murphree * gap[index], x[index])
+
+    last = len(x) - 1
+    if q <= effective_y(0):
+        return x[0]
+    if q >= effective_y(last):
+        return x[last]
+    index = bisect_right(range(last + 1), q, key=effective_y) - 1
+    y0 = effective_y(index)
+    y1 = effective_y(index + 1)
+    if y1 == y0:
+        return x[index]
+    return x[index] + (q - y0) * (x[index + 1] - x[index]) / (y1 - y0)
+
+
+def interpolate_curves(q, xp, fp, curves):
+    """Row-wise equivalent of np.interp(q, xp[curve], fp[curve]), each tower interpolating on its own curve
+
+    Args:
+        q:          array of floats; values to interpolate at, one per tower
+        xp:         2D array of floats; ascending sample positions, one curve per row
+        fp:         2D array of floats; sample values, one curve per row
+        curves:     array of ints; row used by each tower
+
+    Returns:
+        values:     array of floats; interpolated value of each tower, clamped to the ends of its curve
+    """
+    lower = np.zeros(len(q), dtype=int)
+    upper = np.full(len(q), xp.shape[1] - 1)
+    while np.any(upper - lower > 1):
+        middle = (lower + upper) // 2
+        below = xp[curves, middle] <= q
+        lower = np.where(below, middle, lower)
+        upper = np.where(below, upper, middle)
+
+    x0 = xp[curves, lower]
+    x1 = xp[curves, upper]
+    width = np.where(x1 == x0, 1, x1 - x0)
+    t = np.clip((q - x0) / width, 0, 1)
+    return fp[curves, lower] + t * (fp[curves, upper] - fp[curves, lower])
+
+
+def invert_effective_vapor_liquid_equilibrium(q, x, y, m, b, xF, murphree, curves=None, feed_index=None):
+    """Row-wise equivalent of np.interp(q, effY, x), each tower interpolating against its own effective curve
+
+    The effective curves are never built in full; a vectorized binary search evaluates each tower's curve only at
+    the samples it probes, so the cost per call is proportional to the number of towers times log(len(x))
+
+    Args:
+        q:          array of floats; vapor mole fraction to invert, one per tower
+        x, y:       arrays of floats; the equilibrium curve(s)
+        m, b, xF, murphree:     Per-tower parameters of the effective curve, see get_effective_y
+        curves:     array of ints; equilibrium curve used by each tower, see get_samples
+        feed_index: array of ints; first sample of each tower's rectifying section, see get_feed_indices.  If given,
+                    the search is confined to the section the result lies in, so where differing section
+                    efficiencies make the curve jump at the feed, the result is the largest x reaching q, as with
+                    get_stepping_branch
+
+    Returns:
+        xEq:        array of floats; liquid mole fraction on the effective curve at q
+    """
+    lower = np.zeros(len(q), dtype=int)
+    upper = np.full(len(q), x.shape[-1] - 1)
+    if feed_index is not None:
+        rectifying = get_effective_y(x, y, feed_index, m, b, xF, murphree, curves) <= q
+        lower = np.where(rectifying, feed_index, lower)
+        upper = np.where(rectifying, upper, feed_index)
+    while np.any(upper - lower > 1):
+        middle = (lower + upper) // 2
+        below = get_effective_y(x, y, middle, m, b, xF, murphree, curves) <= q
+        lower = np.where(below, middle, lower)
+        upper = np.where(below, upper, middle)
+
+    y0 = get_effective_y(x, y, lower, m, b, xF, murphree, curves)
+    y1 = get_effective_y(x, y, upper, m, b, xF, murphree, curves)
+    width = np.where(y1 == y0, 1, y1 - y0)
+    t = np.clip((q - y0) / width, 0, 1)
+    x0 = get_samples(x, lower, curves)
+    return x0 + t * (get_samples(x, upper, curves) - x0)
+
+
+def get_feed_indices(x, xF, curves=None):
+    """Finds the first sample of each tower's equilibrium curve lying in the rectifying section (xF < x)
+
+    Args:
+        x:          array of floats; liquid mole fractions of the equilibrium curve, ascending, or 2D with one curve per
+                    row
+        xF:         array of floats; feed fraction of each tower
+        curves:     array of ints; equilibrium curve used by each tower, see get_samples
+
+    Returns:
+        feed_index: array of ints, one per tower; the last sample if the whole curve is in the stripping section
+    """
+    if curves is None:
+        index = np.searchsorted(x, xF, side="right")
+    else:
+        index = np.count_nonzero(x[curves] <= xF[:, np.newaxis], axis=1)
+    return np.minimum(index, x.shape[-1] - 1)
+
+
+def get_azeotrope(x, y):
+    """Finds where the equilibrium curve first meets the diagonal between pure heavy and pure light
+
+    Args:
+        x:          array of floats; liquid mole fractions of the equilibrium curve, ascending, or 2D with one curve per
+                    row
+        y:          array of floats; vapor mole fractions of the equilibrium curve(s)
+
+    Returns:
+        azeotrope:  float, or array of floats with one per row; liquid mole fraction of the azeotrope, linearly
+                    interpolated between samples, NaN if the curve stays above the diagonal
+    """
+    x = np.asarray(x, dtype=float)
+    difference = np.asarray(y, dtype=float) - x
+    crossing = (0 < x) & (x < 1) & (difference <= 0)
+    found = crossing.any(axis=-1)
+    index = np.expand_dims(np.maximum(crossing.argmax(axis=-1), 1), -1)
+
+    x0 = np.take_along_axis(x, index - 1, -1)[..., 0]
+    x1 = np.take_along_axis(x, index, -1)[..., 0]
+    d0 = np.take_along_axis(difference, index - 1, -1)[..., 0]
+    d1 = np.take_along_axis(difference, index, -1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        azeotrope = np.where(d0 > d1, x0 + d0 / (d0 - d1) * (x1 - x0), x1)
+    azeotrope = np.where(found, azeotrope, np.nan)
+    return azeotrope if azeotrope.ndim else float(azeotrope)
+
+
+def get_stepping_branch(x, y, azeotrope=None, feed_index=None):
+    """Returns the part of the equilibrium curve McCabe Thiele stepping can use, as a curve monotone in y
+
+    Past an azeotrope the curve falls below the diagonal and y(x) is no longer invertible, so every sample from the
+    azeotrope on is replaced by the azeotrope itself; the arrays keep their shape, so 2D curves stay rectangular.
+    Stepping from a distillate beyond the azeotrope therefore stalls there rather than jumping to the far branch.
+
+    y is then made non-decreasing by lowering each sample to the smallest y at or beyond it, so inverting the branch
+    gives the largest x reaching a vapor mole fraction: the first point a step meets moving left from the operating
+    line.  Monotone curves without an azeotrope are returned unchanged.  An effective curve jumps at the feed when the
+    two sections' efficiencies differ, so with feed_index each section is made non-decreasing on its own instead, to
+    be inverted section by section as invert_effective_vapor_liquid_equilibrium does.
+
+    Args:
+        x:          array of floats; liquid mole fractions of the equilibrium curve, ascending, or 2D with one curve per
+                    row
+        y:          array of floats; vapor mole fractions of the equilibrium curve(s)
+        azeotrope:  float or array of floats; azeotrope(s) to cut at, e.g. the true curve's when y is an effective
+                    curve, whose clamping to the diagonal below xB is not an azeotrope; found by get_azeotrope if None
+        feed_index: int; first sample of a single curve's rectifying section, see get_feed_indices
+
+    Returns:
+        x:          array of floats; liquid mole fractions of the branch
+        y:          array of floats; vapor mole fractions of the branch, non-decreasing along each curve
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if azeotrope is None:
+        azeotrope = get_azeotrope(x, y)
+    azeotrope = np.expand_dims(azeotrope, -1)
+    past = (azeotrope <= x) & (0 < x)
+    x = np.where(past, azeotrope, x)
+    y = np.where(past, azeotrope, y)
+    if feed_index is None:
+        return x, get_lower_envelope(y)
+    return x, np.concatenate([get_lower_envelope(y[:feed_index]), get_lower_envelope(y[feed_index:])])
+
+
+def get_lower_envelope(y):
+    """Lowers each sample to the smallest value at or beyond it along the last axis, giving a non-decreasing curve"""
+    return np.flip(np.minimum.accumulate(np.flip(y, -1), axis=-1), -1)
+
+
+def find_stage_counts(x, y, R, xB, xF, xD, murphree, max_steps=DEFAULT_MAX_PERMITTED_STEPS,
+                      return_compositions=False, minimum_reflux=None, stripping_murphree=None, stage_murphree=None):
+    """Steps the McCabe Thiele construction of many towers in lockstep, sharing one equilibrium curve
+
+    Mirrors BinarySystem.plot_McCabe_Thiele_steps: every still-active tower takes one step per iteration, so the
+    Python loop runs once per stage rather than once per stage per tower.  Given 2D x and y, each row is a separate
+    equilibrium curve (e.g. one per pressure), and the curve index is broadcast against the tower parameters.
+
+    Towers at or below their minimum reflux would only creep towards the pinch, so they are never stepped, and a tower
+    whose step makes no progress is stopped at once; the cost therefore follows the stages actually required, however
+    large max_steps is.  Both report max_steps stages, like a tower that reached the limit; see get_stage_status.
+
+    Args:
+        x:          array of floats; liquid mole fractions of the equilibrium curve, or 2D with one curve per row
+        y:          array of floats; vapor mole fractions of the equilibrium curve, or 2D with one curve per row
+        R, xB, xF, xD, murphree:    floats or arrays of floats, broadcast against each other; murphree is the
+                    efficiency of every stage, or of the rectifying stages if stripping_murphree is given
+        max_steps:  Step limit; towers reaching it did not complete the distillation
+        return_compositions:    Whether the liquid mole fraction leaving every stage is returned as well
+        minimum_reflux: array of floats; minimum reflux ratio of each tower, if already found by get_minimum_reflux
+        stripping_murphree: float or array of floats broadcast like murphree; efficiency of the stripping stages
+        stage_murphree: 2D array of floats, one row per tower (or one row shared by all) and one column per stage from
+                    the top; overrides the section efficiencies, with NaN or stages past its last column falling back
+                    to them.  See get_efficiency_arrays.
+
+    Returns:
+        steps:      array of ints; stages required, equal to max_steps if the distillation could not be completed
+        feed_steps: array of ints; optimal feed stage
+        compositions:   2D array of floats, one row per tower and one column per stage taken by any tower, NaN past
+                        each tower's last stage; only returned if return_compositions is True
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    if stripping_murphree is None:
+        stripping_murphree = murphree
+    curves = None
+    if x.ndim == 2:
+        R, xB, xF, xD, murphree, stripping_murphree, curves = np.broadcast_arrays(R, xB, xF, xD, murphree,
+                                                                                 stripping_murphree, np.arange(len(x)))
+        curves = np.ravel(curves)
+    R, xB, xF, xD, murphree, stripping_murphree = (np.ravel(value).astype(float) for value in
+                                                   np.broadcast_arrays(R, xB, xF, xD, murphree, stripping_murphree))
+    m, b = get_operating_line_parameters(R, xB, xF, xD)
+    feed_index = get_feed_indices(x, xF, curves)
+    if stage_murphree is not None:
+        stage_murphree = np.asarray(stage_murphree, dtype=float)
+        stage_murphree = np.broadcast_to(stage_murphree, (len(R), stage_murphree.shape[-1]))
+    if minimum_reflux is None:
+        minimum_reflux = get_minimum_reflux(x if curves is None else x[curves], y if curves is None else y[curves],
+                                            xB, xF, xD)
+
+    currX = xD.copy()
+    currY = xD.copy()
+    steps = np.zeros(len(R), dtype=int)
+    feed_steps = np.ones(len(R), dtype=int)
+    found_feed_step = np.zeros(len(R), dtype=bool)
+    # Grown as towers take more stages, so a large max_steps costs no memory up front
+    compositions = np.full((len(R), min(max_steps, 64)), np.nan) if return_compositions else None
+
+    infeasible = (xB < currX) & (R <= minimum_reflux)
+    steps[infeasible] = max_steps
+    active = np.flatnonzero((xB < currX) & ~infeasible)
+    iterations = 0
+    while len(active) and steps[active[0]] < max_steps:
+        iterations += 1
+        steps[active] += 1
+        if curves is None:
+            xEq = np.interp(currY[active], y, x)
+        else:
+            xEq = interpolate_curves(currY[active], y, x, curves[active])
+
+        # Every active tower is on the same stage, so one column of the profiles applies to all of them
+        rectifying_efficiency = murphree[active]
+        stripping_efficiency = stripping_murphree[active]
+        if stage_murphree is not None and iterations <= stage_murphree.shape[1]:
+            profiled = stage_murphree[active, iterations - 1]
+            rectifying_efficiency = np.where(np.isnan(profiled), rectifying_efficiency, profiled)
+            stripping_efficiency = np.where(np.isnan(profiled), stripping_efficiency, profiled)
+
+        # Goes to the effective equilibrium instead on every step except the final
+        effective = (rectifying_efficiency != 1) | (stripping_efficiency != 1)
+        effective &= xB[active] < xEq
+        if effective.any():
+            rows = active[effective]
+            xEq[effective] = invert_effective_vapor_liquid_equilibrium(currY[rows], x, y,
+                                                                       [m[0][rows], m[1][rows]],
+                                                                       [b[0][rows], b[1][rows]],
+                                                                       xF[rows],
+                                                                       [rectifying_efficiency[effective],
+                                                                        stripping_efficiency[effective]],
+                                                                       None if curves is None else curves[rows],
+                                                                       feed_index[rows])
+
+        inside = xB[active] < xEq
+        stripping = inside & (xEq < xF[active])
+        yOP = np.where(stripping, m[1][active] * xEq + b[1][active], m[0][active] * xEq + b[0][active])
+        yOP = np.where(inside, yOP, xEq)
+
+        new_feed = stripping & ~found_feed_step[active]
+        feed_steps[active[new_feed]] = steps[active[new_feed]]
+        found_feed_step[active[new_feed]] = True
+
+        if return_compositions:
+            if iterations > compositions.shape[1]:
+                compositions = np.hstack([compositions, np.full(compositions.shape, np.nan)])
+            compositions[active, steps[active] - 1] = xEq
+
+        # A step that makes no progress would repeat forever
+        stalled = (xB[active] < xEq) & (xEq >= currX[active])
+        steps[active[stalled]] = max_steps
+        currX[active] = xEq
+        currY[active] = yOP
+        active = active[(xB[active] < xEq) & ~stalled]
+
+    im.count("batch stepping iterations", iterations)
+    incomplete = int(np.count_nonzero(steps >= max_steps))
+    if incomplete:
+        im.record_failure("find_stage_counts", {"step_limit": max_steps, "towers": incomplete,
+                                                "infeasible": int(np.count_nonzero(infeasible))})
+    if return_compositions:
+        return steps, feed_steps, compositions[:, :max(iterations, 1)]
+    return steps, feed_steps
+
+
+def get_stage_status(steps, R, minimum_reflux, max_steps=DEFAULT_MAX_PERMITTED_STEPS):
+    """Names the outcome of each solve of find_stage_counts
+
+    Args:
+        steps:          array of ints; stages required, as returned by find_stage_counts
+        R:              floats or arrays of floats; reflux ratio of each tower
+        minimum_reflux: array of floats; minimum reflux ratio of each tower
+        max_steps:      Step limit the solve used
+
+    Returns:
+        status:         array of strings; COMPLETE, INFEASIBLE or STEP_LIMIT for each tower
+    """
+    R, minimum_reflux = np.broadcast_arrays(R, minimum_reflux)
+    return np.where(np.asarray(steps) < max_steps, COMPLETE,
+                    np.where(np.ravel(R) <= np.ravel(minimum_reflux), INFEASIBLE, STEP_LIMIT))
+
+
+def get_minimum_reflux(x, y, xB, xF, xD):
+    """Finds the minimum reflux ratio from the equilibrium curve, for a saturated-liquid feed
+
+    The rectifying line through (xD, xD) must stay on or below the equilibrium curve for xF <= x < xD, and the stripping
+    line through (xB, xB) must do the same for xB < x <= xF.  Each section's tightest point (its pinch) gives a lower
+    bound on R; the minimum reflux is the larger of the two.
+
+    Both lines are straight, so against the piecewise-linear curve the pinch is always at a sample or at the feed, and
+    the whole search is one vectorized pass over the VLE table.  The pinch is where the true curve meets the operating
+    line, which is also where the Murphree effective curve does, so Rmin does not depend on the Murphree efficiency.
+
+    Args:
+        x:          array of floats; liquid mole fractions of the equilibrium curve, increasing, or 2D with one curve
+                    per tower
+        y:          array of floats; vapor mole fractions of the equilibrium curve(s)
+        xB, xF, xD: floats or arrays of floats, broadcast against each other
+
+    Returns:
+        Rmin:       array of floats; minimum reflux ratio, inf if no reflux ratio can achieve the separation
+    """
+    xB, xF, xD = (np.ravel(value).astype(float) for value in np.broadcast_arrays(xB, xF, xD))
+    column = (slice(None), np.newaxis)
+    if np.ndim(x) == 2:
+        yF = interpolate_curves(xF, x, y, np.arange(len(x)))
+    else:
+        yF = np.interp(xF, x, y)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        # Rectifying pinch: steepest required slope of a line from (xD, xD) to the curve
+        rectifying = (xF[column] <= x) & (x < xD[column])
+        slopes = np.where(rectifying, (xD[column] - y) / (xD[column] - x), -np.inf)
+        slope = np.maximum(slopes.max(axis=1), (xD - yF) / (xD - xF))
+        rectifying_minimum = np.where(slope < 1, slope / (1 - slope), np.inf)
+
+        # Stripping pinch: shallowest permitted slope of a line from (xB, xB) to the curve
+        stripping = (xB[column] < x) & (x <= xF[column])
+        slopes = np.where(stripping, (y - xB[column]) / (x - xB[column]), np.inf)
+        slope = np.minimum(slopes.min(axis=1), (yF - xB) / (xF - xB))
+        yq = xB + slope * (xF - xB)
+        stripping_minimum = np.where(yq > xF, (xD - yq) / (yq - xF), np.inf)
+
+    return np.maximum(np.maximum(rectifying_minimum, stripping_minimum), 0)
@@ -0,0 +1,285 @@
+import numpy as np
+
+import activity_models as am
+import instrumentation as im
+
+STANDARD_PRESSURE = 760
+
+
+def get_Psat(antoine_coefficients, T):
+    """Determines the saturated pressure (Psat) at one or many temperatures, using the Antoine equation
+
+    Uses the Antoine equation, e^(A - B/(T + C)), evaluated element-wise so an entire temperature grid is handled in a
+    single call
+
+    Args:
+        antoine_coefficients:   [A, B, C] for the chemical of interest
+        T:                      float or array of floats; temperature(s) used, in Kelvin
+
+    Returns:
+        Psat:                   The saturated pressure(s) for the given conditions, in mmHg
+    """
+    A, B, C = antoine_coefficients
+    return np.exp(A - B / (np.asarray(T, dtype=float) + C))
+
+
+def get_boiling_point(antoine_coefficients, P=STANDARD_PRESSURE):
+    """Determines the boiling point of a chemical using Antoine's equation, ln(P) = A - B / (T + C)
+
+    Args:
+        antoine_coefficients:   [A, B, C] for the chemical of interest
+        P:                      System pressure, in mmHg
+
+    Returns:
+        T:                      Boiling point, in Kelvin
+    """
+    A, B, C = antoine_coefficients
+    return B / (A - np.log(P)) - C
+
+
+def solve_binary_Raoult_Relation(light_coefficients, heavy_coefficients, T, P=STANDARD_PRESSURE):
+    """Finds the x value(s) satisfying the binary Raoult's relationship, P = lightPsat * x + heavyPsat * (1 - x)
+
+    The relationship is linear in x, so it is solved in closed form, x = (P - heavyPsat) / (lightPsat - heavyPsat),
+    rather than iteratively
+
+    Args:
+        light_coefficients:     Antoine coefficients of the light chemical
+        heavy_coefficients:     Antoine coefficients of the heavy chemical
+        T:                      float or array of floats; temperature(s) used, in Kelvin
+        P:                      System pressure, in mmHg
+
+    Returns:
+        x:                      Liquid mole fraction(s) of the light chemical
+    """
+    light_Psat = get_Psat(light_coefficients, T)
+    heavy_Psat = get_Psat(heavy_coefficients, T)
+    return (P - heavy_Psat) / (light_Psat - heavy_Psat)
+
+
+def get_light_chemical_y(light_coefficients, x, T, P=STANDARD_PRESSURE):
+    """Determine the vapor mole fraction(s) (y) of the light component using Raoult's Law, y = x*Psat/P
+
+    Args:
+        light_coefficients:     Antoine coefficients of the light chemical
+        x:                      float or array of floats; liquid mole fraction(s) of the light chemical
+        T:                      float or array of floats; temperature(s) matching x
+        P:                      System pressure, in mmHg
+
+    Returns:
+        y:                      Corresponding vapor mole fraction(s)
+    """
+    return x * get_Psat(light_coefficients, T) / P
+
+
+def get_vapor_liquid_equilibrium_data(light_coefficients, heavy_coefficients, T, P=STANDARD_PRESSURE):
+    """Solves the liquid and vapor mole fractions of the light chemical over a whole temperature grid at once
+
+    Args:
+        light_coefficients:     Antoine coefficients of the light chemical
+        heavy_coefficients:     Antoine coefficients of the heavy chemical
+        T:                      array of floats; temperatures used, in Kelvin
+        P:                      System pressure, in mmHg
+
+    Returns:
+        x:                      array of floats; liquid mole fractions corresponding to T
+        y:                      array of floats; vapor mole fractions corresponding to T
+    """
+    light_Psat = get_Psat(light_coefficients, T)
+    heavy_Psat = get_Psat(heavy_coefficients, T)
+    x = (P - heavy_Psat) / (light_Psat - heavy_Psat)
+    y = x * light_Psat / P
+    return x, y
+
+
+def get_pressure_sweep_data(light_coefficients, heavy_coefficients, pressures, points=101, activity_model=am.IDEAL,
+                            activity_parameters=None):
+    """Solves the VLE curves of a binary system at every pressure in one broadcast computation
+
+    For ideal systems each pressure gets its own uniform grid of "points" temperatures spanning its two pure boiling
+    points; non-ideal systems share one composition grid, solved for every pressure by one bubble-point call.  Either
+    way every curve covers x from 0 to 1 exactly.
+
+    Args:
+        light_coefficients:     Antoine coefficients of the light chemical
+        heavy_coefficients:     Antoine coefficients of the heavy chemical
+        pressures:              array of floats; system pressures, in mmHg
+        points:                 Samples per curve
+        activity_model:         Key of activity_models.ACTIVITY_MODELS
+        activity_parameters:    Interaction parameters of the model, with the light chemical as chemical 1
+
+    Returns:
+        T:                      2D array of floats, one row per pressure; temperatures corresponding to x, in Kelvin
+        x:                      2D array of floats; liquid mole fractions, ascending from pure heavy to pure light
+        y:                      2D array of floats; vapor mole fractions corresponding to x
+    """
+    P = np.asarray(pressures, dtype=float).reshape(-1, 1)
+    if activity_model != am.IDEAL:
+        x = np.broadcast_to(get_composition_grid(points), (len(P), points))
+        T, y = get_bubble_point_data(light_coefficients, heavy_coefficients, x, P, activity_model, activity_parameters)
+        return T, np.array(x), y
+
+    light_boiling_point = get_boiling_point(light_coefficients, P)
+    heavy_boiling_point = get_boiling_point(heavy_coefficients, P)
+    T = heavy_boiling_point + (light_boiling_point - heavy_boiling_point) * np.linspace(0, 1, points)
+    x, y = get_vapor_liquid_equilibrium_data(light_coefficients, heavy_coefficients, T, P)
+    return T, x, y
+
+
+def get_adaptive_temperatures(light_coefficients, heavy_coefficients, temperature_bounds, tolerance,
+                              P=STANDARD_PRESSURE, initial_points=9, max_passes=30):
+    """Builds a temperature grid that is refined only where linear interpolation of the VLE curves is inaccurate
+
+    Each pass evaluates the midpoint of every interval still being refined, and compares the exact x(T) and y(x) there
+    against the straight line between the interval's edges.  Intervals whose error exceeds "tolerance" are split and
+    revisited on the next pass; all others are final.
+
+    Args:
+        light_coefficients:     Antoine coefficients of the light chemical
+        heavy_coefficients:     Antoine coefficients of the heavy chemical
+        temperature_bounds:     [lower, upper] temperatures to cover, in Kelvin
+        tolerance:              Maximum permitted linear interpolation error in x(T) and y(x)
+        P:                      System pressure, in mmHg
+        initial_points:         Size of the uniform grid refinement starts from
+        max_passes:             Upper limit on refinement passes
+
+    Returns:
+        T:                      array of floats; ascending temperatures
+    """
+    T = np.linspace(temperature_bounds[0], temperature_bounds[1], initial_points)
+    x, y = get_vapor_liquid_equilibrium_data(light_coefficients, heavy_coefficients, T, P)
+    refine = np.ones(len(T) - 1, dtype=bool)
+
+    for passes in range(max_passes):
+        if not refine.any():
+            break
+        left = np.flatnonzero(refine)
+        T_mid = (T[left] + T[left + 1]) / 2
+        x_mid, y_mid = get_vapor_liquid_equilibrium_data(light_coefficients, heavy_coefficients, T_mid, P)
+
+        x_error = np.abs(x_mid - (x[left] + x[left + 1]) / 2)
+        dx = x[left + 1] - x[left]
+        safe_dx = np.where(dx == 0, 1, dx)
+        y_linear = y[left] + (y[left + 1] - y[left]) * (x_mid - x[left]) / safe_dx
+        y_error = np.where(dx == 0, 0, np.abs(y_mid - y_linear))
+        split = np.maximum(x_error, y_error) > tolerance
+
+        # Both halves of a split interval are revisited; unsplit intervals and their new neighbours are final
+        T = np.insert(T, left + 1, T_mid)
+        x = np.insert(x, left + 1, x_mid)
+        y = np.insert(y, left + 1, y_mid)
+        refine = np.zeros(len(T) - 1, dtype=bool)
+        new_left = left + np.arange(len(left))
+        refine[new_left] = split
+        refine[new_left + 1] = split
+    else:
+        passes = max_passes
+        if refine.any():
+            im.record_failure("get_adaptive_temperatures", {"tolerance": tolerance, "intervals": int(refine.sum())})
+
+    im.count("adaptive grid passes", passes)
+    return T
+
+
+def get_bubble_point_temperatures(light_coefficients, heavy_coefficients, x, P=STANDARD_PRESSURE, tolerance=1e-9,
+                                  max_iterations=50, activity_model=am.IDEAL, activity_parameters=None):
+    """Solves the bubble-point temperature of every liquid mole fraction in x at once
+
+    Solves ln(x * gamma1 * lightPsat + (1 - x) * gamma2 * heavyPsat) = ln(P) by Newton's method on whole arrays, with
+    the activity coefficients held constant in the derivative.  The logarithm is nearly linear in 1 / T, so Newton
+    converges in a few iterations; each temperature also keeps a bracket around the two pure boiling points (widened
+    for non-ideal models, whose azeotropes can boil outside them), and any Newton step leaving it is replaced by a
+    bisection of the bracket.  Nothing is mutated, and NaN entries of x are returned as NaN.
+
+    Args:
+        light_coefficients:     Antoine coefficients of the light chemical
+        heavy_coefficients:     Antoine coefficients of the heavy chemical
+        x:                      float or array of floats; liquid mole fraction(s) of the light chemical
+        P:                      float or array of floats broadcast against x; system pressure(s), in mmHg
+        tolerance:              Temperature change below which an entry is converged, in Kelvin
+        max_iterations:         Upper limit on Newton iterations
+        activity_model:         Key of activity_models.ACTIVITY_MODELS
+        activity_parameters:    Interaction parameters of the model, with the light chemical as chemical 1
+
+    Returns:
+        T:                      float or array of floats matching x; bubble-point temperature(s), in Kelvin
+    """
+    x = np.asarray(x, dtype=float)
+    P = np.broadcast_to(np.asarray(P, dtype=float), x.shape)
+    _, B_light, C_light = light_coefficients
+    _, B_heavy, C_heavy = heavy_coefficients
+
+    solve = np.isfinite(x)
+    xs = x[solve]
+    Ps = P[solve]
+    light_boiling_point = get_boiling_point(light_coefficients, Ps)
+    heavy_boiling_point = get_boiling_point(heavy_coefficients, Ps)
+    margin = 1 if activity_model == am.IDEAL else 50
+    lower = np.maximum(np.minimum(light_boiling_point, heavy_boiling_point) - margin, max(-C_light, -C_heavy) + 1)
+    upper = np.maximum(light_boiling_point, heavy_boiling_point) + margin
+    T = np.clip(xs * light_boiling_point + (1 - xs) * heavy_boiling_point, lower, upper)
+
+    converged = np.ones(xs.shape, dtype=bool)
+    for iterations in range(1, max_iterations + 1):
+        gamma_light, gamma_heavy = am.get_activity_coefficients(activity_model, activity_parameters, xs, T)
+        light_term = xs * gamma_light * get_Psat(light_coefficients, T)
+        heavy_term = (1 - xs) * gamma_heavy * get_Psat(heavy_coefficients, T)
+        total = light_term + heavy_term
+        residual = np.log(total / Ps)
+        slope = (light_term * B_light / (T + C_light) ** 2 + heavy_term * B_heavy / (T + C_heavy) ** 2) / total
+
+        lower = np.where(residual < 0, T, lower)
+        upper = np.where(residual > 0, T, upper)
+        T_new = T - residual / slope
+        T_new = np.where((lower <= T_new) & (T_new <= upper), T_new, (lower + upper) / 2)
+
+        converged = np.abs(T_new - T) < tolerance
+        T = T_new
+        if converged.all():
+            break
+
+    im.count("bubble point iterations", iterations if len(xs) else 0)
+    if not converged.all():
+        im.record_failure("get_bubble_point_temperatures", {"unconverged": int((~converged).sum()),
+                                                            "x": xs[~converged][:10].tolist()})
+
+    temperatures = np.full(x.shape, np.nan)
+    temperatures[solve] = T
+    return temperatures if temperatures.ndim else float(temperatures)
+
+
+def get_bubble_point_data(light_coefficients, heavy_coefficients, x, P=STANDARD_PRESSURE, activity_model=am.IDEAL,
+                          activity_parameters=None):
+    """Solves the bubble-point temperature and vapor mole fraction of a whole liquid composition grid at once
+
+    Used for non-ideal systems, whose x(T) has no closed form and is not single-valued across an azeotrope; T(x) is
+    always single-valued, so the grid is laid out in x instead of T
+
+    Args:
+        light_coefficients:     Antoine coefficients of the light chemical
+        heavy_coefficients:     Antoine coefficients of the heavy chemical
+        x:                      array of floats; liquid mole fractions of the light chemical
+        P:                      float or array of floats broadcast against x; system pressure(s), in mmHg
+        activity_model:         Key of activity_models.ACTIVITY_MODELS
+        activity_parameters:    Interaction parameters of the model, with the light chemical as chemical 1
+
+    Returns:
+        T:                      array of floats; bubble-point temperatures corresponding to x, in Kelvin
+        y:                      array of floats; vapor mole fractions corresponding to x
+    """
+    T = get_bubble_point_temperatures(light_coefficients, heavy_coefficients, x, P,
+                                      activity_model=activity_model, activity_parameters=activity_parameters)
+    gamma_light, _ = am.get_activity_coefficients(activity_model, activity_parameters, x, T)
+    return T, x * gamma_light * get_Psat(light_coefficients, T) / P
+
+
+def get_composition_grid(points):
+    """Liquid mole fractions from 0 to 1, clustered towards both ends where non-ideal curves change fastest
+
+    Args:
+        points:     Number of mole fractions
+
+    Returns:
+        x:          array of floats; ascending
+    """
+    return (1 - np.cos(np.linspace(0, np.pi, points))) / 2